@@ -47,6 +47,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "corsheaders",
     "rest_framework",
     "rest_framework.authtoken",
@@ -190,6 +191,133 @@ OBJECTS_URL = "objects/"
 THUMBNAILS_URL = "thumbnails/"
 IMAGES_URL = "images/"
 
+# Uploaded files are stored once per distinct content, as blobs in this folder, and
+# saved under their names as hard links to them. See `piezas.storage`
+BLOBS_URL = "blobs/"
+DEFAULT_FILE_STORAGE = "piezas.storage.ContentAddressedStorage"
+
+# Hours during which the unused rows and media files are kept by the
+# collectMediaGarbage command, so uploads in progress are not removed
+MEDIA_GARBAGE_GRACE_HOURS = 24
+
+# Folder for the binary glTF (GLB) conversions of the 3D models, and whether their
+# vertex data is quantized (KHR_mesh_quantization) to make them smaller
+GLB_URL = "glb/"
+GLB_QUANTIZE = env.bool("GLB_QUANTIZE", default=True)
+
+# Folder for the simplified versions (levels of detail) of the 3D models, and their
+# triangle budgets. Models with fewer triangles than a budget do not get that version
+LOD_URL = "lod/"
+LOD_TRIANGLE_BUDGETS = (5000, 20000, 80000)
+
+# Folder for the web versions of the textures and materials of the 3D models, which the
+# viewer loads instead of the originals. Web textures are scaled to power-of-two sizes no
+# larger than WEB_TEXTURE_MAX_SIZE and encoded as WEB_TEXTURE_FORMAT ("jpeg" or "webp";
+# textures with transparency are kept lossless as PNG when it is "jpeg"). Their mipmap
+# chain, halving the size down to 1 pixel, is only built if WEB_TEXTURE_MIPMAPS is True
+WEB_TEXTURES_URL = "web/"
+WEB_TEXTURE_MAX_SIZE = 2048
+WEB_TEXTURE_FORMAT = env.str("WEB_TEXTURE_FORMAT", default="jpeg")
+WEB_TEXTURE_QUALITY = 85
+WEB_TEXTURE_MIPMAPS = env.bool("WEB_TEXTURE_MIPMAPS", default=False)
+
+# Compression levels of the precompressed gzip and Brotli copies of the object and
+# material files of the 3D models. Brotli copies need the `brotli` package
+SIDECAR_GZIP_LEVEL = 9
+SIDECAR_BROTLI_QUALITY = 9
+
+# Folder for the resized variants of the thumbnails and images, their widths in pixels,
+# the formats they are encoded in, when the installed Pillow supports them, and the
+# encoding quality
+DERIVATIVES_URL = "derivatives/"
+DERIVATIVE_WIDTHS = (320, 640, 1280)
+DERIVATIVE_FORMATS = ("webp", "avif")
+DERIVATIVE_QUALITY = 80
+
+# Longest side, in pixels, and encoding quality of the tiny placeholders of the
+# thumbnails and images, sent in the API responses as data URIs so the catalog can
+# paint a blurred preview before the images arrive
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 50
+
+# Widths, formats and qualities accepted by the image resizing endpoint, folder of its
+# disk cache, maximum size of the cache in bytes, minimum number of seconds between two
+# checks of that size, and how long clients may reuse a resized image, in seconds
+RESIZE_WIDTHS = (160, 240, 320, 480, 640, 800, 960, 1280, 1600, 1920)
+RESIZE_FORMATS = ("webp", "avif", "jpeg", "png")
+RESIZE_QUALITIES = (50, 60, 70, 80, 90)
+RESIZE_CACHE_URL = "resized/"
+RESIZE_CACHE_MAX_BYTES = env.int("RESIZE_CACHE_MAX_BYTES", default=1024**3)
+RESIZE_CACHE_EVICT_INTERVAL = env.int("RESIZE_CACHE_EVICT_INTERVAL", default=60)
+RESIZE_MAX_AGE = 7 * 24 * 3600
+
+# Folder for the cached download archives of the artifacts
+ARCHIVES_URL = "archives/"
+
+# If True, downloads are sent by nginx: Django answers with an X-Accel-Redirect header
+# to PROTECTED_MEDIA_URL, an internal nginx location serving MEDIA_ROOT
+DOWNLOAD_ACCEL_REDIRECT = env.bool("DOWNLOAD_ACCEL_REDIRECT", default=False)
+PROTECTED_MEDIA_URL = "/protected-media/"
+
+# Seconds the download token returned when a requester is recorded stays valid. The
+# archive of the artifact is only sent with a valid token, so every download is recorded
+DOWNLOAD_TOKEN_MAX_AGE = env.int("DOWNLOAD_TOKEN_MAX_AGE", default=10 * 60)
+
+# Limits of the bulk downloads: maximum number of artifacts and total size of their
+# files, in bytes, per archive
+BULK_DOWNLOAD_MAX_ARTIFACTS = env.int("BULK_DOWNLOAD_MAX_ARTIFACTS", default=100)
+BULK_DOWNLOAD_MAX_BYTES = env.int("BULK_DOWNLOAD_MAX_BYTES", default=2 * 1024**3)
+# Threads reading the files of a bulk download ahead, and maximum number of files read
+# ahead of the one being compressed
+BULK_DOWNLOAD_WORKERS = env.int("BULK_DOWNLOAD_WORKERS", default=4)
+BULK_DOWNLOAD_READ_AHEAD = env.int("BULK_DOWNLOAD_READ_AHEAD", default=8)
+
+# Maximum number of database queries per request, by view class name.
+# Views not listed here use their own `query_budget` attribute
+QUERY_BUDGETS = {}
+
+# If True, views that exceed their query budget fail instead of logging a warning
+QUERY_BUDGET_STRICT = env.bool("QUERY_BUDGET_STRICT", default=False)
+
+# Cache backends available for the catalog cache, by short name.
+# A full backend path can also be given
+CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+}
+
+CATALOG_CACHE_BACKEND = env.str("CATALOG_CACHE_BACKEND", default="locmem")
+
+# The local-memory cache is private to each process. Use the file-based cache
+# when the server runs several processes, so they share the catalog version
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "catalog": {
+        "BACKEND": CACHE_BACKENDS.get(CATALOG_CACHE_BACKEND, CATALOG_CACHE_BACKEND),
+        # Name of the local-memory cache, or directory of the file-based cache
+        "LOCATION": env.str(
+            "CATALOG_CACHE_LOCATION",
+            default=(
+                "/app/cache/catalog/" if CATALOG_CACHE_BACKEND == "file" else "catalog"
+            ),
+        ),
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+}
+
+# Cache alias used for the catalog responses, counts and version
+CATALOG_CACHE = "catalog"
+
+# Seconds a catalog, artifact, metadata or institutions response is cached for.
+# Responses are invalidated as soon as the catalog changes
+CATALOG_CACHE_TIMEOUT = 60 * 60
+
+# Seconds the total number of artifacts of a catalog search is cached for,
+# when the catalog is paginated with a cursor
+CATALOG_COUNT_CACHE_TIMEOUT = 60
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
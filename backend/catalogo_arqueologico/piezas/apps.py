@@ -2,7 +2,8 @@
 This module defines the Django application configuration for the 'piezas' app.
 
 The PiezasConfig class inherits from AppConfig, providing metadata and 
-configuration options for the 'piezas' application.
+configuration options for the 'piezas' application. It also connects the signal
+handlers defined in the `signals` module when the application is ready.
 """
 
 from django.apps import AppConfig
@@ -24,3 +25,10 @@ class PiezasConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "piezas"
+
+
+    def ready(self):
+        """
+        Connects the signal handlers of the application.
+        """
+        from . import signals  # noqa: F401
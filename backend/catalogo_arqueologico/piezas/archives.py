@@ -0,0 +1,341 @@
+"""
+This module builds the ZIP archives downloaded for an artifact.
+
+Archives are written as a stream: files are read in chunks and every compressed chunk is
+handed to the caller as soon as it is produced, so a download only keeps a few chunks in
+memory regardless of the size of the 3D model, and the first bytes are sent right away.
+
+Images and textures are already compressed, so they are stored as they are. Text files
+like OBJ and MTL are deflated.
+
+Archives of several artifacts (bulk downloads) are not cached, since every selection is
+different. Their files are read ahead by a small pool of threads, so the disk reads of the
+next files overlap with the compression of the current one. The pool only runs a bounded
+number of reads ahead of the archive, so memory stays bounded too.
+
+Built archives are cached under MEDIA_ROOT/ARCHIVES_URL, named after a hash of the name,
+size and modification time of every file they contain. Changing any file of an artifact
+changes the name of its archive, so outdated archives are never served; they are removed
+when the files are changed through the API.
+
+Cached archives are deterministic: their entries are sorted by name, and the metadata of
+every entry only depends on the name and modification time of its file, which are part of
+the archive name. An archive rebuilt under the same name has the same bytes, so byte
+offsets stay valid across requests and a resumed download can be sent from the cached
+file without building the first part again.
+
+Classes:
+- StreamBuffer: Unseekable file-like object that collects the bytes written by zipfile.
+
+Functions:
+- artifact_archive_entries: Lists the files of an artifact and their names in its archive.
+- bulk_archive_entries: Lists the files of several artifacts and their names in one archive.
+- compression_for: Chooses the compression method of a file.
+- zip_date_time: Converts a modification time to the date and time of a ZIP entry.
+- open_sources: Opens the files of an archive in order, optionally reading them ahead.
+- stream_zip: Generates a ZIP archive of the given files, chunk by chunk.
+- archive_path: Retrieves the path of the cached archive of the given files.
+- cached_archive: Retrieves the cached archive of an artifact, building it if needed.
+- current_archive_path: Retrieves the path the cached archive of an artifact has now.
+"""
+
+import hashlib
+import io
+import os
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from .mediacache import build_once
+from .storage import flat_name
+
+# Size of the chunks read from disk and sent to the client
+CHUNK_SIZE = 64 * 1024
+
+# Extensions of the files that are already compressed
+STORED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".gif"}
+
+# Permissions given to every file in the archives
+FILE_MODE = 0o100644
+
+# Earliest and latest dates and times a ZIP entry can hold
+ZIP_MIN_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+ZIP_MAX_DATE_TIME = (2107, 12, 31, 23, 59, 59)
+
+# Files up to this size are read ahead into memory by the reader pool. Larger files are
+# streamed from disk when their turn comes, to keep memory bounded
+READ_AHEAD_MAX_BYTES = 8 * 1024 * 1024
+
+
+class StreamBuffer:
+    """
+    Unseekable file-like object that collects the bytes written by zipfile.
+
+    zipfile writes a data descriptor after each entry when its output can not be
+    seeked, so the archive can be sent while it is being written.
+
+    Attributes:
+        chunks (list): The bytes written since the last drain.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        """
+        Collects written bytes.
+
+        Args:
+            data (bytes): The bytes to write.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        """
+        Does nothing, since the bytes are collected in memory until drained.
+        """
+
+    def drain(self):
+        """
+        Retrieves and forgets the bytes written since the last drain.
+
+        Returns:
+            bytes: The written bytes.
+        """
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def artifact_archive_entries(artifact):
+    """
+    Lists the files of an artifact and their names in its archive.
+
+    Args:
+        artifact (Artifact): The artifact, with its thumbnail and model loaded.
+
+    Returns:
+        list: Tuples with the path of each file and its name in the archive.
+    """
+    entries = []
+    # Archives keep the flat layout, whatever the layout of the files on disk
+    if artifact.id_thumbnail:
+        thumbnail = artifact.id_thumbnail.path
+        entries.append((thumbnail.path, f"thumbnail/{flat_name(thumbnail.name)}"))
+    model = artifact.id_model
+    if model is not None:
+        for field in (model.texture, model.object, model.material):
+            entries.append((field.path, f"model/{flat_name(field.name)}"))
+    for image in artifact.images.all():
+        entries.append((image.path.path, f"model/{flat_name(image.path.name)}"))
+    return entries
+
+
+def bulk_archive_entries(artifacts):
+    """
+    Lists the files of several artifacts and their names in one archive.
+
+    The files of each artifact are placed in their own folder, named after its id.
+
+    Args:
+        artifacts (iterable): The artifacts, with their thumbnails and models loaded.
+
+    Returns:
+        list: Tuples with the path of each file and its name in the archive.
+    """
+    return [
+        (path, f"artifact_{artifact.id}/{arcname}")
+        for artifact in artifacts
+        for path, arcname in artifact_archive_entries(artifact)
+    ]
+
+
+def _read_ahead(path):
+    """
+    Reads a file into memory if it is small enough. Larger files are not read at all,
+    since they are read again from disk when they are added to the archive.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        bytes: The content of the file, or None if it is larger than
+            READ_AHEAD_MAX_BYTES.
+    """
+    with open(path, "rb") as source:
+        if os.fstat(source.fileno()).st_size > READ_AHEAD_MAX_BYTES:
+            return None
+        # The file may have grown since it was checked
+        data = source.read(READ_AHEAD_MAX_BYTES + 1)
+    if len(data) > READ_AHEAD_MAX_BYTES:
+        return None
+    return data
+
+
+def open_sources(entries, workers=1, window=0):
+    """
+    Opens the files of an archive in order, optionally reading them ahead.
+
+    Args:
+        entries (list): Tuples with the path of each file and its name in the archive.
+        workers (int): Number of threads reading files ahead. With 1 or less, files are
+            opened one after the other.
+        window (int): Maximum number of files read ahead of the one being consumed.
+
+    Yields:
+        tuple: The path of each file, its name in the archive and a file-like object
+            with its content, which the caller closes.
+    """
+    if workers <= 1 or window <= 0:
+        for path, arcname in entries:
+            yield path, arcname, open(path, "rb")
+        return
+
+    entries = iter(entries)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for path, arcname in entries:
+            pending.append((path, arcname, executor.submit(_read_ahead, path)))
+            if len(pending) >= window:
+                break
+        while pending:
+            path, arcname, future = pending.popleft()
+            for next_path, next_arcname in entries:
+                pending.append(
+                    (next_path, next_arcname, executor.submit(_read_ahead, next_path))
+                )
+                break
+            data = future.result()
+            if data is None:
+                yield path, arcname, open(path, "rb")
+            else:
+                yield path, arcname, io.BytesIO(data)
+
+
+def compression_for(name):
+    """
+    Chooses the compression method of a file.
+
+    Args:
+        name (str): The name of the file.
+
+    Returns:
+        int: zipfile.ZIP_STORED for already compressed files, zipfile.ZIP_DEFLATED
+            otherwise.
+    """
+    extension = os.path.splitext(name)[1].lower()
+    if extension in STORED_EXTENSIONS:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def zip_date_time(mtime):
+    """
+    Converts a modification time to the date and time of a ZIP entry, in UTC.
+
+    Times outside of the range of the ZIP format, like the zeroed times of some copied
+    files, are clamped to it, as `ZipInfo.from_file` does with `strict_timestamps`
+    disabled.
+
+    Args:
+        mtime (float): The modification time, in seconds since the epoch.
+
+    Returns:
+        tuple: The year, month, day, hour, minute and second.
+    """
+    date_time = time.gmtime(mtime)[:6]
+    return min(max(date_time, ZIP_MIN_DATE_TIME), ZIP_MAX_DATE_TIME)
+
+
+def stream_zip(entries, chunk_size=CHUNK_SIZE, workers=1, window=0):
+    """
+    Generates a ZIP archive of the given files, chunk by chunk.
+
+    Args:
+        entries (list): Tuples with the path of each file and its name in the archive.
+        chunk_size (int): Number of bytes read from disk at a time.
+        workers (int): Number of threads reading files ahead, see `open_sources`.
+        window (int): Maximum number of files read ahead, see `open_sources`.
+
+    Yields:
+        bytes: The next part of the archive.
+    """
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, "w") as zipf:
+        for path, arcname, source in open_sources(entries, workers, window):
+            zinfo = zipfile.ZipInfo.from_file(path, arcname, strict_timestamps=False)
+            zinfo.compress_type = compression_for(arcname)
+            # Neither the permissions of the files nor the time zone of the server are
+            # part of the archive name
+            zinfo.external_attr = FILE_MODE << 16
+            zinfo.date_time = zip_date_time(os.stat(path).st_mtime)
+            force_zip64 = zinfo.file_size > zipfile.ZIP64_LIMIT
+            with source, zipf.open(zinfo, "w", force_zip64=force_zip64) as target:
+                for chunk in iter(lambda: source.read(chunk_size), b""):
+                    target.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            data = buffer.drain()
+            if data:
+                yield data
+    yield buffer.drain()
+
+
+def archive_path(entries):
+    """
+    Retrieves the path of the cached archive of the given files.
+
+    Args:
+        entries (list): Tuples with the path of each file and its name in the archive.
+
+    Returns:
+        str: The path of the archive, which may not exist yet.
+    """
+    digest = hashlib.sha256()
+    for path, arcname in sorted(entries, key=lambda entry: entry[1]):
+        stat = os.stat(path)
+        digest.update(f"{arcname}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode("utf-8"))
+    return os.path.join(
+        settings.MEDIA_ROOT, settings.ARCHIVES_URL, f"{digest.hexdigest()}.zip"
+    )
+
+
+def cached_archive(artifact):
+    """
+    Retrieves the cached archive of an artifact, building it if needed.
+
+    Concurrent calls for the same missing archive build it only once.
+
+    Args:
+        artifact (Artifact): The artifact, with its thumbnail and model loaded.
+
+    Returns:
+        str: The path of the archive.
+    """
+    entries = sorted(artifact_archive_entries(artifact), key=lambda entry: entry[1])
+    return build_once(archive_path(entries), lambda: stream_zip(entries))
+
+
+def current_archive_path(artifact):
+    """
+    Retrieves the path the cached archive of an artifact has with its current files.
+
+    Args:
+        artifact (Artifact): The artifact.
+
+    Returns:
+        str: The path of the archive, which may not exist yet, or None if the artifact
+            has no model or some of its files are missing.
+    """
+    if artifact.id_model is None:
+        return None
+    try:
+        return archive_path(artifact_archive_entries(artifact))
+    except (OSError, ValueError):
+        return None
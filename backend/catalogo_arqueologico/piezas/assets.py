@@ -0,0 +1,1012 @@
+"""
+This module builds the files derived from the uploaded media: the resized variants
+(derivatives) of the thumbnails and images, and the binary glTF (GLB) conversion of the
+3D models.
+
+The catalog grid and the detail carousel show images a few hundred pixels wide, so
+every thumbnail and image gets variants at the widths of DERIVATIVE_WIDTHS, encoded in
+each of the DERIVATIVE_FORMATS the installed Pillow can write (WebP, and AVIF with
+Pillow 11.3 or the `pillow-avif-plugin` package). Images are never enlarged: an image
+narrower than the smallest width only gets a variant at its own width.
+
+Variants are stored under MEDIA_ROOT/DERIVATIVES_URL, following the path of their
+source, e.g. `derivatives/thumbnails/1_320w.webp` for `thumbnails/1.png`. Their storage
+names are saved in the `variants` field of the Thumbnail or Image, by format and width
+descriptor, as used by the `srcset` attribute:
+
+    {"webp": {"320w": "derivatives/thumbnails/1_320w.webp", ...}, ...}
+
+Variants are built when thumbnails and images are uploaded or imported, and can be built
+for the existing files with the `buildDerivatives` management command. Existing variant
+files are reused, so building them again is cheap.
+
+Every thumbnail and image also gets its dimensions, its dominant color and a tiny
+placeholder of PLACEHOLDER_SIZE pixels, encoded as a data URI, saved on its row along
+with the variants. The API returns them, so the catalog can lay out the grid and paint
+a blurred preview before the images are downloaded.
+
+Other sizes are resized on request, with `resized_image`, within the allow-lists of
+RESIZE_WIDTHS, RESIZE_FORMATS and RESIZE_QUALITIES. They are kept in a disk cache under
+MEDIA_ROOT/RESIZE_CACHE_URL, evicted in least recently used order when it grows over
+RESIZE_CACHE_MAX_BYTES, checked at most once every RESIZE_CACHE_EVICT_INTERVAL seconds.
+Copies in a lossless format are cached once for every quality.
+
+3D models are converted to GLB with `piezas.meshes` and `piezas.gltf` when they are
+uploaded or imported, or with the `convertModels` management command, and stored under
+MEDIA_ROOT/GLB_URL. The original OBJ, MTL and texture files are kept and can still be
+downloaded. Models with more triangles than the budgets of LOD_TRIANGLE_BUDGETS also get
+simplified versions, stored as ModelLOD rows and GLB files under MEDIA_ROOT/LOD_URL, so
+viewers can show a light version first. The number of vertices and faces, bounding box,
+file sizes and texture resolution of every model are recorded along, and can be read
+for the existing models with the `measureModels` management command.
+
+The OBJ and MTL files of the models are text, which compresses several times, so they
+get precompressed copies (sidecars) next to them, `<name>.gz` and, if the `brotli`
+package is installed, `<name>.br`, served by nginx with `gzip_static` instead of
+compressing them on every request. Sidecars get the modification time of their file,
+so a sidecar with another time is stale and is built again. A sidecar that would not be
+smaller than its file is replaced by an empty `<name>.gz.skip` marker with the same
+time, so the file is not compressed again on every save. They are built whenever a
+model is saved (see `piezas.signals`), and for the existing models with the
+`compressModels` management command.
+
+Textures are often much larger than the viewer needs, so every model gets web versions
+of its texture and material file under MEDIA_ROOT/WEB_TEXTURES_URL: the texture scaled
+to a power-of-two size no larger than WEB_TEXTURE_MAX_SIZE and recompressed as
+WEB_TEXTURE_FORMAT, optionally with its mipmap chain, and the material file with its
+texture references pointing to it. The API serves the web versions to the viewer, and
+the GLB conversion embeds the web texture; the originals are kept for the downloads.
+
+Functions:
+- available_formats: Lists the formats the installed Pillow can encode.
+- derivative_name: Builds the storage name of a variant.
+- render_image: Resizes and encodes an image file.
+- build_variants: Builds the variants of an image file.
+- describe_image: Reads the dimensions, dominant color and placeholder of an image.
+- process_image_assets: Builds the variants and placeholder of a thumbnail or image
+    and saves them.
+- resized_image: Retrieves a resized copy of an image file from the disk cache.
+- glb_name: Builds the storage name of the GLB conversion of a model.
+- web_asset_name: Builds the storage name of a web version of a texture or material.
+- web_texture_size: Computes the power-of-two size of the web version of a texture.
+- build_web_texture: Builds the web version of the texture of a model and its mipmaps.
+- build_web_material: Builds the web version of the material file of a model.
+- build_web_assets: Builds the web versions of the texture and material of a model.
+- lod_name: Builds the storage name of a simplified version of a model.
+- build_model_assets: Builds the GLB conversion of a model and its simplified versions.
+- measure_model: Reads the statistics of the files of a model into its fields.
+- save_model_assets: Saves the GLB conversion of a model, its simplified versions,
+    web versions and statistics.
+- process_model_assets: Reads the statistics of a model, builds its web versions, GLB
+    conversion and simplified versions, and saves them.
+- sidecar_encodings: Lists the encodings of the precompressed copies of text files.
+- build_sidecars: Builds the missing or stale precompressed copies of a file.
+- remove_sidecars: Removes the precompressed copies of a file.
+- compress_model_files: Builds the precompressed copies of the text files of a model.
+"""
+
+import base64
+import hashlib
+import io
+import logging
+import math
+import os
+import zlib
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image as PillowImage
+from PIL import ImageOps
+from .gltf import build_glb
+from .mediacache import build_once, evict, touch, write_file
+from .meshes import parse_mtl, parse_obj, scan_obj, simplify
+from .models import ModelLOD
+
+try:
+    # Registers the AVIF encoder in Pillow versions without native support
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# EXIF tag of the orientation of an image
+EXIF_ORIENTATION = 0x0112
+
+# EXIF orientations that rotate the image by 90 degrees, swapping its width and height
+ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
+# Formats that can not store an alpha channel
+OPAQUE_FORMATS = {"jpeg"}
+
+# Lossless formats, whose encoding ignores the quality
+LOSSLESS_FORMATS = {"png"}
+
+# Texture formats glTF viewers must support, by extension. Other textures are converted
+# to PNG
+GLTF_TEXTURE_TYPES = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg"}
+
+# Encoder options of the web textures, by format. Lossy formats also get
+# WEB_TEXTURE_QUALITY
+WEB_TEXTURE_OPTIONS = {
+    "jpeg": {"optimize": True, "progressive": True},
+    "webp": {"method": 6},
+    "png": {"optimize": True},
+}
+
+# File extensions of the web textures, by format
+WEB_TEXTURE_EXTENSIONS = {"jpeg": "jpg", "webp": "webp", "png": "png"}
+
+# Statements of MTL files that reference a texture file, in lower case
+MTL_TEXTURE_STATEMENTS = {
+    "map_ka",
+    "map_kd",
+    "map_ks",
+    "map_ns",
+    "map_d",
+    "map_bump",
+    "bump",
+    "disp",
+    "decal",
+}
+
+# Fields of a model set by `build_web_assets`
+WEB_ASSET_FIELDS = ["web_texture", "web_material", "web_texture_mipmaps"]
+
+# Fields of a thumbnail or image set by `describe_image`
+IMAGE_PREVIEW_FIELDS = ["width", "height", "dominant_color", "placeholder"]
+
+# Longest side, in pixels, of the sample the dominant color is computed from, and the
+# number of colors it is reduced to
+COLOR_SAMPLE_SIZE = 64
+COLOR_SAMPLE_COLORS = 8
+
+# Fields of a model set by `measure_model`
+MODEL_STATS_FIELDS = [
+    "vertex_count",
+    "face_count",
+    "bounding_box_min",
+    "bounding_box_max",
+    "object_size",
+    "material_size",
+    "texture_size",
+    "texture_width",
+    "texture_height",
+]
+
+# Size of the chunks read when compressing a file
+COMPRESS_CHUNK_SIZE = 1024 * 1024
+
+# Suffix of the markers of the sidecars that were not kept, e.g. "vasija.obj.br.skip"
+SKIPPED_SIDECAR_SUFFIX = ".skip"
+
+
+def available_formats(formats=None):
+    """
+    Lists the formats the installed Pillow can encode.
+
+    Args:
+        formats (iterable): The formats to check. Defaults to DERIVATIVE_FORMATS.
+
+    Returns:
+        list: The given formats with an encoder, e.g. ["webp"].
+    """
+    PillowImage.init()
+    if formats is None:
+        formats = settings.DERIVATIVE_FORMATS
+    return [fmt for fmt in formats if fmt.upper() in PillowImage.SAVE]
+
+
+def derivative_name(name, width, fmt):
+    """
+    Builds the storage name of a variant.
+
+    Args:
+        name (str): The storage name of the source image.
+        width (int): The width of the variant, in pixels.
+        fmt (str): The format of the variant, e.g. "webp".
+
+    Returns:
+        str: The storage name of the variant.
+    """
+    stem = os.path.splitext(name)[0]
+    return f"{settings.DERIVATIVES_URL}{stem}_{width}w.{fmt}"
+
+
+def _prepare(image, opaque=False):
+    """
+    Rotates an image as told by its EXIF orientation and converts it to RGB(A).
+
+    Args:
+        image (PIL.Image.Image): The opened image.
+        opaque (bool): Whether to drop the alpha channel.
+
+    Returns:
+        PIL.Image.Image: The decoded image.
+    """
+    image = ImageOps.exif_transpose(image)
+    transparent = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+    return image.convert("RGBA" if transparent and not opaque else "RGB")
+
+
+def _resize(image, width):
+    """
+    Resizes an image to the given width, keeping its aspect ratio.
+
+    Args:
+        image (PIL.Image.Image): The decoded image.
+        width (int): The width, in pixels. Images are never enlarged.
+
+    Returns:
+        PIL.Image.Image: The resized image.
+    """
+    if width >= image.width:
+        return image
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), PillowImage.Resampling.LANCZOS)
+
+
+def _encode(image, fmt, quality=None):
+    """
+    Encodes an image.
+
+    Args:
+        image (PIL.Image.Image): The image.
+        fmt (str): The format, e.g. "webp".
+        quality (int): The encoding quality. Defaults to DERIVATIVE_QUALITY.
+
+    Returns:
+        bytes: The encoded image.
+    """
+    if quality is None:
+        quality = settings.DERIVATIVE_QUALITY
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt.upper(), quality=quality)
+    return buffer.getvalue()
+
+
+def render_image(path, width, fmt, quality=None):
+    """
+    Resizes and encodes an image file.
+
+    Args:
+        path (str): The path of the image file.
+        width (int): The width, in pixels. Images are never enlarged.
+        fmt (str): The format, e.g. "webp".
+        quality (int): The encoding quality. Defaults to DERIVATIVE_QUALITY.
+
+    Returns:
+        bytes: The encoded image.
+    """
+    with PillowImage.open(path) as image:
+        # Decode JPEG files at a reduced scale when the target is much smaller
+        image.draft("RGB", (width, width))
+        image = _prepare(image, opaque=fmt in OPAQUE_FORMATS)
+        return _encode(_resize(image, width), fmt, quality)
+
+
+def build_variants(name):
+    """
+    Builds the variants of an image file that do not exist yet.
+
+    It does not access the database, so it can run in worker threads.
+
+    Args:
+        name (str): The storage name of the image.
+
+    Returns:
+        dict: The storage names of the variants, by format and width descriptor.
+
+    Raises:
+        OSError: If the image can not be read or a variant can not be written.
+    """
+    formats = available_formats()
+    with PillowImage.open(default_storage.path(name)) as image:
+        # Opening only reads the header, so the size is known without decoding
+        width, height = image.size
+        if image.getexif().get(EXIF_ORIENTATION) in ROTATED_ORIENTATIONS:
+            width, height = height, width
+        widths = [w for w in settings.DERIVATIVE_WIDTHS if w < width] or [width]
+
+        targets = {
+            (w, fmt): derivative_name(name, w, fmt) for w in widths for fmt in formats
+        }
+        missing = [
+            key for key, target in targets.items() if not default_storage.exists(target)
+        ]
+        if missing:
+            image = _prepare(image)
+            resized = {}
+            for w, fmt in missing:
+                if w not in resized:
+                    resized[w] = _resize(image, w)
+                write_file(
+                    default_storage.path(targets[(w, fmt)]),
+                    [_encode(resized[w], fmt)],
+                )
+
+    variants = {fmt: {} for fmt in formats}
+    for (w, fmt), target in targets.items():
+        variants[fmt][f"{w}w"] = target
+    return variants
+
+
+def describe_image(name):
+    """
+    Reads the dimensions of an image file, and computes its dominant color and tiny
+    placeholder.
+
+    The image is decoded at a reduced scale when possible, since the color and the
+    placeholder only need a few pixels. It does not access the database, so it can run
+    in worker threads.
+
+    Args:
+        name (str): The storage name of the image.
+
+    Returns:
+        dict: The values of the fields of IMAGE_PREVIEW_FIELDS, by name.
+
+    Raises:
+        OSError: If the image can not be read.
+    """
+    with PillowImage.open(default_storage.path(name)) as image:
+        width, height = image.size
+        if image.getexif().get(EXIF_ORIENTATION) in ROTATED_ORIENTATIONS:
+            width, height = height, width
+        image.draft("RGB", (COLOR_SAMPLE_SIZE, COLOR_SAMPLE_SIZE))
+        image = _prepare(image, opaque=True)
+    image.thumbnail((COLOR_SAMPLE_SIZE, COLOR_SAMPLE_SIZE), PillowImage.Resampling.BOX)
+
+    palette = image.quantize(
+        colors=COLOR_SAMPLE_COLORS, method=PillowImage.Quantize.MEDIANCUT
+    )
+    _, index = max(palette.getcolors())
+    red, green, blue = palette.getpalette()[index * 3 : index * 3 + 3]
+
+    image.thumbnail(
+        (settings.PLACEHOLDER_SIZE, settings.PLACEHOLDER_SIZE),
+        PillowImage.Resampling.LANCZOS,
+    )
+    fmt = (available_formats(["webp"]) or ["png"])[0]
+    data = _encode(image, fmt, settings.PLACEHOLDER_QUALITY)
+    return {
+        "width": width,
+        "height": height,
+        "dominant_color": f"#{red:02x}{green:02x}{blue:02x}",
+        "placeholder": (
+            f"data:image/{fmt};base64,{base64.b64encode(data).decode('ascii')}"
+        ),
+    }
+
+
+def process_image_assets(instance):
+    """
+    Builds the variants of a thumbnail or image and saves them in its `variants` field,
+    along with its dimensions, dominant color and placeholder.
+
+    Files that can not be read as images are logged and left without variants, so they
+    do not prevent the upload or import of the artifact.
+
+    Args:
+        instance (Thumbnail | Image): The saved thumbnail or image.
+
+    Returns:
+        dict: The storage names of the variants, by format and width descriptor.
+    """
+    try:
+        variants = build_variants(instance.path.name)
+        preview = describe_image(instance.path.name)
+    except (OSError, ValueError, PillowImage.DecompressionBombError) as e:
+        logger.warning(f"Could not build the variants of {instance.path.name}: {e}")
+        return {}
+    if variants != instance.variants or any(
+        getattr(instance, field) != value for field, value in preview.items()
+    ):
+        instance.variants = variants
+        for field, value in preview.items():
+            setattr(instance, field, value)
+        instance.save(update_fields=["variants", *IMAGE_PREVIEW_FIELDS, "updated_at"])
+    return variants
+
+
+def resized_image(name, width, fmt, quality):
+    """
+    Retrieves a resized copy of an image file from the disk cache, building it if
+    needed.
+
+    Concurrent requests for the same missing copy build it only once. Building a copy
+    evicts the least recently used ones if the cache grows over RESIZE_CACHE_MAX_BYTES,
+    unless the cache was checked in the last RESIZE_CACHE_EVICT_INTERVAL seconds.
+
+    Args:
+        name (str): The storage name of the image.
+        width (int): The width, in pixels, from RESIZE_WIDTHS.
+        fmt (str): The format, from RESIZE_FORMATS.
+        quality (int): The encoding quality, from RESIZE_QUALITIES.
+
+    Returns:
+        str: The path of the cached copy.
+
+    Raises:
+        OSError: If the image can not be read or the copy can not be written.
+    """
+    source = default_storage.path(name)
+    stat = os.stat(source)
+    if fmt in LOSSLESS_FORMATS:
+        # Every quality gives the same bytes
+        quality = None
+    # The copy is named after the file it comes from, so replacing it changes the name
+    key = f"{name}\0{stat.st_size}\0{stat.st_mtime_ns}\0{width}\0{fmt}\0{quality}"
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    folder = os.path.join(settings.MEDIA_ROOT, settings.RESIZE_CACHE_URL)
+    path = os.path.join(folder, f"{digest}.{fmt}")
+
+    if os.path.exists(path):
+        touch(path)
+        return path
+    build_once(path, lambda: [render_image(source, width, fmt, quality)])
+    evict(
+        folder,
+        settings.RESIZE_CACHE_MAX_BYTES,
+        interval=settings.RESIZE_CACHE_EVICT_INTERVAL,
+    )
+    return path
+
+
+def glb_name(model):
+    """
+    Builds the storage name of the GLB conversion of a model.
+
+    Models are named after their id, since the same object file may be shared by
+    models with different textures.
+
+    Args:
+        model (Model): The saved model.
+
+    Returns:
+        str: The storage name of the GLB file.
+    """
+    stem = os.path.splitext(os.path.basename(model.object.name))[0]
+    return f"{settings.GLB_URL}{model.pk}_{stem}.glb"
+
+
+def _gltf_texture(path):
+    """
+    Reads a texture in a format supported by glTF viewers.
+
+    Args:
+        path (str): The path of the texture file.
+
+    Returns:
+        tuple: The encoded image and its media type.
+    """
+    mime_type = GLTF_TEXTURE_TYPES.get(os.path.splitext(path)[1].lower())
+    if mime_type is not None:
+        with open(path, "rb") as source:
+            return source.read(), mime_type
+    with PillowImage.open(path) as image:
+        return _encode(_prepare(image), "png"), "image/png"
+
+
+def web_asset_name(model, name, extension, suffix=""):
+    """
+    Builds the storage name of a web version of a texture or material file.
+
+    Models are named after their id, like their GLB conversion.
+
+    Args:
+        model (Model): The saved model.
+        name (str): The storage name of the original file.
+        extension (str): The file extension of the web version, e.g. "jpg".
+        suffix (str): The suffix of the name, e.g. "_mip1" for a mipmap level.
+
+    Returns:
+        str: The storage name of the web version.
+    """
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return f"{settings.WEB_TEXTURES_URL}{model.pk}_{stem}{suffix}.{extension}"
+
+
+def _power_of_two(size, limit):
+    """
+    Rounds a size to the nearest power of two, in logarithmic scale.
+
+    Args:
+        size (int): The size, in pixels.
+        limit (int): The maximum size, in pixels.
+
+    Returns:
+        int: The largest power of two no larger than the limit, if the rounded size is
+            larger.
+    """
+    largest = 1 << (max(1, limit).bit_length() - 1)
+    return min(largest, 1 << max(0, round(math.log2(max(1, size)))))
+
+
+def web_texture_size(width, height):
+    """
+    Computes the size of the web version of a texture: each side is rounded to a power
+    of two, since GPUs only build mipmaps and repeat power-of-two textures everywhere,
+    and capped at WEB_TEXTURE_MAX_SIZE. Texture coordinates are relative, so the texture
+    may be stretched.
+
+    Args:
+        width (int): The width of the texture, in pixels.
+        height (int): The height of the texture, in pixels.
+
+    Returns:
+        tuple: The width and height of the web version, in pixels.
+    """
+    limit = settings.WEB_TEXTURE_MAX_SIZE
+    return _power_of_two(width, limit), _power_of_two(height, limit)
+
+
+def _encode_texture(image, fmt):
+    """
+    Encodes a web texture.
+
+    Args:
+        image (PIL.Image.Image): The image.
+        fmt (str): The format, "jpeg", "webp" or "png".
+
+    Returns:
+        bytes: The encoded image.
+    """
+    options = dict(WEB_TEXTURE_OPTIONS[fmt])
+    if fmt != "png":
+        options["quality"] = settings.WEB_TEXTURE_QUALITY
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt.upper(), **options)
+    return buffer.getvalue()
+
+
+def build_web_texture(model):
+    """
+    Builds the web version of the texture of a model, and its mipmap chain if
+    WEB_TEXTURE_MIPMAPS is True, replacing the existing ones.
+
+    Textures with transparency are encoded as PNG if WEB_TEXTURE_FORMAT can not store
+    it. It does not access the database, so it can run in worker processes.
+
+    Args:
+        model (Model): The saved model, with a texture.
+
+    Returns:
+        tuple: The storage name of the web texture, and the storage names of its
+            mipmap levels.
+
+    Raises:
+        OSError: If the texture can not be read or a file can not be written.
+    """
+    with PillowImage.open(model.texture.path) as image:
+        source_format = image.format
+        upright = image.getexif().get(EXIF_ORIENTATION, 1) == 1
+        # Decode JPEG files at a reduced scale when the target is much smaller
+        image.draft("RGB", (max(web_texture_size(*image.size)),) * 2)
+        image = _prepare(image)
+    fmt = settings.WEB_TEXTURE_FORMAT
+    if not available_formats([fmt]) or (image.mode == "RGBA" and fmt in OPAQUE_FORMATS):
+        fmt = "png" if image.mode == "RGBA" else "jpeg"
+    extension = WEB_TEXTURE_EXTENSIONS[fmt]
+
+    size = web_texture_size(*image.size)
+    resized = image.size != size
+    if resized:
+        image = image.resize(size, PillowImage.Resampling.LANCZOS)
+    data = _encode_texture(image, fmt)
+    if (
+        not resized
+        and upright
+        and source_format == fmt.upper()
+        and os.path.getsize(model.texture.path) <= len(data)
+    ):
+        # The texture was already fit for the web, and encoding it again would not
+        # make it smaller
+        with open(model.texture.path, "rb") as source:
+            data = source.read()
+    name = web_asset_name(model, model.texture.name, extension)
+    write_file(default_storage.path(name), [data])
+
+    mipmaps = []
+    if settings.WEB_TEXTURE_MIPMAPS:
+        while image.width > 1 or image.height > 1:
+            size = (max(1, image.width // 2), max(1, image.height // 2))
+            image = image.resize(size, PillowImage.Resampling.BOX)
+            mipmap = web_asset_name(
+                model, model.texture.name, extension, f"_mip{len(mipmaps) + 1}"
+            )
+            write_file(default_storage.path(mipmap), [_encode_texture(image, fmt)])
+            mipmaps.append(mipmap)
+    return name, mipmaps
+
+
+def build_web_material(model, texture_name=None):
+    """
+    Builds the web version of the material file of a model, replacing the existing one,
+    with its texture references pointing to a texture file.
+
+    The references to the file of the diffuse texture (`map_Kd`) are replaced, keeping
+    their options. The web material is not in the folder of the original texture, so it
+    references the original by a relative path when there is no web texture.
+
+    Args:
+        model (Model): The saved model, with a material file.
+        texture_name (str): The storage name of the web texture. Defaults to the
+            original texture.
+
+    Returns:
+        str: The storage name of the web material.
+
+    Raises:
+        OSError: If the material file can not be read or written.
+    """
+    name = web_asset_name(model, model.material.name, "mtl")
+    target = texture_name or model.texture.name
+    reference = None
+    if target:
+        reference = os.path.relpath(
+            default_storage.path(target), os.path.dirname(default_storage.path(name))
+        ).replace(os.sep, "/")
+    # Unknown bytes are kept as they are, e.g. names in other encodings
+    with open(
+        model.material.path, "r", encoding="utf-8", errors="surrogateescape"
+    ) as source:
+        lines = source.read().splitlines()
+    statements = [line.split() for line in lines]
+    diffuse = next(
+        (
+            parts[-1]
+            for parts in statements
+            if len(parts) >= 2 and parts[0].lower() == "map_kd"
+        ),
+        None,
+    )
+    for index, parts in enumerate(statements):
+        if (
+            reference is not None
+            and len(parts) >= 2
+            and parts[0].lower() in MTL_TEXTURE_STATEMENTS
+            and parts[-1] == diffuse
+        ):
+            line = lines[index].rstrip()
+            lines[index] = f"{line[: len(line) - len(diffuse)]}{reference}"
+    content = "".join(f"{line}\n" for line in lines)
+    write_file(
+        default_storage.path(name), [content.encode("utf-8", "surrogateescape")]
+    )
+    return name
+
+
+def build_web_assets(model):
+    """
+    Builds the web versions of the texture and material file of a model, and sets them
+    in its fields, without saving it.
+
+    Textures that can not be read are logged and left without web version, and the web
+    material then references the original texture.
+
+    Args:
+        model (Model): The saved model.
+
+    Raises:
+        OSError: If the material file can not be read or a file can not be written.
+    """
+    texture, mipmaps = None, []
+    if model.texture:
+        try:
+            texture, mipmaps = build_web_texture(model)
+        except (OSError, PillowImage.DecompressionBombError) as e:
+            logger.warning(f"Could not build the web texture of model {model.pk}: {e}")
+    model.web_texture.name = texture
+    model.web_texture_mipmaps = mipmaps
+    model.web_material.name = (
+        build_web_material(model, texture) if model.material else None
+    )
+
+
+def lod_name(model, budget):
+    """
+    Builds the storage name of a simplified version of a model.
+
+    Args:
+        model (Model): The saved model.
+        budget (int): The triangle budget of the version.
+
+    Returns:
+        str: The storage name of the GLB file.
+    """
+    stem = os.path.splitext(os.path.basename(model.object.name))[0]
+    return f"{settings.LOD_URL}{model.pk}_{stem}_{budget}.glb"
+
+
+def build_model_assets(model, quantize=None):
+    """
+    Builds the GLB conversion of a model and its simplified versions, replacing the
+    existing ones.
+
+    The object file is parsed once for all of them. It does not access the database,
+    so it can run in worker threads or processes.
+
+    Args:
+        model (Model): The saved model.
+        quantize (bool): Whether to quantize the vertex data. Defaults to GLB_QUANTIZE.
+
+    Returns:
+        tuple: The storage name of the GLB file, and the budget, number of triangles,
+            size and storage name of each simplified version, as dictionaries.
+
+    Raises:
+        OSError: If a file can not be read or a GLB file can not be written.
+        ValueError: If the object file has no valid geometry.
+    """
+    if quantize is None:
+        quantize = settings.GLB_QUANTIZE
+    mesh = parse_obj(model.object.path)
+    materials = parse_mtl(model.material.path) if model.material else {}
+    texture = None
+    if model.web_texture and model.web_texture.name.endswith(tuple(GLTF_TEXTURE_TYPES)):
+        # The web texture is lighter, and has the power-of-two size viewers prefer
+        texture = _gltf_texture(model.web_texture.path)
+    elif model.texture:
+        texture = _gltf_texture(model.texture.path)
+    name = glb_name(model)
+    write_file(
+        default_storage.path(name),
+        [build_glb(mesh, materials, texture, quantize=quantize)],
+    )
+
+    lods = []
+    for budget in sorted(settings.LOD_TRIANGLE_BUDGETS):
+        if mesh.triangle_count <= budget:
+            break
+        lod = simplify(mesh, budget)
+        if lod is None:
+            continue
+        data = build_glb(lod, materials, texture, quantize=quantize)
+        lod_path = lod_name(model, budget)
+        write_file(default_storage.path(lod_path), [data])
+        lods.append(
+            {
+                "budget": budget,
+                "triangles": lod.triangle_count,
+                "size": len(data),
+                "glb": lod_path,
+            }
+        )
+    logger.info(
+        f"Model {model.pk} converted to {name}: {mesh.vertex_count} vertices, "
+        f"{mesh.triangle_count} triangles, {len(lods)} simplified versions"
+    )
+    return name, lods
+
+
+def measure_model(model):
+    """
+    Reads the statistics of the files of a model into its fields, without saving it.
+
+    Statistics that can not be read are set to None: the geometry if the object file
+    is not valid, and the resolution if the texture is not an image.
+
+    Args:
+        model (Model): The model.
+
+    Raises:
+        OSError: If the object file can not be read.
+    """
+    try:
+        stats = scan_obj(model.object.path)
+    except ValueError as e:
+        logger.warning(f"Could not scan the object of model {model.pk}: {e}")
+        stats = {"vertices": None, "faces": None, "min": None, "max": None}
+    model.vertex_count = stats["vertices"]
+    model.face_count = stats["faces"]
+    model.bounding_box_min = stats["min"]
+    model.bounding_box_max = stats["max"]
+    model.object_size = os.path.getsize(model.object.path)
+    model.material_size = (
+        os.path.getsize(model.material.path) if model.material else None
+    )
+    model.texture_size = os.path.getsize(model.texture.path) if model.texture else None
+    model.texture_width, model.texture_height = None, None
+    if model.texture:
+        try:
+            # Opening only reads the header, so the size is known without decoding
+            with PillowImage.open(model.texture.path) as image:
+                model.texture_width, model.texture_height = image.size
+        except (OSError, PillowImage.DecompressionBombError) as e:
+            logger.warning(f"Could not read the texture of model {model.pk}: {e}")
+
+
+def save_model_assets(model, name, lods):
+    """
+    Saves the GLB conversion of a model, its simplified versions, the web versions of
+    its texture and material and its statistics.
+
+    Saving the model refreshes the catalog entries of its artifacts.
+
+    Args:
+        model (Model): The saved model, with its statistics read by `measure_model`
+            and its web versions built by `build_web_assets`.
+        name (str): The storage name of the GLB file, or None if it could not be built.
+        lods (list): The simplified versions, as returned by `build_model_assets`.
+    """
+    with transaction.atomic():
+        ModelLOD.objects.filter(model=model).delete()
+        ModelLOD.objects.bulk_create(ModelLOD(model=model, **lod) for lod in lods)
+        model.glb.name = name
+        model.save(
+            update_fields=["glb", *WEB_ASSET_FIELDS, *MODEL_STATS_FIELDS, "updated_at"]
+        )
+
+
+def process_model_assets(model, quantize=None):
+    """
+    Reads the statistics of a model, builds the web versions of its texture and
+    material, its GLB conversion and simplified versions, and saves them.
+
+    Models that can not be converted are logged and left without GLB file, so they do
+    not prevent the upload or import of the artifact; viewers then load the OBJ file.
+
+    Args:
+        model (Model): The saved model.
+        quantize (bool): Whether to quantize the vertex data. Defaults to GLB_QUANTIZE.
+
+    Returns:
+        str: The storage name of the GLB file, or None if it could not be built.
+    """
+    try:
+        measure_model(model)
+    except OSError as e:
+        logger.warning(f"Could not measure model {model.pk}: {e}")
+    try:
+        build_web_assets(model)
+    except OSError as e:
+        logger.warning(f"Could not build the web material of model {model.pk}: {e}")
+        model.web_texture.name, model.web_material.name = None, None
+        model.web_texture_mipmaps = []
+    try:
+        name, lods = build_model_assets(model, quantize)
+    except (OSError, ValueError, PillowImage.DecompressionBombError) as e:
+        logger.warning(f"Could not convert model {model.pk} to GLB: {e}")
+        name, lods = None, []
+    save_model_assets(model, name, lods)
+    return name
+
+
+def sidecar_encodings():
+    """
+    Lists the encodings of the precompressed copies of text files.
+
+    Returns:
+        list: The file extensions of the available encodings, e.g. ["gz", "br"].
+    """
+    return ["gz", "br"] if brotli is not None else ["gz"]
+
+
+def _compress(path, encoding):
+    """
+    Compresses a file, chunk by chunk.
+
+    Args:
+        path (str): The path of the file.
+        encoding (str): The file extension of the encoding, "gz" or "br".
+
+    Yields:
+        bytes: The compressed content.
+    """
+    if encoding == "gz":
+        # A window of 31 writes the gzip header, without file name nor time, so the
+        # copies do not change when built again
+        compressor = zlib.compressobj(settings.SIDECAR_GZIP_LEVEL, zlib.DEFLATED, 31)
+        process, finish = compressor.compress, compressor.flush
+    else:
+        compressor = brotli.Compressor(quality=settings.SIDECAR_BROTLI_QUALITY)
+        process, finish = compressor.process, compressor.finish
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(COMPRESS_CHUNK_SIZE), b""):
+            yield process(chunk)
+    yield finish()
+
+
+def _same_mtime(path, stat):
+    """
+    Checks whether a file exists and has the modification time of another one.
+
+    Args:
+        path (str): The path of the file.
+        stat (stat_result): The status of the other file.
+
+    Returns:
+        bool: True if the file exists and has the same modification time.
+    """
+    try:
+        return os.stat(path).st_mtime_ns == stat.st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def build_sidecars(name):
+    """
+    Builds the missing or stale precompressed copies of a file.
+
+    Copies that would not be smaller than the file are not kept, so nginx sends the file
+    itself. An empty marker with the time of the file records it, so the file is not
+    compressed again until it changes.
+
+    Args:
+        name (str): The storage name of the file.
+
+    Returns:
+        list: The storage names of the copies that were built.
+
+    Raises:
+        OSError: If the file can not be read or a copy can not be written.
+    """
+    path = default_storage.path(name)
+    stat = os.stat(path)
+    built = []
+    for encoding in sidecar_encodings():
+        sidecar = f"{path}.{encoding}"
+        marker = f"{sidecar}{SKIPPED_SIDECAR_SUFFIX}"
+        if any(_same_mtime(copy, stat) for copy in (sidecar, marker)):
+            continue
+        write_file(sidecar, _compress(path, encoding))
+        if os.path.getsize(sidecar) >= stat.st_size:
+            os.remove(sidecar)
+            write_file(marker, [])
+            os.utime(marker, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            continue
+        os.utime(sidecar, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        try:
+            os.remove(marker)
+        except FileNotFoundError:
+            pass
+        built.append(f"{name}.{encoding}")
+    return built
+
+
+def remove_sidecars(name):
+    """
+    Removes the precompressed copies of a file, of every encoding, and the markers of
+    the copies that were not kept.
+
+    Args:
+        name (str): The storage name of the file.
+    """
+    for encoding in ("gz", "br"):
+        for suffix in ("", SKIPPED_SIDECAR_SUFFIX):
+            try:
+                os.remove(default_storage.path(f"{name}.{encoding}{suffix}"))
+            except FileNotFoundError:
+                pass
+
+
+def compress_model_files(model):
+    """
+    Builds the missing or stale precompressed copies of the object and material files
+    of a model, including its web material.
+
+    Files that can not be compressed are logged, so they do not prevent saving the
+    model; nginx then sends them uncompressed.
+
+    Args:
+        model (Model): The saved model.
+
+    Returns:
+        list: The storage names of the copies that were built.
+    """
+    built = []
+    for field in (model.object, model.material, model.web_material):
+        if not field:
+            continue
+        try:
+            built.extend(build_sidecars(field.name))
+        except OSError as e:
+            logger.warning(f"Could not compress {field.name}: {e}")
+            remove_sidecars(field.name)
+    return built
@@ -0,0 +1,174 @@
+"""
+This module implements the server-side cache of the public catalog responses.
+
+Responses are stored in the cache selected by the CATALOG_CACHE setting, under a key built
+from the catalog version, the URL and the normalized query parameters. The version is a
+counter stored in the same cache and bumped on every write to the catalog data, by the
+signal handlers in `piezas.signals` and by the import commands, so stale responses are
+never served: they are simply no longer looked up, and expire on their own.
+
+The local-memory cache is private to each process, so the version bumped by a management
+command is not seen by the server, which keeps serving its cached responses until they
+expire. The file-based cache is shared by every process.
+
+Functions:
+- get_cache: Retrieves the cache used for the catalog.
+- get_version: Retrieves the current catalog version.
+- bump_version: Invalidates every cached catalog response.
+- is_shared: Checks whether the catalog cache is shared by every process.
+- bump_shared_version: Invalidates every cached catalog response from a command.
+- versioned_key: Builds a cache key that changes with the catalog version.
+- response_cache_key: Builds the cache key of the response to a request.
+- cached_response: Decorator that caches the responses of a view's GET handler.
+"""
+
+import functools
+import hashlib
+import logging
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+VERSION_CACHE_KEY = "catalog:version"
+
+
+def get_cache():
+    """
+    Retrieves the cache used for the catalog.
+
+    Returns:
+        BaseCache: The cache configured with the CATALOG_CACHE alias.
+    """
+    return caches[settings.CATALOG_CACHE]
+
+
+def get_version():
+    """
+    Retrieves the current catalog version.
+
+    Returns:
+        int: The version, starting at 1.
+    """
+    cache = get_cache()
+    cache.add(VERSION_CACHE_KEY, 1, None)
+    return cache.get(VERSION_CACHE_KEY, 1)
+
+
+def bump_version():
+    """
+    Invalidates every cached catalog response by moving to a new catalog version.
+
+    Returns:
+        int: The new version.
+    """
+    cache = get_cache()
+    cache.add(VERSION_CACHE_KEY, 1, None)
+    try:
+        return cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        # The version expired or was evicted between both calls
+        cache.set(VERSION_CACHE_KEY, 2, None)
+        return 2
+
+
+def is_shared():
+    """
+    Checks whether the catalog cache is shared by every process, so a version bumped by
+    a management command is seen by the server.
+
+    Returns:
+        bool: False for the local-memory cache, which is private to each process.
+    """
+    return not isinstance(get_cache(), LocMemCache)
+
+
+def bump_shared_version():
+    """
+    Invalidates every cached catalog response from outside the server, e.g. from a
+    management command. A warning is logged when the server does not see the new
+    version, since it keeps serving its cached responses until they expire.
+
+    Returns:
+        bool: Whether the catalog cache is shared with the server.
+    """
+    bump_version()
+    if is_shared():
+        return True
+    logger.warning(
+        "The catalog cache is private to each process: the server keeps serving its "
+        f"cached responses for up to {settings.CATALOG_CACHE_TIMEOUT} seconds. Set "
+        "CATALOG_CACHE_BACKEND to 'file' to share it"
+    )
+    return False
+
+
+def versioned_key(prefix, parts):
+    """
+    Builds a cache key that changes with the catalog version.
+
+    Args:
+        prefix (str): The kind of cached value, e.g. "response".
+        parts (iterable): The values that identify the cached value.
+
+    Returns:
+        str: The cache key.
+    """
+    digest = hashlib.sha1(repr(list(parts)).encode("utf-8")).hexdigest()
+    return f"catalog:{prefix}:{get_version()}:{digest}"
+
+
+def response_cache_key(request):
+    """
+    Builds the cache key of the response to a request.
+
+    The key includes the scheme and host, since responses contain absolute URLs, and the
+    query parameters in a normalized order.
+
+    Args:
+        request: The HTTP request object.
+
+    Returns:
+        str: The cache key.
+    """
+    params = sorted(
+        (key, sorted(values)) for key, values in request.query_params.lists()
+    )
+    return versioned_key(
+        "response",
+        (
+            request.build_absolute_uri(request.path),
+            params,
+            request.META.get("HTTP_ACCEPT", ""),
+        ),
+    )
+
+
+def cached_response(get):
+    """
+    Decorator that caches the successful responses of a view's GET handler.
+
+    Args:
+        get (function): The GET handler of the view.
+
+    Returns:
+        function: The GET handler, returning the cached response data when available.
+    """
+
+    @functools.wraps(get)
+    def wrapper(self, request, *args, **kwargs):
+        cache = get_cache()
+        key = response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data, status=status.HTTP_200_OK)
+
+        response = get(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+        return response
+
+    return wrapper
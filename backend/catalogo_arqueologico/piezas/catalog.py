@@ -0,0 +1,232 @@
+"""
+This module maintains the catalog read model.
+
+Every artifact has an ArtifactCatalogEntry holding the data shown by the catalog and the
+artifact detail, already in the shape returned by the API: the attributes dictionary and
+the storage names of the thumbnail, the 3D model files, the images and the resized
+variants of the thumbnail and images, and the dimensions, dominant color and
+placeholder of the thumbnail and images. The catalog then serializes a page of artifacts
+from one joined row each, instead of loading the shape, culture, tags, thumbnail, model
+and images of every artifact.
+
+Entries are refreshed by the signal handlers in `piezas.signals` whenever the artifact or
+any of the related rows change, and can be rebuilt in bulk with the `rebuildCatalog`
+management command.
+
+Functions:
+- build_attributes: Builds the attributes dictionary of an artifact.
+- build_model_stats: Builds the statistics dictionary of a 3D model.
+- build_image_preview: Builds the preview dictionary of a thumbnail or image.
+- build_catalog_entry: Builds the catalog entry of an artifact.
+- refresh_catalog_entries: Recomputes the catalog entries of the given artifacts.
+- touch_artifacts: Marks the given artifacts as modified now.
+- prefetch_missing_entries: Loads the related rows of the artifacts without entry.
+"""
+
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils import timezone
+from .models import Artifact, ArtifactCatalogEntry, Image, ModelLOD, Tag
+
+# Keys of the attributes and model dictionaries, in the order returned by the API.
+# JSONB does not keep the order of the keys, so serializers restore it. The material
+# and texture are their web versions when they were built. The model also has an
+# optional "glb" key, a "lods" list with its simplified versions, a "mipmaps" list with
+# the mipmap chain of its texture and a "stats" dictionary
+ATTRIBUTE_KEYS = ("shape", "tags", "culture", "description")
+MODEL_KEYS = ("object", "material", "texture")
+
+
+def build_attributes(artifact):
+    """
+    Builds the attributes dictionary of an artifact, as returned by the API.
+
+    Args:
+        artifact (Artifact): The artifact, with its shape, culture and tags loaded.
+
+    Returns:
+        dict: The shape, tags, culture and description of the artifact.
+    """
+    shape = artifact.id_shape
+    culture = artifact.id_culture
+    return {
+        "shape": {"id": shape.id, "value": shape.name} if shape else None,
+        "tags": [{"id": tag.id, "value": tag.name} for tag in artifact.id_tags.all()],
+        "culture": {"id": culture.id, "value": culture.name} if culture else None,
+        "description": artifact.description,
+    }
+
+
+def build_model_stats(model):
+    """
+    Builds the statistics dictionary of a 3D model, as returned by the API.
+
+    Args:
+        model (Model): The model.
+
+    Returns:
+        dict: The number of vertices and faces, bounding box, file sizes in bytes and
+            texture resolution of the model. Unknown values are None.
+    """
+    return {
+        "vertices": model.vertex_count,
+        "faces": model.face_count,
+        "bounding_box": (
+            {"min": model.bounding_box_min, "max": model.bounding_box_max}
+            if model.bounding_box_min is not None
+            else None
+        ),
+        "sizes": {
+            "object": model.object_size,
+            "material": model.material_size,
+            "texture": model.texture_size,
+        },
+        "texture": (
+            {"width": model.texture_width, "height": model.texture_height}
+            if model.texture_width is not None
+            else None
+        ),
+    }
+
+
+def build_image_preview(image):
+    """
+    Builds the preview dictionary of a thumbnail or image, as returned by the API.
+
+    Args:
+        image (Thumbnail | Image): The thumbnail or image.
+
+    Returns:
+        dict: The width and height in pixels, dominant color and placeholder data URI
+            of the image. Unknown values are None.
+    """
+    return {
+        "width": image.width,
+        "height": image.height,
+        "color": image.dominant_color,
+        "placeholder": image.placeholder,
+    }
+
+
+def build_catalog_entry(artifact):
+    """
+    Builds the catalog entry of an artifact.
+
+    Args:
+        artifact (Artifact): The artifact, with its related rows and the simplified
+            versions of its model loaded.
+
+    Returns:
+        ArtifactCatalogEntry: The unsaved catalog entry.
+    """
+    model = artifact.id_model
+    return ArtifactCatalogEntry(
+        artifact=artifact,
+        attributes=build_attributes(artifact),
+        thumbnail=artifact.id_thumbnail.path.name if artifact.id_thumbnail else None,
+        model=(
+            {
+                "object": model.object.name,
+                "material": (model.web_material or model.material).name,
+                "texture": (model.web_texture or model.texture).name,
+                "glb": model.glb.name or None,
+                "lods": [
+                    {"triangles": lod.triangles, "size": lod.size, "glb": lod.glb.name}
+                    for lod in model.lods.all()
+                ],
+                "mipmaps": model.web_texture_mipmaps,
+                "stats": build_model_stats(model),
+            }
+            if model
+            else None
+        ),
+        images=[image.path.name for image in artifact.images.all()],
+        thumbnail_variants=(
+            artifact.id_thumbnail.variants if artifact.id_thumbnail else {}
+        ),
+        image_variants=[image.variants for image in artifact.images.all()],
+        thumbnail_preview=(
+            build_image_preview(artifact.id_thumbnail)
+            if artifact.id_thumbnail
+            else None
+        ),
+        image_previews=[build_image_preview(image) for image in artifact.images.all()],
+    )
+
+
+def refresh_catalog_entries(artifact_ids):
+    """
+    Recomputes the catalog entries of the given artifacts.
+
+    The entries are replaced in a single transaction, so readers never see an artifact
+    without its entry. Entries of deleted artifacts are removed along with them.
+
+    Args:
+        artifact_ids (iterable): The ids of the artifacts.
+
+    Returns:
+        int: The number of entries written.
+    """
+    artifact_ids = list(artifact_ids)
+    with transaction.atomic():
+        # Lock the artifacts, so concurrent refreshes of the same entries are serialized
+        list(
+            Artifact.objects.filter(pk__in=artifact_ids)
+            .order_by("pk")
+            .select_for_update()
+            .values_list("pk", flat=True)
+        )
+        artifacts = (
+            Artifact.objects.filter(pk__in=artifact_ids)
+            .select_related("id_shape", "id_culture", "id_thumbnail", "id_model")
+            .prefetch_related(
+                Prefetch("id_tags", queryset=Tag.objects.order_by("id")),
+                Prefetch("images", queryset=Image.objects.order_by("id")),
+                Prefetch(
+                    "id_model__lods", queryset=ModelLOD.objects.order_by("triangles")
+                ),
+            )
+        )
+        entries = [build_catalog_entry(artifact) for artifact in artifacts]
+        ArtifactCatalogEntry.objects.filter(artifact_id__in=artifact_ids).delete()
+        ArtifactCatalogEntry.objects.bulk_create(entries)
+    return len(entries)
+
+
+def touch_artifacts(artifact_ids):
+    """
+    Marks the given artifacts as modified now, after a row they reference changed.
+
+    Args:
+        artifact_ids (iterable): The ids of the artifacts.
+
+    Returns:
+        int: The number of updated artifacts.
+    """
+    return Artifact.objects.filter(pk__in=list(artifact_ids)).update(
+        updated_at=timezone.now()
+    )
+
+
+def prefetch_missing_entries(artifacts, lookups):
+    """
+    Loads the related rows the serializers read for the artifacts without catalog
+    entry, e.g. created while their entry was being refreshed, with one query per
+    lookup instead of one per artifact. Artifacts with an entry are left alone, so
+    serving them runs no extra queries.
+
+    Args:
+        artifacts (list): The artifacts, with their catalog entry loaded.
+        lookups (tuple): The lookups to prefetch, e.g. "id_tags".
+
+    Returns:
+        int: The number of queries run.
+    """
+    # A missing one-to-one relation raises an AttributeError subclass
+    missing = [
+        artifact for artifact in artifacts if not hasattr(artifact, "catalog_entry")
+    ]
+    if not missing:
+        return 0
+    prefetch_related_objects(missing, *lookups)
+    return len(lookups)
@@ -0,0 +1,168 @@
+"""
+This module implements conditional GET support for the public read views.
+
+Responses carry a strong ETag and a Last-Modified header computed from the `updated_at`
+columns of the rows they show. When the client sends back an `If-None-Match` or
+`If-Modified-Since` header matching the current data, a `304 Not Modified` response is
+returned before the view loads or serializes anything.
+
+The validators of each view are computed with one aggregate query and cached under the
+catalog version (see `piezas.cache`), so repeated checks do not touch the database until
+the catalog changes.
+
+Functions:
+- artifact_state: Computes the validators of an artifact.
+- catalog_state: Computes the validators of the catalog.
+- metadata_state: Computes the validators of the shapes, cultures and tags.
+- institutions_state: Computes the validators of the institutions.
+- conditional_response: Decorator that answers conditional requests to a view.
+"""
+
+import functools
+import hashlib
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from .cache import get_cache, versioned_key
+from .models import Artifact, Culture, Institution, Shape, Tag
+
+
+def _state(querysets):
+    """
+    Summarizes the given tables by their last modification date and row count.
+
+    Args:
+        querysets (list): The querysets to summarize.
+
+    Returns:
+        tuple: A string identifying the state of the tables, and the last modification
+            date as a timestamp, or None if the tables are empty.
+    """
+    parts = []
+    last_modified = None
+    for queryset in querysets:
+        summary = queryset.aggregate(last=Max("updated_at"), count=Count("pk"))
+        parts.append(f"{summary['last']}/{summary['count']}")
+        if summary["last"] is not None:
+            timestamp = int(summary["last"].timestamp())
+            last_modified = max(last_modified or 0, timestamp)
+    return ";".join(parts), last_modified
+
+
+def artifact_state(pk, **kwargs):
+    """
+    Computes the validators of an artifact.
+
+    Args:
+        pk (int): The id of the artifact.
+        **kwargs: Arbitrary keyword arguments.
+
+    Returns:
+        tuple: The state of the artifact and its last modification timestamp, or None
+            if the artifact does not exist.
+    """
+    updated_at = (
+        Artifact.objects.filter(pk=pk).values_list("updated_at", flat=True).first()
+    )
+    if updated_at is None:
+        return None
+    return str(updated_at), int(updated_at.timestamp())
+
+
+def catalog_state(**kwargs):
+    """
+    Computes the validators of the catalog.
+
+    Related rows are covered too, since changing them updates their artifacts.
+
+    Args:
+        **kwargs: Arbitrary keyword arguments.
+
+    Returns:
+        tuple: The state of the artifacts and their last modification timestamp.
+    """
+    return _state([Artifact.objects.all()])
+
+
+def metadata_state(**kwargs):
+    """
+    Computes the validators of the shapes, cultures and tags.
+
+    Args:
+        **kwargs: Arbitrary keyword arguments.
+
+    Returns:
+        tuple: The state of the metadata and its last modification timestamp.
+    """
+    return _state([Shape.objects.all(), Culture.objects.all(), Tag.objects.all()])
+
+
+def institutions_state(**kwargs):
+    """
+    Computes the validators of the institutions.
+
+    Args:
+        **kwargs: Arbitrary keyword arguments.
+
+    Returns:
+        tuple: The state of the institutions and their last modification timestamp.
+    """
+    return _state([Institution.objects.all()])
+
+
+def conditional_response(state_func):
+    """
+    Decorator that answers conditional requests to a view's GET handler.
+
+    The ETag is derived from the state of the data and the full URL and Accept header of
+    the request, since responses contain absolute URLs and depend on the query
+    parameters. Clients are asked to revalidate every time, which is cheap.
+
+    Args:
+        state_func (function): Computes the state of the data shown by the view from the
+            URL keyword arguments, as returned by `artifact_state`.
+
+    Returns:
+        function: The decorator.
+    """
+
+    def decorator(get):
+        @functools.wraps(get)
+        def wrapper(self, request, *args, **kwargs):
+            cache = get_cache()
+            key = versioned_key("state", (state_func.__name__, sorted(kwargs.items())))
+            state = cache.get(key)
+            if state is None:
+                state = state_func(**kwargs) or ()
+                cache.set(key, state, settings.CATALOG_CACHE_TIMEOUT)
+            if not state:
+                return get(self, request, *args, **kwargs)
+
+            fingerprint, last_modified = state
+            etag = quote_etag(
+                hashlib.sha1(
+                    "|".join(
+                        (
+                            fingerprint,
+                            request.build_absolute_uri(),
+                            request.META.get("HTTP_ACCEPT", ""),
+                        )
+                    ).encode("utf-8")
+                ).hexdigest()
+            )
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = get(self, request, *args, **kwargs)
+            if response.status_code in (200, 304):
+                response["ETag"] = etag
+                if last_modified is not None:
+                    response["Last-Modified"] = http_date(last_modified)
+                patch_cache_control(response, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
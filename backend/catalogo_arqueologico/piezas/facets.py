@@ -0,0 +1,331 @@
+"""
+This module implements the facet counts shown next to the catalog filters.
+
+The FacetIndex keeps, for every culture, shape and tag, a bitmap of the artifacts that
+have it: a Python integer where bit n is set if the artifact at position n has that
+value. Artifacts get dense positions, reused after a deletion, so the bitmaps grow with
+the number of artifacts rather than with their largest id. Counting the artifacts of a
+value within the current results is then a bitwise AND and a population count, without
+touching the database.
+
+Each process holds its own index. It is built on first use, updated incrementally by the
+signal handlers in `piezas.signals` once the changes are committed, and rebuilt when
+another process changed the data, which is detected through a generation counter stored
+in the catalog cache. The local-memory cache is private to each process, so the changes
+made by other processes are only detected with the file-based cache (see CATALOG_CACHE).
+
+Classes:
+- FacetIndex: Inverted index of artifact ids per culture, shape and tag.
+
+Functions:
+- resolve_names: Finds the ids of the shapes, cultures or tags that match a name.
+- popcount: Counts the bits set in a bitmap.
+
+Attributes:
+- facet_index: The FacetIndex of the current process.
+"""
+
+import threading
+from .cache import get_cache
+from .models import Artifact, Culture, Shape, Tag
+
+GENERATION_CACHE_KEY = "facets:generation"
+
+# Number of bits set in each byte value
+BYTE_POPCOUNTS = bytes(bin(value).count("1") for value in range(256))
+
+try:
+    popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+
+    def popcount(bitmap):
+        """
+        Counts the bits set in a bitmap.
+
+        The bytes of the bitmap are mapped to their bit counts and added up in C,
+        which is several times faster than counting the ones of `bin(bitmap)`.
+
+        Args:
+            bitmap (int): The bitmap.
+
+        Returns:
+            int: The number of bits set.
+        """
+        size = (bitmap.bit_length() + 7) // 8
+        return sum(bitmap.to_bytes(size, "little").translate(BYTE_POPCOUNTS))
+
+
+def resolve_names(model, name, fuzzy=False):
+    """
+    Finds the ids of the shapes, cultures or tags that match a name.
+
+    Args:
+        model: The Shape, Culture or Tag model class.
+        name (str): The name to match.
+        fuzzy (bool): Whether to match similar names instead of the exact name,
+            ignoring case.
+
+    Returns:
+        set: The ids of the matching instances.
+    """
+    lookup = "name__trigram_similar" if fuzzy else "name__iexact"
+    return set(model.objects.filter(**{lookup: name}).values_list("id", flat=True))
+
+
+class FacetIndex:
+    """
+    Inverted index of artifact ids per culture, shape and tag, stored as bitmaps.
+
+    Attributes:
+        lock (RLock): Serializes the changes to the index between threads.
+        generation (int): Generation of the data the index was built from, or None if
+            the index must be rebuilt before being used.
+        artifacts (dict): Culture id, shape id and tag ids of every artifact, by id.
+        positions (dict): Bit position of every artifact, by id.
+        free (list): Positions of deleted artifacts, to be reused.
+        bitmaps (dict): Bitmap of every culture, shape and tag id, by facet.
+        names (dict): Name of every culture, shape and tag id, by facet.
+        everything (int): Bitmap of every artifact.
+    """
+
+    facets = {"culture": Culture, "shape": Shape, "tag": Tag}
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.generation = None
+        self.artifacts = {}
+        self.positions = {}
+        self.free = []
+        self.bitmaps = {facet: {} for facet in self.facets}
+        self.names = {facet: {} for facet in self.facets}
+        self.everything = 0
+
+    def rebuild(self):
+        """
+        Builds the index from scratch with every artifact in the database.
+        """
+        with self.lock:
+            generation = get_cache().get_or_set(GENERATION_CACHE_KEY, 0, None)
+            self.artifacts = {}
+            self.positions = {}
+            self.free = []
+            self.bitmaps = {facet: {} for facet in self.facets}
+            self.everything = 0
+            self.names = {
+                facet: dict(model.objects.values_list("id", "name"))
+                for facet, model in self.facets.items()
+            }
+            self._load(Artifact.objects.order_by("id"))
+            self.generation = generation
+
+    def ensure_current(self):
+        """
+        Rebuilds the index if it was never built or another process changed the data.
+        """
+        generation = get_cache().get(GENERATION_CACHE_KEY)
+        if self.generation is None or self.generation != generation:
+            self.rebuild()
+
+    def _load(self, artifacts):
+        """
+        Adds the given artifacts to the index.
+
+        Args:
+            artifacts (QuerySet): The artifacts to add.
+        """
+        for artifact_id, culture_id, shape_id, tag_ids in artifacts.values_list(
+            "id", "id_culture_id", "id_shape_id", "tag_ids"
+        ):
+            values = {
+                "culture": {culture_id} - {None},
+                "shape": {shape_id} - {None},
+                "tag": set(tag_ids),
+            }
+            self.artifacts[artifact_id] = values
+            if self.free:
+                position = self.free.pop()
+            else:
+                position = len(self.positions)
+            self.positions[artifact_id] = position
+            bit = 1 << position
+            self.everything |= bit
+            for facet, ids in values.items():
+                for value_id in ids:
+                    bitmaps = self.bitmaps[facet]
+                    bitmaps[value_id] = bitmaps.get(value_id, 0) | bit
+
+    def _remove(self, artifact_id):
+        """
+        Removes an artifact from the index.
+
+        Args:
+            artifact_id (int): The id of the artifact.
+        """
+        values = self.artifacts.pop(artifact_id, None)
+        if values is None:
+            return
+        position = self.positions.pop(artifact_id)
+        self.free.append(position)
+        bit = 1 << position
+        self.everything &= ~bit
+        for facet, ids in values.items():
+            for value_id in ids:
+                self.bitmaps[facet][value_id] &= ~bit
+
+    def _changed(self):
+        """
+        Records a change made by this process in the shared generation counter.
+
+        If other processes changed the data since the index was built, the index is
+        marked for a rebuild, since it is missing their changes.
+        """
+        cache = get_cache()
+        cache.add(GENERATION_CACHE_KEY, 0, None)
+        generation = cache.incr(GENERATION_CACHE_KEY)
+        if self.generation is not None and generation == self.generation + 1:
+            self.generation = generation
+        else:
+            self.generation = None
+
+    def update_artifacts(self, artifact_ids):
+        """
+        Reloads the facets of the given artifacts after they were saved or deleted.
+
+        Args:
+            artifact_ids (iterable): The ids of the changed artifacts.
+        """
+        with self.lock:
+            artifact_ids = list(artifact_ids)
+            if self.generation is not None:
+                for artifact_id in artifact_ids:
+                    self._remove(artifact_id)
+                self._load(Artifact.objects.filter(pk__in=artifact_ids))
+            self._changed()
+
+    def update_name(self, facet, value_id, name=None):
+        """
+        Updates the name of a culture, shape or tag after it was saved or deleted.
+
+        Args:
+            facet (str): "culture", "shape" or "tag".
+            value_id (int): The id of the changed instance.
+            name (str): The new name, or None if the instance was deleted.
+        """
+        with self.lock:
+            if self.generation is not None and name is not None:
+                self.names[facet][value_id] = name
+            self._changed()
+            if name is None:
+                # Deleting a value detaches it from its artifacts without signals
+                self.generation = None
+
+    def invalidate(self):
+        """
+        Makes every process rebuild its index, after artifacts or their tags were
+        changed without signals, e.g. by a bulk update from a management command.
+        """
+        with self.lock:
+            self._changed()
+            self.generation = None
+
+    def bitmap(self, facet, value_ids):
+        """
+        Retrieves the artifacts that have any of the given values.
+
+        Args:
+            facet (str): "culture", "shape" or "tag".
+            value_ids (iterable): The ids of the values.
+
+        Returns:
+            int: Bitmap of the artifacts.
+        """
+        bitmap = 0
+        for value_id in value_ids:
+            bitmap |= self.bitmaps[facet].get(value_id, 0)
+        return bitmap
+
+    def artifacts_bitmap(self, artifact_ids):
+        """
+        Builds the bitmap of the given artifacts.
+
+        The bits are set in a byte array and converted to an integer once, since
+        setting them one by one on an integer copies it every time.
+
+        Args:
+            artifact_ids (iterable): The ids of the artifacts. Ids not in the index are
+                ignored.
+
+        Returns:
+            int: Bitmap of the artifacts.
+        """
+        buffer = bytearray((len(self.positions) + len(self.free) + 7) // 8)
+        for artifact_id in artifact_ids:
+            position = self.positions.get(artifact_id)
+            if position is not None:
+                buffer[position >> 3] |= 1 << (position & 7)
+        return int.from_bytes(buffer, "little")
+
+    def counts(self, filters, matches=None):
+        """
+        Counts the artifacts of every culture, shape and tag within the current results.
+
+        The counts of a facet ignore the filter on that same facet, so the user can see
+        how many artifacts switching to another value would show. Tags are combined with
+        AND, so their counts apply every filter.
+
+        Args:
+            filters (dict): Sets of accepted value ids, by facet. Tags are a list of
+                sets, one for each tag the artifacts must have.
+            matches (iterable): Ids of the artifacts found by the search text, or None
+                if there is no search text.
+
+        Returns:
+            dict: For "cultures", "shapes" and "tags", a list of values with at least
+                one artifact, with their id, name and count, sorted by descending count.
+        """
+        self.ensure_current()
+        with self.lock:
+            base = self.everything
+            if matches is not None:
+                base = self.artifacts_bitmap(matches)
+
+            restrictions = {
+                "culture": self.bitmap("culture", filters.get("culture", ())),
+                "shape": self.bitmap("shape", filters.get("shape", ())),
+            }
+            tags = base
+            for tag_ids in filters.get("tag", []):
+                tags &= self.bitmap("tag", tag_ids)
+
+            scopes = {
+                "culture": tags,
+                "shape": tags,
+            }
+            for facet in ("culture", "shape"):
+                for other, bitmap in restrictions.items():
+                    if other != facet and other in filters:
+                        scopes[facet] &= bitmap
+            scopes["tag"] = scopes["culture"]
+            if "culture" in filters:
+                scopes["tag"] &= restrictions["culture"]
+
+            data = {}
+            keys = (("culture", "cultures"), ("shape", "shapes"), ("tag", "tags"))
+            for facet, key in keys:
+                values = []
+                for value_id, bitmap in self.bitmaps[facet].items():
+                    bitmap &= scopes[facet]
+                    if bitmap:
+                        values.append(
+                            {
+                                "id": value_id,
+                                "value": self.names[facet].get(value_id),
+                                "count": popcount(bitmap),
+                            }
+                        )
+                values.sort(key=lambda value: (-value["count"], value["id"]))
+                data[key] = values
+            return data
+
+
+facet_index = FacetIndex()
@@ -0,0 +1,283 @@
+"""
+This module writes meshes as binary glTF 2.0 (GLB) files.
+
+A GLB file holds the scene description as JSON and every buffer, including the
+texture, in one binary chunk, so viewers load a model with one request and copy its
+buffers to the GPU without parsing text.
+
+With quantization, the file uses the KHR_mesh_quantization extension: positions are
+stored as 16-bit integers over the bounding box of the mesh, dequantized by the
+translation and uniform scale of the node (a uniform scale keeps the normals valid),
+normals as normalized 8-bit integers and texture coordinates as normalized 16-bit
+integers. The vertex data is about half as large, with no visible difference at the
+size the artifacts are displayed.
+
+Functions:
+- build_glb: Builds the GLB file of a mesh.
+"""
+
+import json
+import struct
+import numpy as np
+
+GLB_MAGIC = 0x46546C67
+GLB_VERSION = 2
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+# glTF component types
+BYTE = 5120
+UNSIGNED_SHORT = 5123
+UNSIGNED_INT = 5125
+FLOAT = 5126
+
+# glTF buffer view targets
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+
+TRIANGLES = 4
+
+
+def _pad(data, fill=b"\0"):
+    """
+    Pads bytes to a multiple of 4, as required for chunks and buffer views.
+
+    Args:
+        data (bytes): The bytes to pad.
+        fill (bytes): The padding byte.
+
+    Returns:
+        bytes: The padded bytes.
+    """
+    return data + fill * (-len(data) % 4)
+
+
+class _Builder:
+    """
+    Collects the buffer views and accessors of a GLB file.
+
+    Attributes:
+        chunks (list): The padded data of every buffer view.
+        offset (int): The length of the binary chunk so far.
+        buffer_views (list): The glTF buffer views.
+        accessors (list): The glTF accessors.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+        self.buffer_views = []
+        self.accessors = []
+
+    def view(self, data, target=None, stride=None):
+        """
+        Adds a buffer view.
+
+        Args:
+            data (bytes): The data of the view.
+            target (int): The GPU buffer the view is bound to, if any.
+            stride (int): The distance between vertices, if the data is padded.
+
+        Returns:
+            int: The index of the buffer view.
+        """
+        view = {"buffer": 0, "byteOffset": self.offset, "byteLength": len(data)}
+        if target is not None:
+            view["target"] = target
+        if stride is not None:
+            view["byteStride"] = stride
+        self.buffer_views.append(view)
+        padded = _pad(data)
+        self.chunks.append(padded)
+        self.offset += len(padded)
+        return len(self.buffer_views) - 1
+
+    def accessor(
+        self, array, component_type, kind, target, normalized=False, size=None
+    ):
+        """
+        Adds an accessor over a new buffer view.
+
+        Vertex attributes are padded to a multiple of 4 bytes per vertex, as required by
+        glTF, in which case `array` holds the padding columns and `size` the number of
+        components that are used.
+
+        Args:
+            array (numpy.ndarray): The data, with one row per element.
+            component_type (int): The glTF component type.
+            kind (str): The glTF accessor type, e.g. "VEC3".
+            target (int): The GPU buffer the data is bound to.
+            normalized (bool): Whether integers are mapped to [0, 1] or [-1, 1].
+            size (int): The number of used components, if `array` is padded.
+
+        Returns:
+            int: The index of the accessor.
+        """
+        array = np.ascontiguousarray(array)
+        stride = None
+        if array.ndim == 2 and size is not None and size != array.shape[1]:
+            stride = array.shape[1] * array.itemsize
+        accessor = {
+            "bufferView": self.view(array.tobytes(), target, stride),
+            "componentType": component_type,
+            "count": len(array),
+            "type": kind,
+        }
+        if normalized:
+            accessor["normalized"] = True
+        self.accessors.append(accessor)
+        return len(self.accessors) - 1
+
+
+def _material(name, materials, texture_index):
+    """
+    Builds the glTF material of an OBJ material.
+
+    Args:
+        name (str): The name of the material, or None.
+        materials (dict): The materials of the MTL file, as read by `parse_mtl`.
+        texture_index (int): The index of the glTF texture, or None.
+
+    Returns:
+        dict: The glTF material.
+    """
+    properties = materials.get(name, {}) if name else {}
+    red, green, blue = properties.get("Kd", (1.0, 1.0, 1.0))
+    alpha = properties.get("d", 1.0)
+    pbr = {"metallicFactor": 0.0, "roughnessFactor": 1.0}
+    textured = texture_index is not None and ("map_Kd" in properties or not materials)
+    if textured:
+        pbr["baseColorTexture"] = {"index": texture_index}
+    else:
+        pbr["baseColorFactor"] = [red, green, blue, alpha]
+    material = {"pbrMetallicRoughness": pbr, "doubleSided": True}
+    if name:
+        material["name"] = name
+    if alpha < 1.0 and not textured:
+        material["alphaMode"] = "BLEND"
+    return material
+
+
+def build_glb(mesh, materials=None, texture=None, quantize=False):
+    """
+    Builds the GLB file of a mesh.
+
+    Args:
+        mesh (Mesh): The mesh, as read by `piezas.meshes.parse_obj`.
+        materials (dict): The materials of the mesh, as read by `parse_mtl`.
+        texture (tuple): The encoded texture image and its media type, "image/png" or
+            "image/jpeg", or None.
+        quantize (bool): Whether to store the vertex data as integers, with the
+            KHR_mesh_quantization extension.
+
+    Returns:
+        bytes: The GLB file.
+    """
+    materials = materials or {}
+    builder = _Builder()
+    node = {"mesh": 0}
+    attributes = {}
+    extensions = []
+
+    positions = mesh.positions.astype(np.float32)
+    low, high = positions.min(axis=0), positions.max(axis=0)
+    if quantize:
+        extensions.append("KHR_mesh_quantization")
+        extent = float((high - low).max()) or 1.0
+        quantized = np.zeros((len(positions), 4), dtype=np.uint16)
+        quantized[:, :3] = np.round((positions - low) / extent * 65535)
+        attributes["POSITION"] = builder.accessor(
+            quantized, UNSIGNED_SHORT, "VEC3", ARRAY_BUFFER, size=3
+        )
+        builder.accessors[-1]["min"] = quantized[:, :3].min(axis=0).tolist()
+        builder.accessors[-1]["max"] = quantized[:, :3].max(axis=0).tolist()
+        node["translation"] = low.astype(float).tolist()
+        node["scale"] = [extent / 65535] * 3
+
+        normals = np.zeros((len(positions), 4), dtype=np.int8)
+        normals[:, :3] = np.round(np.clip(mesh.normals, -1, 1) * 127)
+        attributes["NORMAL"] = builder.accessor(
+            normals, BYTE, "VEC3", ARRAY_BUFFER, normalized=True, size=3
+        )
+    else:
+        attributes["POSITION"] = builder.accessor(
+            positions, FLOAT, "VEC3", ARRAY_BUFFER
+        )
+        builder.accessors[-1]["min"] = low.astype(float).tolist()
+        builder.accessors[-1]["max"] = high.astype(float).tolist()
+        attributes["NORMAL"] = builder.accessor(
+            mesh.normals.astype(np.float32), FLOAT, "VEC3", ARRAY_BUFFER
+        )
+
+    if mesh.uvs is not None:
+        uvs = mesh.uvs.astype(np.float32)
+        # Normalized integers can only hold coordinates inside the texture
+        if quantize and uvs.min() >= 0.0 and uvs.max() <= 1.0:
+            attributes["TEXCOORD_0"] = builder.accessor(
+                np.round(uvs * 65535).astype(np.uint16),
+                UNSIGNED_SHORT,
+                "VEC2",
+                ARRAY_BUFFER,
+                normalized=True,
+            )
+        else:
+            attributes["TEXCOORD_0"] = builder.accessor(
+                uvs, FLOAT, "VEC2", ARRAY_BUFFER
+            )
+
+    gltf = {"asset": {"version": "2.0", "generator": "catalogo_arqueologico"}}
+    texture_index = None
+    if texture is not None and mesh.uvs is not None:
+        data, mime_type = texture
+        gltf["images"] = [{"bufferView": builder.view(data), "mimeType": mime_type}]
+        gltf["samplers"] = [{"wrapS": 10497, "wrapT": 10497}]
+        gltf["textures"] = [{"source": 0, "sampler": 0}]
+        texture_index = 0
+
+    index_type, index_dtype = (
+        (UNSIGNED_SHORT, np.uint16)
+        if mesh.vertex_count <= 65535
+        else (UNSIGNED_INT, np.uint32)
+    )
+    primitives = []
+    gltf_materials = []
+    for name, indices in mesh.groups:
+        primitive = {
+            "attributes": attributes,
+            "indices": builder.accessor(
+                indices.astype(index_dtype), index_type, "SCALAR", ELEMENT_ARRAY_BUFFER
+            ),
+            "material": len(gltf_materials),
+            "mode": TRIANGLES,
+        }
+        gltf_materials.append(_material(name, materials, texture_index))
+        primitives.append(primitive)
+
+    gltf.update(
+        {
+            "scene": 0,
+            "scenes": [{"nodes": [0]}],
+            "nodes": [node],
+            "meshes": [{"primitives": primitives}],
+            "materials": gltf_materials,
+            "accessors": builder.accessors,
+            "bufferViews": builder.buffer_views,
+            "buffers": [{"byteLength": builder.offset}],
+        }
+    )
+    if extensions:
+        gltf["extensionsUsed"] = extensions
+        gltf["extensionsRequired"] = extensions
+
+    json_chunk = _pad(json.dumps(gltf, separators=(",", ":")).encode("utf-8"), b" ")
+    bin_chunk = b"".join(builder.chunks)
+    length = 12 + 8 + len(json_chunk) + 8 + len(bin_chunk)
+    return b"".join(
+        (
+            struct.pack("<III", GLB_MAGIC, GLB_VERSION, length),
+            struct.pack("<II", len(json_chunk), CHUNK_JSON),
+            json_chunk,
+            struct.pack("<II", len(bin_chunk), CHUNK_BIN),
+            bin_chunk,
+        )
+    )
@@ -0,0 +1,60 @@
+"""
+This module contains a Django management command that recomputes the tag id array of
+every artifact from its tags.
+"""
+
+from django.core.management.base import BaseCommand
+from piezas.cache import bump_shared_version
+from piezas.facets import facet_index
+from piezas.models import Artifact
+from piezas.search import update_tag_ids
+import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+class Command(BaseCommand):
+    """
+    This command recomputes the tag id array of every artifact.
+
+    The array is normally kept up to date by signals. This command repairs it after tags
+    were changed without them, e.g. with raw SQL or a fixture.
+
+    Attributes:
+        help (str): A short description of the command that is displayed when running
+            'python manage.py help backfillTagIds'.
+    """
+
+    help = "Recompute the tag id array of every artifact from its tags."
+
+    def add_arguments(self, parser):
+        """
+        Adds the command line arguments of the command.
+
+        Args:
+            parser (ArgumentParser): The parser of the command line arguments.
+        """
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of artifacts updated per query.",
+        )
+
+    def handle(self, *args, **kwargs):
+        """
+        Executes the command to recompute the tag id arrays, in batches of artifacts.
+        """
+        batch_size = kwargs["batch_size"]
+        artifact_ids = list(
+            Artifact.objects.order_by("id").values_list("id", flat=True)
+        )
+        updated = 0
+        for start in range(0, len(artifact_ids), batch_size):
+            batch = artifact_ids[start : start + batch_size]
+            updated += update_tag_ids(Artifact.objects.filter(pk__in=batch))
+        # Bulk updates do not send signals
+        bump_shared_version()
+        facet_index.invalidate()
+        logger.info(f"Tag ids of {updated} artifacts were successfully updated")
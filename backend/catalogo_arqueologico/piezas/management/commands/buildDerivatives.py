@@ -0,0 +1,139 @@
+"""
+This module contains a Django management command that builds the resized variants and
+placeholders of every thumbnail and image.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from piezas.assets import IMAGE_PREVIEW_FIELDS, build_variants, describe_image
+from piezas.cache import bump_shared_version
+from piezas.catalog import refresh_catalog_entries, touch_artifacts
+from piezas.models import Artifact, Image, Thumbnail
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+def variants_or_error(name):
+    """
+    Builds the variants of an image file and describes it, catching the errors.
+
+    Args:
+        name (str): The storage name of the image.
+
+    Returns:
+        tuple: The variants, or None, the values of the preview fields, or None, and
+            the error, or None.
+    """
+    try:
+        return build_variants(name), describe_image(name), None
+    except Exception as e:
+        return None, None, e
+
+
+class Command(BaseCommand):
+    """
+    This command builds the resized variants of every thumbnail and image, and records
+    their dimensions, dominant color and placeholder.
+
+    Variants and placeholders are normally built when files are uploaded or imported.
+    This command builds them for the existing files, e.g. after adding a width or
+    format, or for files uploaded before placeholders existed. Existing variant files
+    are reused, so it can be interrupted and run again.
+
+    Images are decoded, resized and encoded by a pool of threads. Pillow releases the
+    GIL while doing so, so the threads run in parallel.
+
+    Attributes:
+        help (str): A short description of the command that is displayed when running
+            'python manage.py help buildDerivatives'.
+    """
+
+    help = "Build the resized variants and placeholders of every thumbnail and image."
+
+    def add_arguments(self, parser):
+        """
+        Adds the command line arguments of the command.
+
+        Args:
+            parser (ArgumentParser): The parser of the command line arguments.
+        """
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of images processed at the same time.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of rows updated per query.",
+        )
+
+    def handle(self, *args, **kwargs):
+        """
+        Executes the command to build the variants and placeholders, and refreshes the
+        catalog entries of the artifacts whose variants or placeholders changed.
+        """
+        workers = max(1, kwargs["workers"])
+        batch_size = kwargs["batch_size"]
+
+        changed = {Thumbnail: [], Image: []}
+        built, failed = 0, 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for model in (Thumbnail, Image):
+                instances = list(
+                    model.objects.order_by("id").only(
+                        "id", "path", "variants", *IMAGE_PREVIEW_FIELDS
+                    )
+                )
+                results = executor.map(
+                    variants_or_error, [instance.path.name for instance in instances]
+                )
+                for instance, (variants, preview, error) in zip(instances, results):
+                    if error is not None:
+                        logger.error(
+                            f"Could not build the variants of {instance.path.name}: "
+                            f"{error}"
+                        )
+                        failed += 1
+                        continue
+                    built += 1
+                    if variants != instance.variants or any(
+                        getattr(instance, field) != value
+                        for field, value in preview.items()
+                    ):
+                        instance.variants = variants
+                        for field, value in preview.items():
+                            setattr(instance, field, value)
+                        changed[model].append(instance)
+
+        # Bulk updates do not send signals, so the catalog entries are refreshed below
+        for model, instances in changed.items():
+            model.objects.bulk_update(
+                instances, ["variants", *IMAGE_PREVIEW_FIELDS], batch_size=batch_size
+            )
+
+        artifact_ids = list(
+            Artifact.objects.filter(
+                Q(id_thumbnail__in=[instance.pk for instance in changed[Thumbnail]])
+                | Q(images__in=[instance.pk for instance in changed[Image]])
+            )
+            .order_by("id")
+            .values_list("id", flat=True)
+            .distinct()
+        )
+        for start in range(0, len(artifact_ids), batch_size):
+            batch = artifact_ids[start : start + batch_size]
+            touch_artifacts(batch)
+            refresh_catalog_entries(batch)
+        if artifact_ids:
+            bump_shared_version()
+        logger.info(
+            f"Variants of {built} files are ready, {failed} could not be built. "
+            f"{len(artifact_ids)} catalog entries were refreshed"
+        )
@@ -0,0 +1,440 @@
+"""
+This module contains a Django management command that removes the thumbnails, images,
+3D models and media files that no artifact uses anymore.
+"""
+
+from datetime import timedelta
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.utils import timezone
+from piezas.models import Image, Model, ModelLOD, Thumbnail
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+# Suffixes of the files stored next to a media file: its precompressed copies and the
+# markers of the copies that were not kept (see `piezas.assets`), and the locks of the
+# files built once (see `piezas.mediacache`)
+COMPANION_SUFFIXES = (".gz", ".br", ".gz.skip", ".br.skip", ".lock")
+
+
+def garbage_rows(cutoff):
+    """
+    Builds the querysets of the rows no artifact uses, unchanged since a date.
+
+    Args:
+        cutoff (datetime): Rows changed after this date are kept.
+
+    Returns:
+        dict: The queryset of the unused rows of each model.
+    """
+    return {
+        Image: Image.objects.filter(id_artifact__isnull=True, updated_at__lt=cutoff),
+        Thumbnail: Thumbnail.objects.filter(
+            artifact__isnull=True, updated_at__lt=cutoff
+        ),
+        Model: Model.objects.filter(artifact__isnull=True, updated_at__lt=cutoff),
+    }
+
+
+def file_fields():
+    """
+    Lists the file fields of the models of the application.
+
+    Returns:
+        list: Tuples with the model, the names of its file fields and the names of its
+            JSON fields, which hold the storage names of built files, like the resized
+            variants of an image or the mipmaps of a texture.
+    """
+    fields = []
+    for model in apps.get_app_config("piezas").get_models():
+        names = [
+            field.name
+            for field in model._meta.fields
+            if isinstance(field, models.FileField)
+        ]
+        if names:
+            json_names = [
+                field.name
+                for field in model._meta.fields
+                if isinstance(field, models.JSONField)
+            ]
+            fields.append((model, names, json_names))
+    return fields
+
+
+def media_folders():
+    """
+    Lists the folders of the files referenced by the rows.
+
+    Returns:
+        set: The folders, e.g. "thumbnails/".
+    """
+    folders = {settings.DERIVATIVES_URL}
+    for model, names, _ in file_fields():
+        for name in names:
+            upload_to = model._meta.get_field(name).upload_to
+            folders.add(getattr(upload_to, "folder", upload_to))
+    return folders
+
+
+def json_names(value):
+    """
+    Lists the strings of a JSON value, at any depth.
+
+    Args:
+        value: The decoded JSON value.
+
+    Yields:
+        str: The strings of the value.
+    """
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from json_names(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from json_names(item)
+
+
+def referenced_names(excluded=None):
+    """
+    Lists the storage names of the files the rows reference, including the files listed
+    in JSON fields, like the resized variants of the thumbnails and images.
+
+    Args:
+        excluded (dict): The querysets of the rows to leave out, by model, e.g. the
+            rows a dry run would delete.
+
+    Returns:
+        set: The storage names.
+    """
+    excluded = excluded or {}
+    names = set()
+    for model, fields, json_fields in file_fields():
+        rows = model.objects.all()
+        if model in excluded:
+            rows = rows.exclude(pk__in=excluded[model].values("pk"))
+        if model is ModelLOD and Model in excluded:
+            rows = rows.exclude(model__in=excluded[Model].values("pk"))
+        for values in rows.values_list(*fields, *json_fields).iterator():
+            names.update(name for name in values[: len(fields)] if name)
+            for value in values[len(fields) :]:
+                names.update(json_names(value))
+    return names
+
+
+def still_referenced(names):
+    """
+    Finds which of the given storage names a file field references now.
+
+    Args:
+        names (list): The storage names.
+
+    Returns:
+        set: The referenced storage names.
+    """
+    referenced = set()
+    for model, fields, _ in file_fields():
+        for field in fields:
+            rows = model.objects.filter(**{f"{field}__in": names})
+            referenced.update(rows.values_list(field, flat=True))
+    return referenced
+
+
+def base_name(name):
+    """
+    Removes the suffix of a file stored next to a media file, e.g. `.gz`.
+
+    Args:
+        name (str): The storage name.
+
+    Returns:
+        str: The storage name of the media file.
+    """
+    for suffix in COMPANION_SUFFIXES:
+        if name.endswith(suffix):
+            return name[: -len(suffix)]
+    return name
+
+
+def last_change(stat):
+    """
+    Returns when a file was last written or linked. New hard links to an old file
+    keep its modification time, but update its change time.
+
+    Args:
+        stat (stat_result): The status of the file.
+
+    Returns:
+        float: The timestamp, in seconds.
+    """
+    return max(stat.st_mtime, stat.st_ctime)
+
+
+def format_size(size):
+    """
+    Formats a size in bytes for the log.
+
+    Args:
+        size (int): The size, in bytes.
+
+    Returns:
+        str: The size, in mebibytes.
+    """
+    return f"{size / 1024**2:.1f} MiB"
+
+
+class Command(BaseCommand):
+    """
+    This command removes the thumbnails, images and 3D models that no artifact uses,
+    and the media files that no row references.
+
+    Editing an artifact leaves its previous images unlinked and, when a model file
+    changes, its previous model unused. This command deletes:
+
+    - Image rows without artifact, and Thumbnail and Model rows no artifact references,
+      along with the simplified versions of the models.
+    - Files of the media folders that no row references: thumbnails, images, model
+      files, GLB files, simplified versions, web textures and materials and resized
+      variants, with their precompressed copies.
+    - Blobs of the content-addressed storage (see `piezas.storage`) that no file links
+      to anymore, and temporary files left by interrupted writes.
+
+    Rows changed and files written during the grace period are kept, so files being
+    uploaded, and rows about to be assigned to an artifact, are not removed. The caches
+    of resized images and download archives are evicted on their own and not touched.
+
+    Since files are hard links to their blob, removing a file frees its space only
+    when it is the last link to it; the reported space is the one actually freed.
+
+    Attributes:
+        help (str): A short description of the command that is displayed when running
+            'python manage.py help collectMediaGarbage'.
+    """
+
+    help = "Remove the thumbnails, images, models and media files no artifact uses."
+
+    def add_arguments(self, parser):
+        """
+        Adds the command line arguments of the command.
+
+        Args:
+            parser (ArgumentParser): The parser of the command line arguments.
+        """
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be removed.",
+        )
+        parser.add_argument(
+            "--grace-hours",
+            type=float,
+            default=settings.MEDIA_GARBAGE_GRACE_HOURS,
+            help="Keep the rows and files changed in the last hours. "
+            "Defaults to MEDIA_GARBAGE_GRACE_HOURS.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of rows deleted per transaction, and of files checked per "
+            "query.",
+        )
+
+    def handle(self, *args, **kwargs):
+        """
+        Executes the command to remove the unused rows, files and blobs.
+        """
+        self.dry_run = kwargs["dry_run"]
+        batch_size = kwargs["batch_size"]
+        grace = timedelta(hours=kwargs["grace_hours"])
+        cutoff = timezone.now() - grace
+        self.file_cutoff = time.time() - grace.total_seconds()
+        verb = "would be" if self.dry_run else "were"
+
+        garbage = garbage_rows(cutoff)
+        for model, queryset in garbage.items():
+            count = self.delete_rows(model, queryset, batch_size)
+            logger.info(f"{count} unused {model.__name__} rows {verb} deleted")
+
+        # Files are listed before removing any, since removing a link changes the
+        # change time of the other links to the same blob
+        names = referenced_names(garbage if self.dry_run else None)
+        # Remaining links of the files to remove, and inodes freed in a dry run
+        self.links = {}
+        self.freed = set()
+        files = []
+        for folder in sorted(media_folders()):
+            files.extend(self.unused_files(folder, names))
+        blobs = self.unused_blobs()
+
+        removed, reclaimed = 0, 0
+        for unused, check in ((files, True), (blobs, False)):
+            for start in range(0, len(unused), batch_size):
+                count, size = self.remove(unused[start : start + batch_size], check)
+                removed += count
+                reclaimed += size
+
+        logger.info(
+            f"{removed} unused files {verb} removed, "
+            f"{format_size(reclaimed)} {verb} freed"
+        )
+
+    def delete_rows(self, model, queryset, batch_size):
+        """
+        Deletes the unused rows of a model, in batches.
+
+        The rows are locked before they are deleted, so an artifact can not start using
+        one of them in the meantime, e.g. when the same model is uploaded again.
+
+        Args:
+            model (type): The model class.
+            queryset (QuerySet): The unused rows.
+            batch_size (int): The number of rows deleted per transaction.
+
+        Returns:
+            int: The number of deleted rows, or of rows to delete in a dry run.
+        """
+        if self.dry_run:
+            return queryset.count()
+        deleted = 0
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                ids = list(
+                    queryset.filter(id__gt=last_id)
+                    .order_by("id")
+                    .select_for_update(of=("self",))
+                    .values_list("id", flat=True)[:batch_size]
+                )
+                if not ids:
+                    break
+                last_id = ids[-1]
+                # Rows are deleted with their signals, so the catalog entries are kept
+                model.objects.filter(pk__in=ids).delete()
+            deleted += len(ids)
+        return deleted
+
+    def unused_files(self, folder, names):
+        """
+        Lists the files of a media folder that no row references, and the temporary
+        files of interrupted writes, older than the grace period.
+
+        Args:
+            folder (str): The folder, e.g. "thumbnails/".
+            names (set): The storage names of the referenced files.
+
+        Returns:
+            list: Tuples with the path, storage name and status of each file.
+        """
+        unused = []
+        for directory, _, filenames in os.walk(default_storage.path(folder)):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, default_storage.path(""))
+                name = name.replace(os.sep, "/")
+                if filename.endswith(".tmp") or base_name(name) not in names:
+                    stat = self.removable(path)
+                    if stat is not None:
+                        unused.append((path, name, stat))
+        return unused
+
+    def unused_blobs(self):
+        """
+        Lists the blobs no file links to once the unused files are removed, and the
+        temporary files of interrupted writes, older than the grace period.
+
+        Returns:
+            list: Tuples with the path, storage name and status of each blob.
+        """
+        unused = []
+        root = default_storage.path(settings.BLOBS_URL)
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                # The blob itself is the last link
+                key = (stat.st_dev, stat.st_ino)
+                if filename.endswith(".tmp") or self.links.get(key, stat.st_nlink) == 1:
+                    stat = self.removable(path)
+                    if stat is not None:
+                        unused.append((path, None, stat))
+        return unused
+
+    def removable(self, path):
+        """
+        Checks whether a file is older than the grace period, and counts it as removed
+        from the links of its inode.
+
+        Args:
+            path (str): The path of the file.
+
+        Returns:
+            stat_result: The status of the file, or None if it must be kept.
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        if last_change(stat) > self.file_cutoff:
+            return None
+        key = (stat.st_dev, stat.st_ino)
+        self.links[key] = self.links.get(key, stat.st_nlink) - 1
+        return stat
+
+    def remove(self, files, check):
+        """
+        Removes a batch of unused files, unless they changed since they were listed.
+
+        Args:
+            files (list): Tuples with the path, storage name and status of each file.
+            check (bool): Whether to check again that no row references the files,
+                since one may have started to while the files were listed.
+
+        Returns:
+            tuple: The number of removed files, and the space freed, in bytes: the size
+                of the files that were the last link to their content.
+        """
+        if self.dry_run:
+            freed = 0
+            for _, _, stat in files:
+                # The content is freed once, when its last link is removed
+                key = (stat.st_dev, stat.st_ino)
+                if self.links[key] == 0 and key not in self.freed:
+                    self.freed.add(key)
+                    freed += stat.st_size
+            return len(files), freed
+        referenced = set()
+        if check:
+            referenced = still_referenced([base_name(name) for _, name, _ in files])
+        removed, reclaimed = 0, 0
+        for path, name, stat in files:
+            if name is not None and base_name(name) in referenced:
+                continue
+            try:
+                current = os.stat(path)
+            except FileNotFoundError:
+                continue
+            # Rewritten since it was listed, or a blob some of whose files were kept
+            if (
+                current.st_ino != stat.st_ino
+                or current.st_mtime_ns != stat.st_mtime_ns
+                or (name is None and current.st_nlink > 1)
+            ):
+                continue
+            os.remove(path)
+            removed += 1
+            if current.st_nlink == 1:
+                reclaimed += current.st_size
+        return removed, reclaimed
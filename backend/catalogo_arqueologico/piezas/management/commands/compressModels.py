@@ -0,0 +1,94 @@
+"""
+This module contains a Django management command that builds the precompressed copies
+of the object and material files of every 3D model, including their web materials.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from piezas.assets import build_sidecars, remove_sidecars, sidecar_encodings
+from piezas.models import Model
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+def sidecars_or_error(name):
+    """
+    Builds the precompressed copies of a file, catching the errors.
+
+    Args:
+        name (str): The storage name of the file.
+
+    Returns:
+        tuple: The storage names of the built copies, or None, and the error, or None.
+    """
+    try:
+        return build_sidecars(name), None
+    except Exception as e:
+        return None, e
+
+
+class Command(BaseCommand):
+    """
+    This command builds the precompressed copies (`.gz`, and `.br` if the `brotli`
+    package is installed) of the object and material files of every 3D model, including
+    the web versions of the material files.
+
+    Copies are normally built when models are saved. This command builds them for the
+    existing models, e.g. after installing `brotli` or replacing files on disk. Copies
+    that are up to date are kept, so it can be interrupted and run again.
+
+    zlib and Brotli release the GIL while compressing, so the files are compressed by a
+    pool of threads.
+
+    Attributes:
+        help (str): A short description of the command that is displayed when running
+            'python manage.py help compressModels'.
+    """
+
+    help = "Build the gzip and Brotli copies of the object and material files."
+
+    def add_arguments(self, parser):
+        """
+        Adds the command line arguments of the command.
+
+        Args:
+            parser (ArgumentParser): The parser of the command line arguments.
+        """
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of files compressed at the same time.",
+        )
+
+    def handle(self, *args, **kwargs):
+        """
+        Executes the command to build the precompressed copies.
+        """
+        workers = max(1, kwargs["workers"])
+
+        names = set()
+        for files in Model.objects.values_list("object", "material", "web_material"):
+            names.update(name for name in files if name)
+        names = sorted(names)
+
+        built, failed = 0, 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for name, (sidecars, error) in zip(
+                names, executor.map(sidecars_or_error, names)
+            ):
+                if error is not None:
+                    logger.error(f"Could not compress {name}: {error}")
+                    # Stale copies would be served instead of the file
+                    remove_sidecars(name)
+                    failed += 1
+                    continue
+                built += len(sidecars)
+        logger.info(
+            f"{len(names) - failed} files compressed as "
+            f"{', '.join(sidecar_encodings())}, {failed} could not be compressed. "
+            f"{built} copies were built"
+        )
@@ -0,0 +1,177 @@
+"""
+This module contains a Django management command that converts every 3D model to binary
+glTF (GLB) and builds its simplified versions and the web versions of its texture and
+material.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.db.models import Q
+from functools import partial
+from piezas.assets import (
+    WEB_ASSET_FIELDS,
+    build_model_assets,
+    build_web_assets,
+    compress_model_files,
+)
+from piezas.cache import bump_shared_version
+from piezas.catalog import refresh_catalog_entries, touch_artifacts
+from piezas.models import Artifact, Model, ModelLOD
+import logging
+import multiprocessing
+import os
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+def assets_or_error(quantize, model):
+    """
+    Builds the web versions of the texture and material of a model, its GLB conversion
+    and its simplified versions, catching the errors.
+
+    Args:
+        quantize (bool): Whether to quantize the vertex data.
+        model (Model): The model.
+
+    Returns:
+        tuple: The values of the web version fields, by name, the GLB file and the
+            simplified versions, as returned by `build_model_assets`, or None, and the
+            error, or None.
+    """
+    try:
+        build_web_assets(model)
+        # Bulk updates do not send the signal that compresses the web material
+        compress_model_files(model)
+        web = {field: getattr(model, field) for field in WEB_ASSET_FIELDS}
+        return (web, *build_model_assets(model, quantize)), None
+    except Exception as e:
+        return None, e
+
+
+class Command(BaseCommand):
+    """
+    This command converts every 3D model to binary glTF (GLB) and builds its simplified
+    versions and the web versions of its texture and material (see `piezas.assets`).
+
+    Models are normally converted when they are uploaded or imported. This command
+    converts the existing ones, e.g. after changing GLB_QUANTIZE, LOD_TRIANGLE_BUDGETS
+    or the WEB_TEXTURE settings. The original OBJ, MTL and texture files are not
+    modified.
+
+    Reading OBJ files is mostly Python code that holds the GIL, so models are converted
+    by a pool of processes, one per CPU core by default.
+
+    Attributes:
+        help (str): A short description of the command that is displayed when running
+            'python manage.py help convertModels'.
+    """
+
+    help = (
+        "Convert every 3D model to binary glTF (GLB) and build its simplified versions "
+        "and web textures."
+    )
+
+    def add_arguments(self, parser):
+        """
+        Adds the command line arguments of the command.
+
+        Args:
+            parser (ArgumentParser): The parser of the command line arguments.
+        """
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of models converted at the same time.",
+        )
+        parser.add_argument(
+            "--missing",
+            action="store_true",
+            help="Only convert the models without GLB file or web material.",
+        )
+        parser.add_argument(
+            "--quantize",
+            choices=("yes", "no"),
+            help="Whether to quantize the vertex data. Defaults to GLB_QUANTIZE.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of rows updated per query.",
+        )
+
+    def handle(self, *args, **kwargs):
+        """
+        Executes the command to convert the models, and refreshes the catalog entries of
+        their artifacts.
+        """
+        workers = max(1, kwargs["workers"])
+        batch_size = kwargs["batch_size"]
+        quantize = {"yes": True, "no": False}.get(kwargs["quantize"])
+
+        models = Model.objects.order_by("id")
+        if kwargs["missing"]:
+            models = models.filter(
+                Q(glb="")
+                | Q(glb__isnull=True)
+                | Q(web_material="")
+                | Q(web_material__isnull=True)
+            )
+        models = list(models)
+
+        converted = []
+        failed = 0
+        # Forked workers would share the database connections of this process
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("fork")
+        ) as executor:
+            results = executor.map(partial(assets_or_error, quantize), models)
+            for model, (assets, error) in zip(models, results):
+                if error is not None:
+                    logger.error(f"Could not convert model {model.pk}: {error}")
+                    failed += 1
+                    continue
+                web, name, lods = assets
+                for field, value in web.items():
+                    setattr(model, field, value)
+                model.glb.name = name
+                converted.append((model, lods))
+
+        # Bulk updates do not send signals, so the catalog entries are refreshed below
+        with transaction.atomic():
+            Model.objects.bulk_update(
+                [model for model, _ in converted],
+                ["glb", *WEB_ASSET_FIELDS],
+                batch_size=batch_size,
+            )
+            ModelLOD.objects.filter(
+                model__in=[model.pk for model, _ in converted]
+            ).delete()
+            ModelLOD.objects.bulk_create(
+                [
+                    ModelLOD(model=model, **lod)
+                    for model, lods in converted
+                    for lod in lods
+                ],
+                batch_size=batch_size,
+            )
+
+        artifact_ids = list(
+            Artifact.objects.filter(id_model__in=[model.pk for model, _ in converted])
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        for start in range(0, len(artifact_ids), batch_size):
+            batch = artifact_ids[start : start + batch_size]
+            touch_artifacts(batch)
+            refresh_catalog_entries(batch)
+        if artifact_ids:
+            bump_shared_version()
+        logger.info(
+            f"{len(converted)} models converted, {failed} could not be "
+            f"converted. {len(artifact_ids)} catalog entries were refreshed"
+        )
@@ -0,0 +1,167 @@
+"""
+This module contains a Django management command that moves the existing thumbnails,
+images and 3D model files into the content-addressed storage.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from piezas.models import Model
+from piezas.signals import CONTENT_FIELDS
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+def adopt_or_error(name):
+    """
+    Moves a file into the blob store, catching the errors.
+
+    Args:
+        name (str): The storage name of the file.
+
+    Returns:
+        tuple: The hash and size of the file, or None, and the error, or None.
+    """
+    try:
+        return default_storage.adopt(name), None
+    except Exception as e:
+        return None, e
+
+
+class Command(BaseCommand):
+    """
+    This command moves the existing thumbnails, images and 3D model files into the
+    content-addressed storage (see `piezas.storage`), recording their hash and size.
+
+    Files with the same content are replaced by hard links to a single blob, freeing
+    the space of the copies. Only rows without hash are processed, and files are
+    replaced atomically, so it can be interrupted and run again.
+
+    Models whose files have the same contents as another model's are reported and left
+    without hashes, since the `unique_model_triplet` constraint allows only one of them.
+
+    Attributes:
+        help (str): A short description of the command that is displayed when running
+            'python manage.py help hashMedia'.
+    """
+
+    help = "Move the existing media files into the content-addressed storage."
+
+    def add_arguments(self, parser):
+        """
+        Adds the command line arguments of the command.
+
+        Args:
+            parser (ArgumentParser): The parser of the command line arguments.
+        """
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of files hashed at the same time.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of rows processed per batch.",
+        )
+
+    def handle(self, *args, **kwargs):
+        """
+        Executes the command to move the files into the content-addressed storage.
+        """
+        workers = max(1, kwargs["workers"])
+        batch_size = kwargs["batch_size"]
+
+        hashed, failed, duplicated = 0, 0, 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for model, fields in CONTENT_FIELDS.items():
+                update_fields = [hash_field for _, hash_field, _ in fields] + [
+                    size_field for _, _, size_field in fields
+                ]
+                missing = Q()
+                for hash_field in update_fields[: len(fields)]:
+                    missing |= Q(**{f"{hash_field}__isnull": True})
+                queryset = model.objects.filter(missing).order_by("id")
+                model_hashed = 0
+                # Rows are read by id, since failed and duplicated rows stay unhashed
+                last_id = 0
+                while True:
+                    rows = list(queryset.filter(id__gt=last_id)[:batch_size])
+                    if not rows:
+                        break
+                    last_id = rows[-1].id
+                    names = [
+                        getattr(row, file_field).name
+                        for row in rows
+                        for file_field, _, _ in fields
+                    ]
+                    results = iter(list(executor.map(adopt_or_error, names)))
+
+                    updated = []
+                    triplets = set()
+                    for row in rows:
+                        row_failed = False
+                        for file_field, hash_field, size_field in fields:
+                            result, error = next(results)
+                            if error is not None:
+                                logger.error(
+                                    f"Could not hash {getattr(row, file_field).name}: "
+                                    f"{error}"
+                                )
+                                row_failed = True
+                                continue
+                            setattr(row, hash_field, result[0])
+                            setattr(row, size_field, result[1])
+                        if row_failed:
+                            failed += 1
+                            continue
+                        if model is Model:
+                            triplet = tuple(
+                                getattr(row, hash_field)
+                                for _, hash_field, _ in fields
+                            )
+                            if triplet in triplets or self.duplicate_model(row):
+                                logger.warning(
+                                    f"Model {row.pk} has the same files as another "
+                                    "model. Leaving it without hashes"
+                                )
+                                duplicated += 1
+                                continue
+                            triplets.add(triplet)
+                        updated.append(row)
+
+                    model.objects.bulk_update(updated, update_fields)
+                    model_hashed += len(updated)
+                    logger.info(f"{model.__name__}: {model_hashed} rows hashed so far")
+                hashed += model_hashed
+
+        logger.info(
+            f"{hashed} rows hashed, {failed} could not be hashed and {duplicated} "
+            "models have the same files as another model"
+        )
+
+    def duplicate_model(self, row):
+        """
+        Checks whether another model already has the same file contents as a model.
+
+        Args:
+            row (Model): The model, with the hashes of its files set.
+
+        Returns:
+            bool: True if another model has the same file contents.
+        """
+        return (
+            Model.objects.filter(
+                texture_sha256=row.texture_sha256,
+                object_sha256=row.object_sha256,
+                material_sha256=row.material_sha256,
+            )
+            .exclude(pk=row.pk)
+            .exists()
+        )
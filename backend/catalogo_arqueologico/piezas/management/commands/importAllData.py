@@ -6,6 +6,8 @@ from django.core.management.base import BaseCommand
 from django.core import management
 from django.core.management.base import BaseCommand
 from django.conf import settings
+from piezas.cache import bump_shared_version
+from piezas.facets import facet_index
 from piezas.models import Model
 
 import os
@@ -50,3 +52,9 @@ class Command(BaseCommand):
         management.call_command("importDescriptions")
 
         management.call_command("importInstitutions")
+
+        # Imported rows are saved with signals, but the relationship tables are bulk
+        # created, so cached catalog responses and facet indexes are invalidated once
+        # more at the end
+        bump_shared_version()
+        facet_index.invalidate()
@@ -5,9 +5,12 @@ This module contains a Django management command that imports descriptions from
 from django.core.management.base import BaseCommand
 from django.db import IntegrityError
 from django.core.files import File
+from django.core.files.storage import default_storage
 from django.conf import settings
 from django.db.models import Q
 from piezas.models import *
+from piezas.assets import process_image_assets
+from piezas.storage import link_for_field
 import csv
 import os
 import re
@@ -17,6 +20,22 @@ logger = logging.getLogger(__name__)
 logger.setLevel("INFO")
 
 
+def fileNameContains(field, text):
+    """
+    This function builds the lookup of the files whose name contains a text. Only the
+    file name is matched, since the folders of the sharded layout are hexadecimal
+    hashes that may contain the text (see `piezas.storage`).
+
+    Args:
+        field (str): The name of the file field.
+        text (str): The text.
+
+    Returns:
+        Q: The lookup.
+    """
+    return Q(**{f"{field}__iregex": rf"[^/]*{re.escape(text)}[^/]*$"})
+
+
 def addImages(self, artifact, realId):
     """
     This function adds images to an artifact.
@@ -46,16 +65,25 @@ def addImages(self, artifact, realId):
             ):
                 image_path = os.path.join(multimedia_path, realId, image_name)
                 with open(image_path, "rb") as image:
-                    try:
-                        Image.objects.create(
-                            id_artifact=artifact, path=File(image, name=image_name)
-                        )
-                        logger.info(f"Image {image_name} added successfully")
-                    except IntegrityError:
-                        logger.warning(
-                            f"Image {image_name} already exists. Skipping its creation"
-                        )
-                        continue
+                    # Files are stored once per distinct content, so an image is only
+                    # skipped if the artifact already has one with the same content
+                    digest, size = default_storage.save_blob(File(image))
+                if Image.objects.filter(id_artifact=artifact, sha256=digest).exists():
+                    logger.warning(
+                        f"Image {image_name} already exists. Skipping its creation"
+                    )
+                    continue
+                newImage = Image.objects.create(
+                    id_artifact=artifact,
+                    path=link_for_field(
+                        Image._meta.get_field("path"), digest, image_name
+                    ),
+                    sha256=digest,
+                    size=size,
+                )
+                logger.info(f"Image {image_name} added successfully")
+                # Resized variants for the detail carousel
+                process_image_assets(newImage)
 
 
 class Command(BaseCommand):
@@ -86,14 +114,16 @@ class Command(BaseCommand):
                 # Get the thumbnail, model, shape, culture, tags
                 # (these models are already created)
                 try:
-                    idThumbnail = Thumbnail.objects.get(path__icontains=realId)
+                    idThumbnail = Thumbnail.objects.get(
+                        fileNameContains("path", realId)
+                    )
                 except Thumbnail.DoesNotExist:
                     logger.warning(f"Thumbnail for artifact {realId} not found.")
                     idThumbnail = None
                 idModel = Model.objects.filter(
-                    Q(texture__icontains=realId)
-                    & Q(object__icontains=realId)
-                    & Q(material__icontains=realId)
+                    fileNameContains("texture", realId)
+                    & fileNameContains("object", realId)
+                    & fileNameContains("material", realId)
                 ).first()
                 if idModel is None:
                     logger.warning(f"Model for artifact {realId} not found. Skipping its creation")
@@ -4,9 +4,12 @@ This module contains a Django management command to import 3D models from a fold
 
 from django.core.management.base import BaseCommand
 from django.core.files import File
+from django.core.files.storage import default_storage
 from django.conf import settings
 from django.db import IntegrityError
+from piezas.assets import process_model_assets
 from piezas.models import Model
+from piezas.storage import link_into
 
 import os
 import logging
@@ -75,55 +78,51 @@ class Command(BaseCommand):
             material_file = files.get("material")
 
             if texture_file and object_file and material_file:
-                # If any of the files already exists, skip the creation of the model
-                # This avoids the upload of the same texture, object or material multiple times
-                if (
-                    os.path.exists(
-                        os.path.join(
-                            settings.MEDIA_ROOT, settings.MATERIALS_URL, texture_file
-                        )
+                # Store the files, which are saved once per distinct content, and skip
+                # the creation of the model if a model has the same contents
+                stored = {}
+                for kind, file_name in (
+                    ("texture", texture_file),
+                    ("object", object_file),
+                    ("material", material_file),
+                ):
+                    with open(os.path.join(model_folder, file_name), "rb") as source:
+                        stored[kind] = default_storage.save_blob(File(source))
+                if Model.objects.filter(
+                    **{f"{kind}_sha256": digest for kind, (digest, _) in stored.items()}
+                ).exists():
+                    logger.warning(
+                        f"Skipping creation of {base_name_id} model due to an existing model with the same files"
                     )
-                    or os.path.exists(
-                        os.path.join(
-                            settings.MEDIA_ROOT, settings.OBJECTS_URL, object_file
-                        )
+                    continue
+                if Model.objects.filter(pk=int(base_name_id)).exists():
+                    logger.warning(
+                        f"Model {base_name_id} already exists. Skipping its creation"
                     )
-                    or os.path.exists(
-                        os.path.join(
-                            settings.MEDIA_ROOT, settings.MATERIALS_URL, material_file
-                        )
+                    continue
+
+                # Create model object, linking the stored files next to each other
+                try:
+                    model = Model(
+                        id=int(base_name_id),
+                        **{
+                            f"{kind}_sha256": digest
+                            for kind, (digest, _) in stored.items()
+                        },
+                        **{f"{kind}_size": size for kind, (_, size) in stored.items()},
                     )
-                ):
+                    for kind, (digest, _) in stored.items():
+                        link_into(model, kind, digest, files[kind])
+                    model.save(force_insert=True)
+                    logger.info(
+                        f"Successfully imported {texture_file}, {object_file}, {material_file}"
+                    )
+                    process_model_assets(model)
+                except IntegrityError:
                     logger.warning(
-                        f"Skipping creation of {base_name_id} model due to the existing texture, object or material file"
+                        f"Model {base_name_id} already exists. Skipping its creation"
                     )
                     continue
-
-                texture_path = os.path.join(model_folder, texture_file)
-                object_path = os.path.join(model_folder, object_file)
-                material_path = os.path.join(model_folder, material_file)
-
-                with open(texture_path, "rb") as tex_file, open(
-                    object_path, "rb"
-                ) as obj_file, open(material_path, "rb") as mat_file:
-                    # Create model object and upload files
-                    try:
-                        Model.objects.create(
-                            id=int(base_name_id),
-                            texture=File(tex_file, name=os.path.basename(texture_path)),
-                            object=File(obj_file, name=os.path.basename(object_path)),
-                            material=File(
-                                mat_file, name=os.path.basename(material_path)
-                            ),
-                        )
-                        logger.info(
-                            f"Successfully imported {texture_file}, {object_file}, {material_file}"
-                        )
-                    except IntegrityError:
-                        logger.warning(
-                            f"Model {base_name_id} already exists. Skipping its creation"
-                        )
-                        continue
             else:
                 logger.warning(
                     f"Skipping creation of {base_name_id} model due to the missing object or corresponding material file"
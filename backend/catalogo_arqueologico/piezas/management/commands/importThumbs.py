@@ -2,6 +2,7 @@ from django.core.management.base import BaseCommand
 from django.db import IntegrityError
 from django.core.files import File
 from django.conf import settings
+from piezas.assets import process_image_assets
 from piezas.models import Thumbnail
 import os
 import logging
@@ -33,20 +34,18 @@ class Command(BaseCommand):
         thumb_files = os.listdir(thumb_folder)
         for thumb_name in thumb_files:
             artifactId = thumb_name.split(".")[0]
-            # If the file already exists, skip the creation of the model
-            # This avoids the upload of the same thumbnail multiple times
-            if os.path.exists(
-                os.path.join(settings.MEDIA_ROOT, settings.THUMBNAILS_URL, thumb_name)
-            ):
+            # If the thumbnail was already imported, skip the creation of the model
+            # Files with the same content are stored once anyway (see piezas.storage)
+            if Thumbnail.objects.filter(pk=int(artifactId)).exists():
                 logger.warning(
-                    f"Skipping creation of {artifactId} thumbnail model due to existing file"
+                    f"Skipping creation of {artifactId} thumbnail model, it already exists"
                 )
                 continue
 
             thumb_path = os.path.join(thumb_folder, thumb_name)
             with open(thumb_path, "rb") as thumbnail:
                 try:
-                    Thumbnail.objects.create(
+                    newThumbnail = Thumbnail.objects.create(
                         id=int(artifactId),
                         path=File(thumbnail, name=thumb_name),
                     )
@@ -56,3 +55,5 @@ class Command(BaseCommand):
                         f"Thumbnail {artifactId} already exists. Skipping its creation"
                     )
                     continue
+            # Resized variants for the catalog grid
+            process_image_assets(newThumbnail)
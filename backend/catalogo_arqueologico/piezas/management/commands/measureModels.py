@@ -0,0 +1,129 @@
+"""
+This module contains a Django management command that reads the statistics of every 3D
+model from its files.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connections
+from piezas.assets import MODEL_STATS_FIELDS, measure_model
+from piezas.cache import bump_shared_version
+from piezas.catalog import refresh_catalog_entries, touch_artifacts
+from piezas.models import Artifact, Model
+import logging
+import multiprocessing
+import os
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+def stats_or_error(model):
+    """
+    Reads the statistics of a model, catching the errors.
+
+    Args:
+        model (Model): The model.
+
+    Returns:
+        tuple: The values of the statistics fields, by name, or None, and the error, or
+            None.
+    """
+    try:
+        measure_model(model)
+    except Exception as e:
+        return None, e
+    return {field: getattr(model, field) for field in MODEL_STATS_FIELDS}, None
+
+
+class Command(BaseCommand):
+    """
+    This command reads the number of vertices and faces, bounding box, file sizes and
+    texture resolution of every 3D model from its files.
+
+    Statistics are normally read when models are uploaded or imported. This command
+    reads them for the existing models. Object files are scanned by a pool of
+    processes, one per CPU core by default.
+
+    Attributes:
+        help (str): A short description of the command that is displayed when running
+            'python manage.py help measureModels'.
+    """
+
+    help = "Read the geometry, file size and texture statistics of every 3D model."
+
+    def add_arguments(self, parser):
+        """
+        Adds the command line arguments of the command.
+
+        Args:
+            parser (ArgumentParser): The parser of the command line arguments.
+        """
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of models scanned at the same time.",
+        )
+        parser.add_argument(
+            "--missing",
+            action="store_true",
+            help="Only scan the models without statistics.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of rows updated per query.",
+        )
+
+    def handle(self, *args, **kwargs):
+        """
+        Executes the command to read the statistics, and refreshes the catalog entries
+        of the artifacts whose statistics changed.
+        """
+        workers = max(1, kwargs["workers"])
+        batch_size = kwargs["batch_size"]
+
+        models = Model.objects.order_by("id")
+        if kwargs["missing"]:
+            models = models.filter(vertex_count__isnull=True)
+        models = list(models)
+
+        changed = []
+        failed = 0
+        # Forked workers would share the database connections of this process
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("fork")
+        ) as executor:
+            for model, (stats, error) in zip(
+                models, executor.map(stats_or_error, models)
+            ):
+                if error is not None:
+                    logger.error(f"Could not measure model {model.pk}: {error}")
+                    failed += 1
+                    continue
+                if any(getattr(model, field) != stats[field] for field in stats):
+                    for field, value in stats.items():
+                        setattr(model, field, value)
+                    changed.append(model)
+
+        # Bulk updates do not send signals, so the catalog entries are refreshed below
+        Model.objects.bulk_update(changed, MODEL_STATS_FIELDS, batch_size=batch_size)
+
+        artifact_ids = list(
+            Artifact.objects.filter(id_model__in=[model.pk for model in changed])
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        for start in range(0, len(artifact_ids), batch_size):
+            batch = artifact_ids[start : start + batch_size]
+            touch_artifacts(batch)
+            refresh_catalog_entries(batch)
+        if artifact_ids:
+            bump_shared_version()
+        logger.info(
+            f"{len(models) - failed} models measured, {failed} could not be measured. "
+            f"{len(artifact_ids)} catalog entries were refreshed"
+        )
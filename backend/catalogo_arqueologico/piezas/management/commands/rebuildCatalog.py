@@ -0,0 +1,59 @@
+"""
+This module contains a Django management command that rebuilds the catalog entry of
+every artifact.
+"""
+
+from django.core.management.base import BaseCommand
+from piezas.cache import bump_shared_version
+from piezas.facets import facet_index
+from piezas.catalog import refresh_catalog_entries
+from piezas.models import Artifact
+import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+class Command(BaseCommand):
+    """
+    This command rebuilds the catalog entry of every artifact.
+
+    Entries are normally kept up to date by signals. This command builds them for the
+    existing artifacts after migrating, and repairs them after data was changed without
+    signals, e.g. with raw SQL, bulk updates or a fixture.
+
+    Attributes:
+        help (str): A short description of the command that is displayed when running
+            'python manage.py help rebuildCatalog'.
+    """
+
+    help = "Rebuild the catalog entry of every artifact from its related data."
+
+    def add_arguments(self, parser):
+        """
+        Adds the command line arguments of the command.
+
+        Args:
+            parser (ArgumentParser): The parser of the command line arguments.
+        """
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of artifacts rebuilt per transaction.",
+        )
+
+    def handle(self, *args, **kwargs):
+        """
+        Executes the command to rebuild the catalog entries, in batches of artifacts.
+        """
+        batch_size = kwargs["batch_size"]
+        artifact_ids = list(
+            Artifact.objects.order_by("id").values_list("id", flat=True)
+        )
+        rebuilt = 0
+        for start in range(0, len(artifact_ids), batch_size):
+            rebuilt += refresh_catalog_entries(artifact_ids[start : start + batch_size])
+        bump_shared_version()
+        facet_index.invalidate()
+        logger.info(f"{rebuilt} catalog entries were successfully rebuilt")
@@ -0,0 +1,319 @@
+"""
+This module contains a Django management command that moves the existing thumbnails,
+images and 3D model files to the sharded layout of the media folder.
+"""
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from piezas.cache import bump_version, is_shared
+from piezas.catalog import refresh_catalog_entries, touch_artifacts
+from piezas.models import Artifact, Image, Model, Thumbnail
+from piezas.storage import ShardedPath, shard_name
+import logging
+import os
+import posixpath
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+# Lookup from each model to the artifacts that show its files
+ARTIFACT_LOOKUPS = {Thumbnail: "id_thumbnail", Image: "images", Model: "id_model"}
+
+# Fields stored next to another field of the row (see `piezas.storage.ShardedPath`),
+# moved after it to its subfolders
+FOLLOWERS = {(Model, "texture"): "material"}
+
+# Suffixes of the precompressed copies, and of the markers of the copies that were not
+# kept, moved along with the files (see `piezas.assets`)
+SIDECAR_SUFFIXES = (".gz", ".br", ".gz.skip", ".br.skip")
+
+
+def sharded_fields():
+    """
+    Lists the file fields stored in the sharded layout.
+
+    Returns:
+        list: Tuples with the model, the name of the field and its folder.
+    """
+    return [
+        (model, field.name, field.upload_to.folder)
+        for model in ARTIFACT_LOOKUPS
+        for field in model._meta.get_fields()
+        if isinstance(getattr(field, "upload_to", None), ShardedPath)
+    ]
+
+
+def link_sharded(name, target, max_length):
+    """
+    Links a file under a new name, along with its precompressed copies and their
+    markers. The file keeps its old name until the rows are updated.
+
+    Args:
+        name (str): The storage name of the file.
+        target (str): The desired storage name, e.g. in the sharded layout.
+        max_length (int): The maximum length of the name.
+
+    Returns:
+        str: The new storage name, which is the desired one unless another file
+            already has it.
+    """
+    source = default_storage.path(name)
+    while True:
+        path = default_storage.path(target)
+        if os.path.exists(path) and os.path.samefile(path, source):
+            # Linked by a previous run that was interrupted
+            break
+        target = default_storage.get_available_name(target, max_length=max_length)
+        path = default_storage.path(target)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.link(source, path)
+        except FileExistsError:
+            # Another process took the name since it was found available
+            continue
+        break
+    for suffix in SIDECAR_SUFFIXES:
+        sidecar = f"{source}{suffix}"
+        if os.path.exists(sidecar):
+            # The copies are links to the same inode, so they keep their timestamp
+            temporary = f"{path}{suffix}.tmp"
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            os.link(sidecar, temporary)
+            os.replace(temporary, f"{path}{suffix}")
+    return target
+
+
+class Command(BaseCommand):
+    """
+    This command moves the existing thumbnails, images and 3D model files to the
+    sharded layout of the media folder (see `piezas.storage`), e.g. from
+    `thumbnails/vasija.png` to `thumbnails/3f/a9/vasija.png`.
+
+    The texture of a 3D model is moved next to its material, since the material
+    references it by a relative path. This also fixes the textures stored apart from
+    their material.
+
+    It can run while the site is online: each file is first linked under its new name,
+    then its rows are updated and the catalog entries refreshed, and only then is the
+    old name removed, so every name the site serves exists. Files are moved in batches,
+    each committed on its own, and files already in the sharded layout are skipped, so
+    it can be interrupted and run again.
+
+    When the catalog cache is private to each process (see `piezas.cache`), the server
+    does not see the new catalog version and keeps serving cached responses with the
+    old names, so they are kept, and removed by the collectMediaGarbage command once
+    its grace period is over.
+
+    Attributes:
+        help (str): A short description of the command that is displayed when running
+            'python manage.py help shardMedia'.
+    """
+
+    help = "Move the existing media files to the sharded layout of the media folder."
+
+    def add_arguments(self, parser):
+        """
+        Adds the command line arguments of the command.
+
+        Args:
+            parser (ArgumentParser): The parser of the command line arguments.
+        """
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of files moved per batch.",
+        )
+
+    def handle(self, *args, **kwargs):
+        """
+        Executes the command to move the files to the sharded layout.
+        """
+        batch_size = kwargs["batch_size"]
+        self.keep_old_names = not is_shared()
+
+        moved, failed = 0, 0
+        for model, field_name, folder in sharded_fields():
+            field = model._meta.get_field(field_name)
+            rows = model.objects.all()
+            if (model, field_name) in FOLLOWERS:
+                # The others are moved next to their sibling afterwards
+                rows = rows.filter(**{FOLLOWERS[model, field_name]: ""})
+            # Names are read in order, since the files that failed keep their name
+            sharded = rf"^{folder}[0-9a-f]{{2}}/[0-9a-f]{{2}}/[^/]+$"
+            names = (
+                rows.exclude(**{field_name: ""})
+                .exclude(**{f"{field_name}__regex": sharded})
+                .order_by(field_name)
+                .values_list(field_name, flat=True)
+                .distinct()
+            )
+            field_moved = 0
+            last_name = ""
+            while True:
+                batch = list(
+                    names.filter(**{f"{field_name}__gt": last_name})[:batch_size]
+                )
+                if not batch:
+                    break
+                last_name = batch[-1]
+
+                renamed = {}
+                for name in batch:
+                    try:
+                        renamed[name] = link_sharded(
+                            name,
+                            shard_name(folder, os.path.basename(name)),
+                            field.max_length,
+                        )
+                    except OSError as e:
+                        logger.error(f"Could not move {name}: {e}")
+                        failed += 1
+                if not renamed:
+                    continue
+
+                with transaction.atomic():
+                    now = timezone.now()
+                    for name, new_name in renamed.items():
+                        model.objects.filter(**{field_name: name}).update(
+                            **{field_name: new_name, "updated_at": now}
+                        )
+                lookup = f"{ARTIFACT_LOOKUPS[model]}__{field_name}__in"
+                artifact_ids = list(
+                    Artifact.objects.filter(**{lookup: list(renamed.values())})
+                    .order_by("id")
+                    .values_list("id", flat=True)
+                    .distinct()
+                )
+                self.refresh(artifact_ids)
+
+                self.remove_old_names(renamed)
+                field_moved += len(renamed)
+                logger.info(
+                    f"{model.__name__}.{field_name}: {field_moved} files moved so far"
+                )
+            moved += field_moved
+
+        for (model, field_name), sibling in FOLLOWERS.items():
+            count, errors = self.move_next_to(model, field_name, sibling, batch_size)
+            moved += count
+            failed += errors
+
+        logger.info(f"{moved} files moved to the sharded layout, {failed} could not")
+        if self.keep_old_names and moved:
+            logger.warning(
+                "The catalog cache is private to each process, so the server may serve "
+                f"the old names for up to {settings.CATALOG_CACHE_TIMEOUT} seconds. They "
+                "were kept, and collectMediaGarbage removes them after its grace period"
+            )
+
+    def move_next_to(self, model, field_name, sibling, batch_size):
+        """
+        Moves the files of a field next to the files of a sibling field of the same
+        row, e.g. the textures of the 3D models next to their materials.
+
+        A file shared by several rows is linked next to the sibling of each of them.
+
+        Args:
+            model (type): The model class.
+            field_name (str): The name of the field whose files are moved.
+            sibling (str): The name of the field they are moved next to.
+            batch_size (int): The number of rows processed per batch.
+
+        Returns:
+            tuple: The number of moved files, and of files that could not be moved.
+        """
+        field = model._meta.get_field(field_name)
+        moved, failed = 0, 0
+        last_id = 0
+        while True:
+            rows = list(
+                model.objects.filter(id__gt=last_id)
+                .exclude(**{field_name: ""})
+                .exclude(**{sibling: ""})
+                .order_by("id")
+                .values_list("id", field_name, sibling)[:batch_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            renamed = {}
+            new_names = {}
+            for pk, name, sibling_name in rows:
+                folder = posixpath.dirname(sibling_name)
+                if posixpath.dirname(name) == folder:
+                    continue
+                target = f"{folder}/{posixpath.basename(name)}"
+                try:
+                    new_names[pk] = link_sharded(name, target, field.max_length)
+                except OSError as e:
+                    logger.error(f"Could not move {name}: {e}")
+                    failed += 1
+                    continue
+                renamed[name] = new_names[pk]
+            if not new_names:
+                continue
+
+            with transaction.atomic():
+                now = timezone.now()
+                for pk, new_name in new_names.items():
+                    model.objects.filter(pk=pk).update(
+                        **{field_name: new_name, "updated_at": now}
+                    )
+            lookup = f"{ARTIFACT_LOOKUPS[model]}__in"
+            artifact_ids = list(
+                Artifact.objects.filter(**{lookup: list(new_names)})
+                .order_by("id")
+                .values_list("id", flat=True)
+                .distinct()
+            )
+            self.refresh(artifact_ids)
+
+            self.remove_old_names(renamed)
+            moved += len(new_names)
+            logger.info(
+                f"{model.__name__}.{field_name}: {moved} files moved next to their "
+                f"{sibling} so far"
+            )
+        return moved, failed
+
+    def refresh(self, artifact_ids):
+        """
+        Refreshes the catalog entries of the artifacts whose files were moved. Updates
+        do not send signals, so the entries are refreshed here.
+
+        Args:
+            artifact_ids (list): The ids of the artifacts.
+        """
+        touch_artifacts(artifact_ids)
+        refresh_catalog_entries(artifact_ids)
+        bump_version()
+
+    def remove_old_names(self, renamed):
+        """
+        Removes the old names of the moved files, of their precompressed copies and of
+        their markers, unless a row still references them or the server may still serve
+        them from its cache.
+
+        Args:
+            renamed (dict): The new storage name of each moved file, by old name.
+        """
+        if self.keep_old_names:
+            return
+        referenced = set()
+        for model, field_name, _ in sharded_fields():
+            rows = model.objects.filter(**{f"{field_name}__in": list(renamed)})
+            referenced.update(rows.values_list(field_name, flat=True))
+        for name in renamed:
+            if name in referenced:
+                continue
+            for suffix in ("", *SIDECAR_SUFFIXES):
+                try:
+                    os.remove(default_storage.path(f"{name}{suffix}"))
+                except FileNotFoundError:
+                    pass
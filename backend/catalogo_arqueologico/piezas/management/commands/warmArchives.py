@@ -0,0 +1,60 @@
+"""
+This module contains a Django management command that builds the cached download archive
+of the artifacts.
+"""
+
+from django.core.management.base import BaseCommand
+from piezas.archives import cached_archive
+from piezas.models import Artifact
+import logging
+
+logger = logging.getLogger(__name__)
+logger.setLevel("INFO")
+
+
+class Command(BaseCommand):
+    """
+    This command builds the cached download archive of the artifacts, so their first
+    download does not have to wait for it.
+
+    Attributes:
+        help (str): A short description of the command that is displayed when running
+            'python manage.py help warmArchives'.
+    """
+
+    help = (
+        "Build the cached download archive of the given artifacts, or of every artifact "
+        "if no ids are given."
+    )
+
+    def add_arguments(self, parser):
+        """
+        Adds the command line arguments of the command.
+
+        Args:
+            parser (ArgumentParser): The parser of the command line arguments.
+        """
+        parser.add_argument("ids", nargs="*", type=int, help="Ids of the artifacts.")
+
+    def handle(self, *args, **kwargs):
+        """
+        Executes the command to build the archives.
+        """
+        artifacts = (
+            Artifact.objects.select_related("id_thumbnail", "id_model")
+            .prefetch_related("images")
+            .exclude(id_model=None)
+            .order_by("id")
+        )
+        if kwargs["ids"]:
+            artifacts = artifacts.filter(pk__in=kwargs["ids"])
+
+        built, failed = 0, 0
+        for artifact in artifacts.iterator(chunk_size=100):
+            try:
+                cached_archive(artifact)
+                built += 1
+            except OSError as e:
+                logger.error(f"Could not build archive of artifact {artifact.id}: {e}")
+                failed += 1
+        logger.info(f"{built} archives are ready, {failed} could not be built")
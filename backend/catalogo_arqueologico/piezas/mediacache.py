@@ -0,0 +1,398 @@
+"""
+This module provides the helpers shared by the files generated and cached under
+MEDIA_ROOT, like the download archives and the image variants.
+
+Cached files are built once: concurrent requests for a missing file wait on a lock file
+while the first one builds it, and then reuse it. Files are written to a temporary file
+and moved into place, so a partially written file is never served. The lock file is
+removed by its holder once the file is built or discarded; processes that were waiting
+on it notice it was replaced and lock the new one, so two processes never hold the lock
+of the same file.
+
+Caches with a size cap, like the resized images, are evicted in least recently used
+order with `evict`: every use of a cached file marks it with `touch`, which updates its
+modification time, and the files used the longest time ago are removed first.
+
+Files under MEDIA_ROOT are downloaded with `send_file`. When DOWNLOAD_ACCEL_REDIRECT is
+enabled, Django only authorizes the download and nginx sends the file, with sendfile and
+Range support, through the internal PROTECTED_MEDIA_URL location. Otherwise Django
+answers single byte ranges itself with `206 Partial Content`, reading only the requested
+bytes, so interrupted downloads are resumed instead of restarted. The ETag and
+Last-Modified validators let clients check with `If-Range` that the file did not change
+since they started.
+
+Functions:
+- write_file: Writes a file atomically.
+- locked: Holds the lock of a cached file, and removes it afterwards.
+- build_once: Builds a cached file unless it already exists.
+- discard: Removes a cached file, if it exists.
+- touch: Marks a cached file as recently used.
+- evict: Removes the least recently used files of a cache folder above a size cap.
+- parse_range: Parses the byte range asked by a Range header.
+- read_range: Generates a part of a file, chunk by chunk.
+- send_file: Builds the response that downloads a file from MEDIA_ROOT.
+"""
+
+import fcntl
+import logging
+import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+from urllib.parse import quote
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import http_date, quote_etag
+
+logger = logging.getLogger(__name__)
+
+# Size of the chunks read from disk when sending a byte range
+CHUNK_SIZE = 64 * 1024
+
+# Share of the size cap a cache folder is reduced to when it is exceeded, so eviction
+# does not run again on the next new file
+EVICTION_TARGET = 0.9
+
+RANGE_PATTERN = re.compile(r"\s*bytes\s*=\s*(\d*)\s*-\s*(\d*)\s*")
+
+
+def write_file(path, chunks):
+    """
+    Writes a file atomically, through a temporary file in the same folder.
+
+    Args:
+        path (str): The path of the file. Missing folders are created.
+        chunks (iterable): The content of the file, as bytes.
+
+    Returns:
+        str: The path of the file.
+    """
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as target:
+            for chunk in chunks:
+                target.write(chunk)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+    return path
+
+
+def _open_lock(lock_path, blocking=True):
+    """
+    Opens and locks a lock file, making sure it was not removed meanwhile by its
+    previous holder.
+
+    Args:
+        lock_path (str): The path of the lock file.
+        blocking (bool): Whether to wait for the lock.
+
+    Returns:
+        file: The locked file, or None if it is held by another process and
+            `blocking` is False.
+    """
+    flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+    while True:
+        lock = open(lock_path, "a")
+        try:
+            fcntl.flock(lock, flags)
+        except BlockingIOError:
+            lock.close()
+            return None
+        try:
+            current = os.stat(lock_path)
+        except FileNotFoundError:
+            current = None
+        if current is not None and os.path.samestat(current, os.fstat(lock.fileno())):
+            return lock
+        # Removed, and maybe created again, while this process was waiting
+        lock.close()
+
+
+@contextmanager
+def locked(path):
+    """
+    Holds the lock of a cached file, and removes the lock file before releasing it.
+
+    Args:
+        path (str): The path of the cached file.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lock_path = f"{path}.lock"
+    lock = _open_lock(lock_path)
+    try:
+        yield
+    finally:
+        os.remove(lock_path)
+        lock.close()
+
+
+def build_once(path, build):
+    """
+    Builds a cached file unless it already exists.
+
+    Args:
+        path (str): The path of the cached file.
+        build (function): Returns the content of the file as an iterable of bytes.
+
+    Returns:
+        str: The path of the cached file.
+    """
+    if os.path.exists(path):
+        return path
+
+    with locked(path):
+        # Another process may have built it while this one was waiting
+        if os.path.exists(path):
+            return path
+        write_file(path, build())
+        logger.info(f"Cached file built: {path}")
+    return path
+
+
+def discard(path):
+    """
+    Removes a cached file, if it exists. A build of the same file in progress is
+    waited for, so it is not left in place once the build ends.
+
+    Args:
+        path (str): The path of the cached file.
+
+    Returns:
+        bool: True if the file was removed.
+    """
+    with locked(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+    logger.info(f"Cached file removed: {path}")
+    return True
+
+
+def touch(path):
+    """
+    Marks a cached file as recently used, for the least recently used eviction.
+
+    Args:
+        path (str): The path of the cached file.
+    """
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+def evict(folder, max_bytes, interval=0):
+    """
+    Removes the least recently used files of a cache folder if they exceed a size cap.
+
+    Only one process evicts a folder at a time; others skip eviction while it runs.
+    Lock files no process holds, left by interrupted builds, are removed as well.
+
+    Scanning the folder takes longer the more files it has, so it can be limited to
+    once every `interval` seconds, shared by every process through the modification
+    time of the eviction lock file. The cache may then exceed its cap by the files
+    added meanwhile.
+
+    Args:
+        folder (str): The cache folder.
+        max_bytes (int): The maximum total size of the files, in bytes.
+        interval (float): Minimum number of seconds between two scans of the folder.
+
+    Returns:
+        int: The number of removed files.
+    """
+    os.makedirs(folder, exist_ok=True)
+    lock_path = os.path.join(folder, ".evict.lock")
+    if interval:
+        try:
+            if time.time() - os.stat(lock_path).st_mtime < interval:
+                return 0
+        except FileNotFoundError:
+            pass
+    with open(lock_path, "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return 0
+        try:
+            # Marks the time of the last scan
+            os.utime(lock_path)
+            files = []
+            locks = []
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.name.startswith("."):
+                        continue
+                    if entry.name.endswith(".lock"):
+                        locks.append(entry.path)
+                    elif entry.is_file() and not entry.name.endswith(".tmp"):
+                        stat = entry.stat()
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+            for lock_path in locks:
+                stale = _open_lock(lock_path, blocking=False)
+                if stale is not None:
+                    os.remove(lock_path)
+                    stale.close()
+            total = sum(size for _, size, _ in files)
+            if total <= max_bytes:
+                return 0
+
+            removed = 0
+            for _, size, path in sorted(files):
+                if total <= max_bytes * EVICTION_TARGET:
+                    break
+                if discard(path):
+                    removed += 1
+                total -= size
+            logger.info(f"{removed} cached files evicted from {folder}")
+            return removed
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def parse_range(header, size):
+    """
+    Parses the byte range asked by a Range header.
+
+    Only single ranges are supported. Multiple or malformed ranges are ignored, which
+    RFC 9110 allows, and the whole file is sent instead.
+
+    Args:
+        header (str): The value of the Range header.
+        size (int): The size of the file, in bytes.
+
+    Returns:
+        tuple: The first and last byte of the range, both included, or None if the
+            header is ignored.
+
+    Raises:
+        ValueError: If the range is outside of the file.
+    """
+    match = RANGE_PATTERN.fullmatch(header)
+    if match is None or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last bytes of the file
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError(f"Unsatisfiable range: {header}")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError(f"Unsatisfiable range: {header}")
+    end = min(int(last), size - 1) if last else size - 1
+    return start, end
+
+
+def read_range(source, start, length, chunk_size=CHUNK_SIZE):
+    """
+    Generates a part of a file, chunk by chunk, and closes it.
+
+    Args:
+        source (file): The file, opened in binary mode.
+        start (int): The position of the first byte.
+        length (int): The number of bytes to read.
+        chunk_size (int): Number of bytes read at a time.
+
+    Yields:
+        bytes: The next chunk of the part.
+    """
+    try:
+        source.seek(start)
+        while length > 0:
+            chunk = source.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        source.close()
+
+
+def send_file(
+    path,
+    filename,
+    content_type="application/octet-stream",
+    request=None,
+    as_attachment=True,
+):
+    """
+    Builds the response that downloads a file from MEDIA_ROOT.
+
+    Args:
+        path (str): The path of the file, inside MEDIA_ROOT.
+        filename (str): The name the file is saved as by the client.
+        content_type (str): The media type of the file.
+        request: The HTTP request, whose Range and If-Range headers are honored.
+        as_attachment (bool): Whether the client saves the file, or shows it inline.
+
+    Returns:
+        HttpResponse: An empty response redirecting nginx to the file when
+            DOWNLOAD_ACCEL_REDIRECT is enabled, or a response streaming the file or
+            the requested part of it.
+    """
+    disposition = "attachment" if as_attachment else "inline"
+    disposition = f'{disposition}; filename="{filename}"'
+    if settings.DOWNLOAD_ACCEL_REDIRECT:
+        relative = os.path.relpath(path, settings.MEDIA_ROOT)
+        if relative.startswith(os.pardir):
+            raise ValueError(f"{path} is not inside MEDIA_ROOT")
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = quote(
+            f"{settings.PROTECTED_MEDIA_URL}{relative.replace(os.sep, '/')}"
+        )
+        response["Content-Disposition"] = disposition
+        return response
+
+    # The file is opened first, so the validators describe the file that is sent even
+    # if it is replaced meanwhile
+    source = open(path, "rb")
+    stat = os.fstat(source.fileno())
+    size = stat.st_size
+    etag = quote_etag(f"{size:x}-{stat.st_mtime_ns:x}")
+    last_modified = http_date(stat.st_mtime)
+
+    byte_range = None
+    header = request.META.get("HTTP_RANGE") if request is not None else None
+    if_range = request.META.get("HTTP_IF_RANGE") if request is not None else None
+    # A range of an outdated version of the file is useless to the client
+    if header and (if_range is None or if_range.strip() in (etag, last_modified)):
+        try:
+            byte_range = parse_range(header, size)
+        except ValueError:
+            source.close()
+            response = HttpResponse(status=416, content_type=content_type)
+            response["Content-Range"] = f"bytes */{size}"
+            response["Accept-Ranges"] = "bytes"
+            return response
+
+    if byte_range is None:
+        response = FileResponse(
+            source,
+            as_attachment=as_attachment,
+            filename=filename,
+            content_type=content_type,
+        )
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            read_range(source, start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = str(end - start + 1)
+        response["Content-Disposition"] = disposition
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = last_modified
+    return response
@@ -0,0 +1,418 @@
+"""
+This module reads the 3D models of the artifacts, stored as Wavefront OBJ and MTL files.
+
+OBJ files index positions, texture coordinates and normals separately for every face
+corner. `parse_obj` turns them into a single indexed triangle mesh, as used by GPUs and
+glTF: every distinct combination of position, texture coordinate and normal becomes one
+vertex, and polygons are split into triangles. Texture coordinates are flipped to the
+top-left origin of glTF, and smooth normals are computed for models without them.
+
+`simplify` builds lighter versions of a mesh (levels of detail) by vertex clustering:
+the bounding box is split into a grid of cells, the vertices of each cell are merged
+into one, and the triangles that collapse are dropped. Vertices on both sides of a
+texture seam are kept apart, so the texture is not smeared. The grid resolution is
+searched to get as close as possible to a triangle budget without exceeding it.
+
+`scan_obj` only counts the vertices and faces of an OBJ file and measures its bounding
+box, without building the mesh. It reads the file in large blocks and matches them with
+regular expressions, so it runs in about the time it takes to read the file.
+
+Classes:
+- Mesh: Indexed triangle mesh, with its triangles grouped by material.
+
+Functions:
+- parse_obj: Reads an OBJ file into a Mesh.
+- parse_mtl: Reads the materials of an MTL file.
+- compute_normals: Computes smooth vertex normals of a mesh.
+- simplify: Builds a version of a mesh with at most the given number of triangles.
+- scan_obj: Counts the vertices and faces of an OBJ file and measures its bounding box.
+"""
+
+import re
+import numpy as np
+
+# Maximum number of grid cells per axis when simplifying, so the cell coordinates of a
+# vertex fit in 12 bits each
+MAX_RESOLUTION = 4096
+
+# Number of grid resolutions tried to meet a triangle budget
+SEARCH_STEPS = 12
+
+# Size of the blocks read when scanning an OBJ file
+SCAN_BLOCK_SIZE = 4 * 1024 * 1024
+
+# Vertex and face lines of an OBJ file
+VERTEX_PATTERN = re.compile(rb"^v[ \t]+(\S+)[ \t]+(\S+)[ \t]+(\S+)", re.MULTILINE)
+FACE_PATTERN = re.compile(rb"^f[ \t]", re.MULTILINE)
+
+
+class Mesh:
+    """
+    Indexed triangle mesh, with its triangles grouped by material.
+
+    Attributes:
+        positions (numpy.ndarray): Float32 array of shape (N, 3) with the vertex
+            positions.
+        normals (numpy.ndarray): Float32 array of shape (N, 3) with the unit normals.
+        uvs (numpy.ndarray): Float32 array of shape (N, 2) with the texture
+            coordinates, or None if the model has none.
+        groups (list): Tuples with the name of each material, or None, and a uint32
+            array with the vertex indices of its triangles.
+    """
+
+    def __init__(self, positions, normals, uvs, groups):
+        self.positions = positions
+        self.normals = normals
+        self.uvs = uvs
+        self.groups = groups
+
+    @property
+    def vertex_count(self):
+        """
+        int: The number of vertices.
+        """
+        return len(self.positions)
+
+    @property
+    def triangle_count(self):
+        """
+        int: The number of triangles.
+        """
+        return sum(len(indices) for _, indices in self.groups) // 3
+
+
+def _index(token, count):
+    """
+    Converts an OBJ index, 1-based or negative (relative to the end), to 0-based.
+
+    Args:
+        token (str): The index, possibly empty.
+        count (int): The number of elements read so far.
+
+    Returns:
+        int: The 0-based index, or -1 if the token is empty.
+    """
+    if not token:
+        return -1
+    index = int(token)
+    return index - 1 if index > 0 else count + index
+
+
+def parse_obj(path):
+    """
+    Reads an OBJ file into an indexed triangle mesh.
+
+    Only the geometry used for display is read: positions, texture coordinates,
+    normals, faces and the material of each face. Lines, points, curves and smoothing
+    groups are ignored.
+
+    Args:
+        path (str): The path of the OBJ file.
+
+    Returns:
+        Mesh: The mesh.
+
+    Raises:
+        ValueError: If the file has no faces or references missing elements.
+    """
+    positions, uvs, normals = [], [], []
+    corners = []
+    materials = []
+    material = None
+    with open(path, "r", encoding="utf-8", errors="replace") as source:
+        for line in source:
+            if line.startswith("v "):
+                positions.append(line.split()[1:4])
+            elif line.startswith("vt "):
+                uvs.append(line.split()[1:3])
+            elif line.startswith("vn "):
+                normals.append(line.split()[1:4])
+            elif line.startswith("f "):
+                face = []
+                for vertex in line.split()[1:]:
+                    parts = (vertex.split("/") + ["", ""])[:3]
+                    face.append(
+                        (
+                            _index(parts[0], len(positions)),
+                            _index(parts[1], len(uvs)),
+                            _index(parts[2], len(normals)),
+                        )
+                    )
+                # Polygons are split into a fan of triangles
+                for i in range(1, len(face) - 1):
+                    corners.extend((face[0], face[i], face[i + 1]))
+                    materials.append(material)
+            elif line.startswith("usemtl "):
+                material = line[len("usemtl ") :].strip() or None
+
+    if not corners:
+        raise ValueError(f"{path} has no faces")
+
+    corners = np.asarray(corners, dtype=np.int64)
+    positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+    uvs = np.asarray(uvs, dtype=np.float32).reshape(-1, 2)
+    normals = np.asarray(normals, dtype=np.float32).reshape(-1, 3)
+    # Texture coordinates and normals are only used if every corner has them
+    if len(uvs) == 0 or (corners[:, 1] < 0).any():
+        corners[:, 1] = -1
+    if len(normals) == 0 or (corners[:, 2] < 0).any():
+        corners[:, 2] = -1
+    for column, elements in enumerate((positions, uvs, normals)):
+        if (corners[:, column] >= len(elements)).any() or (
+            column == 0 and (corners[:, 0] < 0).any()
+        ):
+            raise ValueError(f"{path} references missing vertices")
+
+    # Every distinct position, texture coordinate and normal combination is a vertex
+    unique, inverse = np.unique(corners, axis=0, return_inverse=True)
+    indices = inverse.reshape(-1).astype(np.uint32)
+
+    mesh_positions = positions[unique[:, 0]]
+    mesh_uvs = None
+    if unique[0, 1] >= 0:
+        mesh_uvs = uvs[unique[:, 1]]
+        # OBJ puts the origin of the texture at the bottom left, glTF at the top left
+        mesh_uvs[:, 1] = 1.0 - mesh_uvs[:, 1]
+    triangles = indices.reshape(-1, 3)
+    if unique[0, 2] >= 0:
+        mesh_normals = normals[unique[:, 2]]
+        lengths = np.linalg.norm(mesh_normals, axis=1, keepdims=True)
+        mesh_normals = mesh_normals / np.where(lengths > 0, lengths, 1)
+    else:
+        mesh_normals = compute_normals(mesh_positions, triangles)
+
+    groups = []
+    names = np.asarray([name or "" for name in materials])
+    for name in dict.fromkeys(materials):
+        selected = triangles[names == (name or "")]
+        groups.append((name, selected.reshape(-1)))
+
+    return Mesh(
+        mesh_positions.astype(np.float32),
+        mesh_normals.astype(np.float32),
+        mesh_uvs,
+        groups,
+    )
+
+
+def parse_mtl(path):
+    """
+    Reads the materials of an MTL file.
+
+    Args:
+        path (str): The path of the MTL file.
+
+    Returns:
+        dict: The diffuse color (`Kd`), opacity (`d`) and diffuse texture name
+            (`map_Kd`) of each material, by name.
+    """
+    materials = {}
+    current = None
+    with open(path, "r", encoding="utf-8", errors="replace") as source:
+        for line in source:
+            parts = line.split()
+            if not parts:
+                continue
+            if parts[0] == "newmtl":
+                current = materials.setdefault(
+                    " ".join(parts[1:]), {"Kd": (1.0, 1.0, 1.0), "d": 1.0}
+                )
+            elif current is None:
+                continue
+            elif parts[0] == "Kd" and len(parts) >= 4:
+                current["Kd"] = tuple(float(value) for value in parts[1:4])
+            elif parts[0] == "d" and len(parts) >= 2:
+                current["d"] = float(parts[1])
+            elif parts[0] == "Tr" and len(parts) >= 2:
+                current["d"] = 1.0 - float(parts[1])
+            elif parts[0] == "map_Kd" and len(parts) >= 2:
+                # Options like -s or -o may come before the name, which is last
+                current["map_Kd"] = parts[-1]
+    return materials
+
+
+def compute_normals(positions, triangles):
+    """
+    Computes smooth vertex normals, averaging the normals of the adjacent triangles
+    weighted by their area.
+
+    Args:
+        positions (numpy.ndarray): Array of shape (N, 3) with the vertex positions.
+        triangles (numpy.ndarray): Array of shape (M, 3) with the vertex indices of
+            each triangle.
+
+    Returns:
+        numpy.ndarray: Float32 array of shape (N, 3) with the unit normals.
+    """
+    corners = positions[triangles]
+    face_normals = np.cross(
+        corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]
+    )
+    normals = np.zeros(positions.shape, dtype=np.float64)
+    for corner in range(3):
+        np.add.at(normals, triangles[:, corner], face_normals)
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    normals = np.where(lengths > 0, normals / np.where(lengths > 0, lengths, 1), 0)
+    # Vertices of degenerate triangles only get an arbitrary normal
+    normals[lengths[:, 0] == 0] = (0.0, 0.0, 1.0)
+    return normals.astype(np.float32)
+
+
+def _cluster(mesh, resolution):
+    """
+    Merges the vertices of a mesh that fall in the same cell of a grid.
+
+    Args:
+        mesh (Mesh): The mesh.
+        resolution (int): The number of cells along the longest side of the bounding
+            box, at most MAX_RESOLUTION.
+
+    Returns:
+        Mesh: The simplified mesh, without normals.
+    """
+    low = mesh.positions.min(axis=0)
+    extent = float((mesh.positions.max(axis=0) - low).max()) or 1.0
+    cells = np.floor((mesh.positions - low) / extent * resolution).astype(np.int64)
+    cells = np.clip(cells, 0, resolution - 1)
+    keys = (cells[:, 0] << 24) | (cells[:, 1] << 12) | cells[:, 2]
+    if mesh.uvs is not None:
+        # Texture coordinates are clustered too, which keeps texture seams apart
+        uv_cells = np.clip(
+            np.floor(mesh.uvs * resolution).astype(np.int64), 0, resolution - 1
+        )
+        keys = (keys << 24) | (uv_cells[:, 0] << 12) | uv_cells[:, 1]
+    _, clusters = np.unique(keys, return_inverse=True)
+    clusters = clusters.reshape(-1)
+
+    groups = []
+    for name, indices in mesh.groups:
+        triangles = clusters[indices.reshape(-1, 3)]
+        triangles = triangles[
+            (triangles[:, 0] != triangles[:, 1])
+            & (triangles[:, 1] != triangles[:, 2])
+            & (triangles[:, 0] != triangles[:, 2])
+        ]
+        # Triangles merged into the same three vertices are kept once
+        _, first = np.unique(np.sort(triangles, axis=1), axis=0, return_index=True)
+        groups.append((name, triangles[np.sort(first)]))
+
+    # Every vertex is placed at the average of the vertices merged into it, and the
+    # vertices left without triangles are dropped
+    used = np.unique(np.concatenate([triangles.reshape(-1) for _, triangles in groups]))
+    remap = np.full(clusters.max() + 1, -1, dtype=np.int64)
+    remap[used] = np.arange(len(used))
+    counts = np.bincount(clusters)[used]
+
+    def average(values):
+        return np.stack(
+            [
+                np.bincount(clusters, weights=values[:, axis])[used] / counts
+                for axis in range(values.shape[1])
+            ],
+            axis=1,
+        ).astype(np.float32)
+
+    return Mesh(
+        average(mesh.positions),
+        None,
+        average(mesh.uvs) if mesh.uvs is not None else None,
+        [
+            (name, remap[triangles].reshape(-1).astype(np.uint32))
+            for name, triangles in groups
+            if len(triangles)
+        ],
+    )
+
+
+def simplify(mesh, max_triangles):
+    """
+    Builds a version of a mesh with at most the given number of triangles, by vertex
+    clustering.
+
+    Args:
+        mesh (Mesh): The mesh.
+        max_triangles (int): The triangle budget.
+
+    Returns:
+        Mesh: The simplified mesh, or None if the budget can not be met.
+    """
+    if mesh.triangle_count <= max_triangles:
+        return mesh
+    # Finer grids keep more triangles, so the finest grid within the budget is found
+    # by bisection
+    best = None
+    low, high = 1, MAX_RESOLUTION
+    for _ in range(SEARCH_STEPS):
+        if low > high:
+            break
+        resolution = (low + high) // 2
+        candidate = _cluster(mesh, resolution)
+        if candidate.triangle_count > max_triangles:
+            high = resolution - 1
+        else:
+            if candidate.triangle_count > 0:
+                best = candidate
+            low = resolution + 1
+    if best is None:
+        return None
+    best.normals = compute_normals(
+        best.positions,
+        np.concatenate([indices for _, indices in best.groups]).reshape(-1, 3),
+    )
+    return best
+
+
+def _blocks(path):
+    """
+    Reads a file in blocks of whole lines.
+
+    Args:
+        path (str): The path of the file.
+
+    Yields:
+        bytes: The next lines of the file.
+    """
+    rest = b""
+    with open(path, "rb") as source:
+        for block in iter(lambda: source.read(SCAN_BLOCK_SIZE), b""):
+            block = rest + block
+            end = block.rfind(b"\n") + 1
+            rest = block[end:]
+            yield block[:end]
+    yield rest
+
+
+def scan_obj(path):
+    """
+    Counts the vertices and faces of an OBJ file and measures its bounding box, without
+    building the mesh.
+
+    Args:
+        path (str): The path of the OBJ file.
+
+    Returns:
+        dict: The number of vertices (`vertices`) and faces (`faces`), and the minimum
+            (`min`) and maximum (`max`) coordinates of the vertices, or None if the file
+            has no vertices.
+
+    Raises:
+        ValueError: If a vertex has invalid coordinates.
+    """
+    vertices, faces = 0, 0
+    low, high = None, None
+    for block in _blocks(path):
+        faces += len(FACE_PATTERN.findall(block))
+        coordinates = VERTEX_PATTERN.findall(block)
+        if not coordinates:
+            continue
+        vertices += len(coordinates)
+        coordinates = np.array(coordinates, dtype=np.float64)
+        block_low, block_high = coordinates.min(axis=0), coordinates.max(axis=0)
+        low = block_low if low is None else np.minimum(low, block_low)
+        high = block_high if high is None else np.maximum(high, block_high)
+    return {
+        "vertices": vertices,
+        "faces": faces,
+        "min": low.tolist() if low is not None else None,
+        "max": high.tolist() if high is not None else None,
+    }
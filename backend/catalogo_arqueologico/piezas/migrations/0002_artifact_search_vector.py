@@ -0,0 +1,59 @@
+# Generated by Django 4.2.13 on 2026-10-18 06:35
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import UnaccentExtension
+from django.db import migrations
+
+
+# Spanish stemming applied after removing accents, so "cerámica" matches "ceramica".
+# The simple configuration is used to match the word being typed as a plain prefix
+CREATE_SEARCH_CONFIG = """
+CREATE TEXT SEARCH CONFIGURATION spanish_unaccent (COPY = spanish);
+ALTER TEXT SEARCH CONFIGURATION spanish_unaccent
+    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+CREATE TEXT SEARCH CONFIGURATION simple_unaccent (COPY = simple);
+ALTER TEXT SEARCH CONFIGURATION simple_unaccent
+    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple;
+"""
+
+DROP_SEARCH_CONFIG = """
+DROP TEXT SEARCH CONFIGURATION IF EXISTS spanish_unaccent;
+DROP TEXT SEARCH CONFIGURATION IF EXISTS simple_unaccent;
+"""
+
+# Same vector as piezas.search.search_vector_expression
+BACKFILL_SEARCH_VECTOR = """
+UPDATE piezas_artifact AS a SET search_vector =
+    setweight(to_tsvector('spanish_unaccent', coalesce(a.description, '')), 'A')
+    || setweight(to_tsvector('spanish_unaccent', coalesce(
+        (SELECT s.name FROM piezas_shape s WHERE s.id = a.id_shape_id), '')), 'B')
+    || setweight(to_tsvector('spanish_unaccent', coalesce(
+        (SELECT c.name FROM piezas_culture c WHERE c.id = a.id_culture_id), '')), 'B')
+    || setweight(to_tsvector('spanish_unaccent', coalesce(
+        (SELECT string_agg(t.name, ' ') FROM piezas_tag t
+         JOIN piezas_artifact_id_tags at ON at.tag_id = t.id
+         WHERE at.artifact_id = a.id), '')), 'C');
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('piezas', '0001_initial'),
+    ]
+
+    operations = [
+        UnaccentExtension(),
+        migrations.RunSQL(CREATE_SEARCH_CONFIG, DROP_SEARCH_CONFIG),
+        migrations.AddField(
+            model_name='artifact',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='artifact',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='artifact_search_idx'),
+        ),
+        migrations.RunSQL(BACKFILL_SEARCH_VECTOR, migrations.RunSQL.noop),
+    ]
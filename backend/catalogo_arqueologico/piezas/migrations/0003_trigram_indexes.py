@@ -0,0 +1,32 @@
+# Generated by Django 4.2.13 on 2026-10-18 06:40
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('piezas', '0002_artifact_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='artifact',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['description'], name='artifact_description_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='culture',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='culture_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='shape',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='shape_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='tag_name_trgm_idx', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.13 on 2026-10-18 06:45
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+# Same array as piezas.search.update_tag_ids
+BACKFILL_TAG_IDS = """
+UPDATE piezas_artifact AS a SET tag_ids = coalesce(
+    (SELECT array_agg(at.tag_id ORDER BY at.tag_id) FROM piezas_artifact_id_tags at
+     WHERE at.artifact_id = a.id), '{}');
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('piezas', '0003_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artifact',
+            name='tag_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.AddIndex(
+            model_name='artifact',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tag_ids'], name='artifact_tag_ids_idx'),
+        ),
+        migrations.RunSQL(BACKFILL_TAG_IDS, migrations.RunSQL.noop),
+    ]
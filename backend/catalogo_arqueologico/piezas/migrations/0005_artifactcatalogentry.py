@@ -0,0 +1,50 @@
+# Generated by Django 4.2.13 on 2026-10-18 06:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Same entries as piezas.catalog.build_catalog_entry
+BACKFILL_CATALOG_ENTRIES = """
+INSERT INTO piezas_artifactcatalogentry (artifact_id, attributes, thumbnail, model, images)
+SELECT a.id,
+    jsonb_build_object(
+        'shape', (SELECT jsonb_build_object('id', s.id, 'value', s.name)
+                  FROM piezas_shape s WHERE s.id = a.id_shape_id),
+        'tags', coalesce(
+            (SELECT jsonb_agg(jsonb_build_object('id', t.id, 'value', t.name) ORDER BY t.id)
+             FROM piezas_tag t JOIN piezas_artifact_id_tags at ON at.tag_id = t.id
+             WHERE at.artifact_id = a.id), '[]'),
+        'culture', (SELECT jsonb_build_object('id', c.id, 'value', c.name)
+                    FROM piezas_culture c WHERE c.id = a.id_culture_id),
+        'description', a.description),
+    (SELECT th.path FROM piezas_thumbnail th WHERE th.id = a.id_thumbnail_id),
+    (SELECT jsonb_build_object('object', m.object, 'material', m.material,
+                               'texture', m.texture)
+     FROM piezas_model m WHERE m.id = a.id_model_id),
+    coalesce(
+        (SELECT jsonb_agg(i.path ORDER BY i.id) FROM piezas_image i
+         WHERE i.id_artifact_id = a.id), '[]')
+FROM piezas_artifact a;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('piezas', '0004_artifact_tag_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArtifactCatalogEntry',
+            fields=[
+                ('artifact', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='catalog_entry', serialize=False, to='piezas.artifact')),
+                ('attributes', models.JSONField(default=dict)),
+                ('thumbnail', models.CharField(max_length=255, null=True)),
+                ('model', models.JSONField(null=True)),
+                ('images', models.JSONField(default=list)),
+            ],
+        ),
+        migrations.RunSQL(BACKFILL_CATALOG_ENTRIES, migrations.RunSQL.noop),
+    ]
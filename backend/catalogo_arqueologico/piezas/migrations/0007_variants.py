@@ -0,0 +1,33 @@
+# Generated by Django 4.2.13 on 2026-10-18 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('piezas', '0006_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artifactcatalogentry',
+            name='image_variants',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='artifactcatalogentry',
+            name='thumbnail_variants',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='thumbnail',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
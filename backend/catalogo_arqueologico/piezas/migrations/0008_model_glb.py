@@ -0,0 +1,18 @@
+# Generated by Django 4.2.13 on 2026-10-18 07:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('piezas', '0007_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='model',
+            name='glb',
+            field=models.FileField(blank=True, editable=False, null=True, upload_to='glb/'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.13 on 2026-10-18 07:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('piezas', '0008_model_glb'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelLOD',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('budget', models.PositiveIntegerField()),
+                ('triangles', models.PositiveIntegerField()),
+                ('size', models.PositiveBigIntegerField()),
+                ('glb', models.FileField(upload_to='lod/')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('model', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lods', to='piezas.model')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='modellod',
+            constraint=models.UniqueConstraint(fields=('model', 'budget'), name='unique_model_lod'),
+        ),
+    ]
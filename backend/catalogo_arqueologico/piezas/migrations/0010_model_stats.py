@@ -0,0 +1,59 @@
+# Generated by Django 4.2.13 on 2026-10-18 07:09
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('piezas', '0009_model_lod'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='model',
+            name='bounding_box_max',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), editable=False, null=True, size=3),
+        ),
+        migrations.AddField(
+            model_name='model',
+            name='bounding_box_min',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), editable=False, null=True, size=3),
+        ),
+        migrations.AddField(
+            model_name='model',
+            name='face_count',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='model',
+            name='material_size',
+            field=models.PositiveBigIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='model',
+            name='object_size',
+            field=models.PositiveBigIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='model',
+            name='texture_height',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='model',
+            name='texture_size',
+            field=models.PositiveBigIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='model',
+            name='texture_width',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='model',
+            name='vertex_count',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.13 on 2026-10-18 07:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('piezas', '0010_model_stats'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='model',
+            name='unique_model_triplet',
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='sha256',
+            field=models.CharField(db_index=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='size',
+            field=models.PositiveBigIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='model',
+            name='material_sha256',
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='model',
+            name='object_sha256',
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='model',
+            name='texture_sha256',
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='thumbnail',
+            name='sha256',
+            field=models.CharField(db_index=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='thumbnail',
+            name='size',
+            field=models.PositiveBigIntegerField(editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='image',
+            name='path',
+            field=models.ImageField(db_index=True, upload_to='images/'),
+        ),
+        migrations.AddConstraint(
+            model_name='model',
+            constraint=models.UniqueConstraint(fields=('texture_sha256', 'object_sha256', 'material_sha256'), name='unique_model_triplet'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.13 on 2026-10-18 07:15
+
+from django.db import migrations, models
+import piezas.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('piezas', '0011_content_hashes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='image',
+            name='path',
+            field=models.ImageField(db_index=True, upload_to=piezas.storage.ShardedPath('images/')),
+        ),
+        migrations.AlterField(
+            model_name='model',
+            name='material',
+            field=models.FileField(upload_to=piezas.storage.ShardedPath('materials/')),
+        ),
+        migrations.AlterField(
+            model_name='model',
+            name='object',
+            field=models.FileField(upload_to=piezas.storage.ShardedPath('objects/')),
+        ),
+        migrations.AlterField(
+            model_name='model',
+            name='texture',
+            field=models.ImageField(upload_to=piezas.storage.ShardedPath('materials/')),
+        ),
+        migrations.AlterField(
+            model_name='thumbnail',
+            name='path',
+            field=models.ImageField(unique=True, upload_to=piezas.storage.ShardedPath('thumbnails/')),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.13 on 2026-10-18 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('piezas', '0012_sharded_media'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='model',
+            name='web_material',
+            field=models.FileField(blank=True, editable=False, null=True, upload_to='web/'),
+        ),
+        migrations.AddField(
+            model_name='model',
+            name='web_texture',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='web/'),
+        ),
+        migrations.AddField(
+            model_name='model',
+            name='web_texture_mipmaps',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+    ]
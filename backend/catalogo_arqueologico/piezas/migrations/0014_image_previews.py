@@ -0,0 +1,63 @@
+# Generated by Django 4.2.13 on 2026-10-18 07:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('piezas', '0013_model_web_textures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='artifactcatalogentry',
+            name='image_previews',
+            field=models.JSONField(default=list),
+        ),
+        migrations.AddField(
+            model_name='artifactcatalogentry',
+            name='thumbnail_preview',
+            field=models.JSONField(null=True),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='dominant_color',
+            field=models.CharField(editable=False, max_length=7, null=True),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='height',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='placeholder',
+            field=models.TextField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='width',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='thumbnail',
+            name='dominant_color',
+            field=models.CharField(editable=False, max_length=7, null=True),
+        ),
+        migrations.AddField(
+            model_name='thumbnail',
+            name='height',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='thumbnail',
+            name='placeholder',
+            field=models.TextField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='thumbnail',
+            name='width',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.13 on 2026-10-18 07:40
+
+from django.db import migrations, models
+import piezas.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('piezas', '0014_image_previews'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='model',
+            name='material',
+            field=models.FileField(upload_to=piezas.storage.ShardedPath('materials/', sibling='texture')),
+        ),
+        migrations.AlterField(
+            model_name='model',
+            name='texture',
+            field=models.ImageField(upload_to=piezas.storage.ShardedPath('materials/', sibling='material')),
+        ),
+    ]
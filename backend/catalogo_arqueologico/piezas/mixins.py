@@ -0,0 +1,112 @@
+"""
+This module defines reusable mixins for the API views of the 'piezas' application.
+
+Classes:
+- QueryBudgetExceeded: Exception raised when a view runs more queries than allowed.
+- QueryCounter: Database execute wrapper that counts the queries run inside it.
+- QueryBudgetMixin: Counts the queries run while handling a request and logs or fails
+    when the view goes over its configured query budget.
+"""
+
+import logging
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """
+    Raised when a view runs more database queries than its query budget allows
+    and QUERY_BUDGET_STRICT is enabled.
+    """
+
+
+class QueryCounter:
+    """
+    Database execute wrapper that counts every query executed through it.
+
+    Attributes:
+        count (int): Number of queries executed so far.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """
+        Counts the query and executes it.
+
+        Args:
+            execute: The next callable in the execution chain.
+            sql (str): The SQL to execute.
+            params: The parameters of the query.
+            many (bool): Whether the query is an executemany call.
+            context (dict): Extra information about the execution.
+
+        Returns:
+            The result of the query execution.
+        """
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMixin:
+    """
+    Mixin for API views that enforces a maximum number of database queries per request.
+
+    The budget is read from the QUERY_BUDGETS setting using the view class name, falling
+    back to the `query_budget` attribute. When the budget is exceeded a warning is logged,
+    or QueryBudgetExceeded is raised if QUERY_BUDGET_STRICT is enabled.
+
+    Attributes:
+        query_budget (int): Maximum number of queries allowed per request. None disables
+            the check.
+        extra_queries (int): Queries allowed on top of the budget for the current
+            request, added by the view when it takes a slower path, e.g. to load the
+            related rows of artifacts without catalog entry.
+    """
+
+    query_budget = None
+    extra_queries = 0
+
+    def get_query_budget(self):
+        """
+        Retrieves the query budget for the view.
+
+        Returns:
+            int: The maximum number of queries allowed, or None if there is no budget.
+        """
+        return settings.QUERY_BUDGETS.get(self.__class__.__name__, self.query_budget)
+
+    def dispatch(self, request, *args, **kwargs):
+        """
+        Dispatches the request while counting the queries it runs.
+
+        Args:
+            request: The HTTP request object.
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Response: The response returned by the view.
+        """
+        budget = self.get_query_budget()
+        if budget is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        counter = QueryCounter()
+        self.extra_queries = 0
+        with connection.execute_wrapper(counter):
+            response = super().dispatch(request, *args, **kwargs)
+
+        budget += self.extra_queries
+        if counter.count > budget:
+            message = (
+                f"{self.__class__.__name__} ran {counter.count} queries for "
+                f"{request.method} {request.get_full_path()}, budget is {budget}"
+            )
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
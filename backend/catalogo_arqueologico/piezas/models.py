@@ -9,11 +9,13 @@ Models:
 - Culture: Represents the culture associated with an artifact with a unique name.
 - Tag: Represents a tag that can be associated with an artifact with a unique name.
 - Thumbnail: Represents a thumbnail image for an artifact with a unique path.
-- Model: Represents a 3D model of an artifact with unique attributes for texture, 
-    object file, and material file.
-- Image: Represents an image associated with an artifact with a unique path.
+- Model: Represents a 3D model of an artifact with a unique combination of texture, 
+    object file, and material file contents.
+- ModelLOD: Represents a simplified version of a 3D model, with fewer triangles.
+- Image: Represents an image associated with an artifact.
 - Artifact: Represents an artifact with a description and relationships to other models 
     like Thumbnail, Model, Shape, Culture, and Tags.
+- ArtifactCatalogEntry: Denormalized copy of the data the catalog shows for an artifact.
 - TagsIds, CultureIds, ShapeIds: Auxiliary tables to store unique relationships 
     between artifacts and tags, cultures, or shapes when importing.
 - ArtifactRequester: Represents a requester of an artifact with details like name, 
@@ -25,9 +27,13 @@ artifacts within the system.
 
 import logging
 from django.db import models
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
 from django.contrib.auth.models import Group
+from .storage import ShardedPath
 from .validators import validateRut
 
 logger = logging.getLogger(__name__)
@@ -40,10 +46,12 @@ class Institution(models.Model):
     Attributes:
         id (BigAutoField): Primary key.
         name (CharField): Unique name of the institution.
+        updated_at (DateTimeField): Date and time of the last change.
     """
 
     id = models.BigAutoField(primary_key=True)
     name = models.CharField(max_length=200, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         """
@@ -147,10 +155,19 @@ class Shape(models.Model):
     Attributes:
         id (BigAutoField): Primary key.
         name (CharField): Unique name of the shape.
+        updated_at (DateTimeField): Date and time of the last change.
     """
 
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=["name"], name="shape_name_trgm_idx", opclasses=["gin_trgm_ops"]
+            )
+        ]
+
     id = models.BigAutoField(primary_key=True)
     name = models.CharField(max_length=100, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         """
@@ -173,10 +190,19 @@ class Culture(models.Model):
     Attributes:
         id (BigAutoField): Primary key.
         name (CharField): Unique name of the culture.
+        updated_at (DateTimeField): Date and time of the last change.
     """
 
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=["name"], name="culture_name_trgm_idx", opclasses=["gin_trgm_ops"]
+            )
+        ]
+
     id = models.BigAutoField(primary_key=True)
     name = models.CharField(max_length=100, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         """
@@ -199,10 +225,19 @@ class Tag(models.Model):
     Attributes:
         id (BigAutoField): Primary key.
         path (ImageField): Path to the thumbnail image, must be unique.
+        updated_at (DateTimeField): Date and time of the last change.
     """
 
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=["name"], name="tag_name_trgm_idx", opclasses=["gin_trgm_ops"]
+            )
+        ]
+
     id = models.BigAutoField(primary_key=True)
     name = models.CharField(max_length=100, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         """
@@ -225,55 +260,188 @@ class Thumbnail(models.Model):
     Attributes:
         id (BigAutoField): Primary key.
         path (ImageField): Path to the thumbnail image, must be unique.
+        sha256 (CharField): SHA-256 hash of the image file. See `piezas.storage`.
+        size (PositiveBigIntegerField): Size of the image file, in bytes.
+        variants (JSONField): Storage names of the resized variants of the image, by
+            format and width (e.g. {"webp": {"320w": ...}}). See `piezas.assets`.
+        width (PositiveIntegerField): Width of the image, in pixels.
+        height (PositiveIntegerField): Height of the image, in pixels.
+        dominant_color (CharField): Most common color of the image, e.g. "#a0522d".
+        placeholder (TextField): Tiny, blurry version of the image, as a data URI.
+        updated_at (DateTimeField): Date and time of the last change.
+
+    The dimensions, color and placeholder are read from the file by `piezas.assets`,
+    and are null until then or if the file is not an image.
     """
 
     id = models.BigAutoField(primary_key=True)
-    path = models.ImageField(upload_to=settings.THUMBNAILS_URL, unique=True)
+    path = models.ImageField(
+        upload_to=ShardedPath(settings.THUMBNAILS_URL), unique=True
+    )
+    sha256 = models.CharField(max_length=64, null=True, editable=False, db_index=True)
+    size = models.PositiveBigIntegerField(null=True, editable=False)
+    variants = models.JSONField(default=dict, blank=True, editable=False)
+    width = models.PositiveIntegerField(null=True, editable=False)
+    height = models.PositiveIntegerField(null=True, editable=False)
+    dominant_color = models.CharField(max_length=7, null=True, editable=False)
+    placeholder = models.TextField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
 
 class Model(models.Model):
     """
     Represents a 3D model of an artifact.
 
-    Each attribute must be unique.
+    Each combination of texture, object and material contents must be unique.
 
     Attributes:
         id (BigAutoField): Primary key.
         texture (ImageField): Path to the texture image.
         object (FileField): Path to the 3D object file.
         material (FileField): Path to the material file.
+        texture_sha256 (CharField): SHA-256 hash of the texture file. See
+            `piezas.storage`.
+        object_sha256 (CharField): SHA-256 hash of the object file.
+        material_sha256 (CharField): SHA-256 hash of the material file.
+        glb (FileField): Path to the binary glTF conversion of the object, material
+            and texture, if it could be built. See `piezas.assets`.
+        web_texture (ImageField): Path to the web version of the texture, scaled to a
+            power-of-two size and recompressed, if it could be built.
+        web_material (FileField): Path to the web version of the material file, which
+            references the web texture.
+        web_texture_mipmaps (JSONField): Paths to the mipmap chain of the web texture,
+            from half its size down to 1 pixel, if it was built.
+        vertex_count (PositiveIntegerField): Number of vertices of the object.
+        face_count (PositiveIntegerField): Number of faces of the object.
+        bounding_box_min (ArrayField): Minimum x, y and z coordinates of the object.
+        bounding_box_max (ArrayField): Maximum x, y and z coordinates of the object.
+        object_size (PositiveBigIntegerField): Size of the object file, in bytes.
+        material_size (PositiveBigIntegerField): Size of the material file, in bytes.
+        texture_size (PositiveBigIntegerField): Size of the texture file, in bytes.
+        texture_width (PositiveIntegerField): Width of the texture, in pixels.
+        texture_height (PositiveIntegerField): Height of the texture, in pixels.
+        updated_at (DateTimeField): Date and time of the last change.
+
+    The statistics are read from the files by `piezas.assets`, and are null until then
+    or if the files can not be read.
     """
 
     class Meta:
         constraints = [
             models.UniqueConstraint(
-                fields=["texture", "object", "material"], name="unique_model_triplet"
+                fields=["texture_sha256", "object_sha256", "material_sha256"],
+                name="unique_model_triplet",
             )
         ]
 
     id = models.BigAutoField(primary_key=True)
-    texture = models.ImageField(upload_to=settings.MATERIALS_URL, unique=False)
-    object = models.FileField(upload_to=settings.OBJECTS_URL, unique=False)
-    material = models.FileField(upload_to=settings.MATERIALS_URL, unique=False)
+    # The material references the texture by a relative path, so they are stored in the
+    # same folder
+    texture = models.ImageField(
+        upload_to=ShardedPath(settings.MATERIALS_URL, sibling="material"), unique=False
+    )
+    object = models.FileField(upload_to=ShardedPath(settings.OBJECTS_URL), unique=False)
+    material = models.FileField(
+        upload_to=ShardedPath(settings.MATERIALS_URL, sibling="texture"), unique=False
+    )
+    texture_sha256 = models.CharField(max_length=64, null=True, editable=False)
+    object_sha256 = models.CharField(max_length=64, null=True, editable=False)
+    material_sha256 = models.CharField(max_length=64, null=True, editable=False)
+    glb = models.FileField(
+        upload_to=settings.GLB_URL, null=True, blank=True, editable=False
+    )
+    web_texture = models.ImageField(
+        upload_to=settings.WEB_TEXTURES_URL, null=True, blank=True, editable=False
+    )
+    web_material = models.FileField(
+        upload_to=settings.WEB_TEXTURES_URL, null=True, blank=True, editable=False
+    )
+    web_texture_mipmaps = models.JSONField(default=list, blank=True, editable=False)
+    vertex_count = models.PositiveIntegerField(null=True, editable=False)
+    face_count = models.PositiveIntegerField(null=True, editable=False)
+    bounding_box_min = ArrayField(
+        models.FloatField(), size=3, null=True, editable=False
+    )
+    bounding_box_max = ArrayField(
+        models.FloatField(), size=3, null=True, editable=False
+    )
+    object_size = models.PositiveBigIntegerField(null=True, editable=False)
+    material_size = models.PositiveBigIntegerField(null=True, editable=False)
+    texture_size = models.PositiveBigIntegerField(null=True, editable=False)
+    texture_width = models.PositiveIntegerField(null=True, editable=False)
+    texture_height = models.PositiveIntegerField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class ModelLOD(models.Model):
+    """
+    Represents a simplified version (level of detail) of a 3D model, with fewer
+    triangles, stored as binary glTF.
+
+    Each model has at most one version per triangle budget.
+
+    Attributes:
+        id (BigAutoField): Primary key.
+        model (ForeignKey): Reference to the simplified Model.
+        budget (PositiveIntegerField): Maximum number of triangles the version was
+            built for, from LOD_TRIANGLE_BUDGETS.
+        triangles (PositiveIntegerField): Number of triangles of the version.
+        size (PositiveBigIntegerField): Size of the GLB file, in bytes.
+        glb (FileField): Path to the GLB file. See `piezas.assets`.
+        updated_at (DateTimeField): Date and time of the last change.
+    """
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["model", "budget"], name="unique_model_lod")
+        ]
+
+    id = models.BigAutoField(primary_key=True)
+    model = models.ForeignKey(Model, on_delete=models.CASCADE, related_name="lods")
+    budget = models.PositiveIntegerField()
+    triangles = models.PositiveIntegerField()
+    size = models.PositiveBigIntegerField()
+    glb = models.FileField(upload_to=settings.LOD_URL)
+    updated_at = models.DateTimeField(auto_now=True)
 
 
 class Image(models.Model):
     """
     Represents an image associated with an artifact.
 
-    Images must be unique.
+    The same image file may belong to several artifacts, each with its own row.
 
     Attributes:
         id (BigAutoField): Primary key.
         id_artifact (ForeignKey): Reference to the associated artifact.
-        path (ImageField): Path to the image, must be unique.
+        path (ImageField): Path to the image.
+        sha256 (CharField): SHA-256 hash of the image file. See `piezas.storage`.
+        size (PositiveBigIntegerField): Size of the image file, in bytes.
+        variants (JSONField): Storage names of the resized variants of the image, by
+            format and width (e.g. {"webp": {"320w": ...}}). See `piezas.assets`.
+        width (PositiveIntegerField): Width of the image, in pixels.
+        height (PositiveIntegerField): Height of the image, in pixels.
+        dominant_color (CharField): Most common color of the image, e.g. "#a0522d".
+        placeholder (TextField): Tiny, blurry version of the image, as a data URI.
+        updated_at (DateTimeField): Date and time of the last change.
+
+    The dimensions, color and placeholder are read from the file by `piezas.assets`,
+    and are null until then or if the file is not an image.
     """
 
     id = models.BigAutoField(primary_key=True)
     id_artifact = models.ForeignKey(
         "Artifact", on_delete=models.CASCADE, null=True, related_name="images"
     )
-    path = models.ImageField(upload_to=settings.IMAGES_URL, unique=True)
+    path = models.ImageField(upload_to=ShardedPath(settings.IMAGES_URL), db_index=True)
+    sha256 = models.CharField(max_length=64, null=True, editable=False, db_index=True)
+    size = models.PositiveBigIntegerField(null=True, editable=False)
+    variants = models.JSONField(default=dict, blank=True, editable=False)
+    width = models.PositiveIntegerField(null=True, editable=False)
+    height = models.PositiveIntegerField(null=True, editable=False)
+    dominant_color = models.CharField(max_length=7, null=True, editable=False)
+    placeholder = models.TextField(null=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
 
 
 class Artifact(models.Model):
@@ -288,8 +456,26 @@ class Artifact(models.Model):
         id_shape (ForeignKey): Reference to the associated Shape.
         id_culture (ForeignKey): Reference to the associated Culture.
         id_tags (ManyToManyField): Tags associated with the artifact.
+        search_vector (SearchVectorField): Full-text search vector built from the
+            description and the shape, culture and tag names. Kept up to date by signals.
+        tag_ids (ArrayField): Ids of the tags associated with the artifact, sorted.
+            Copy of id_tags kept up to date by signals, so filtering by several tags
+            is a single indexed containment lookup.
+        updated_at (DateTimeField): Date and time of the last change to the artifact or
+            the rows it references. Kept up to date by signals for the related rows.
     """
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_vector"], name="artifact_search_idx"),
+            GinIndex(fields=["tag_ids"], name="artifact_tag_ids_idx"),
+            GinIndex(
+                fields=["description"],
+                name="artifact_description_trgm_idx",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ]
+
     id = models.BigAutoField(primary_key=True)
     description = models.CharField(max_length=500)
     id_thumbnail = models.ForeignKey(
@@ -308,6 +494,51 @@ class Artifact(models.Model):
         Culture, on_delete=models.SET_NULL, null=True, related_name="artifact"
     )
     id_tags = models.ManyToManyField(Tag, blank=True, related_name="artifact")
+    search_vector = SearchVectorField(null=True, editable=False)
+    tag_ids = ArrayField(
+        models.BigIntegerField(), default=list, blank=True, editable=False
+    )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+
+class ArtifactCatalogEntry(models.Model):
+    """
+    Represents the data the catalog and the artifact detail show for an artifact.
+
+    Read model maintained by `piezas.catalog` from the artifact and its related rows.
+
+    Attributes:
+        artifact (OneToOneField): The artifact, also the primary key.
+        attributes (JSONField): Shape, tags, culture and description of the artifact,
+            as returned by the API.
+        thumbnail (CharField): Storage name of the thumbnail, if any.
+        model (JSONField): Storage names of the object, material, texture and GLB
+            files, and the simplified versions of the model.
+        images (JSONField): Storage names of the images.
+        thumbnail_variants (JSONField): Storage names of the resized variants of the
+            thumbnail, by format and width.
+        image_variants (JSONField): Storage names of the resized variants of each
+            image, in the same order as `images`.
+        thumbnail_preview (JSONField): Dimensions, dominant color and placeholder of
+            the thumbnail, if any.
+        image_previews (JSONField): Dimensions, dominant color and placeholder of each
+            image, in the same order as `images`.
+    """
+
+    artifact = models.OneToOneField(
+        Artifact,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="catalog_entry",
+    )
+    attributes = models.JSONField(default=dict)
+    thumbnail = models.CharField(max_length=255, null=True)
+    model = models.JSONField(null=True)
+    images = models.JSONField(default=list)
+    thumbnail_variants = models.JSONField(default=dict)
+    image_variants = models.JSONField(default=list)
+    thumbnail_preview = models.JSONField(null=True)
+    image_previews = models.JSONField(default=list)
 
 
 class TagsIds(models.Model):
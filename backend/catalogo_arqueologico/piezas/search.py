@@ -0,0 +1,476 @@
+"""
+This module implements the full-text search used by the catalog.
+
+Each artifact stores a `search_vector` built from its description and the names of its
+shape, culture and tags, using the `spanish_unaccent` text search configuration
+(Spanish stemming on top of `unaccent`, created in migration 0002 along with
+`simple_unaccent`). The vector is indexed with a GIN index and kept up to date by the
+signal handlers in `piezas.signals`.
+
+Functions:
+- search_vector_expression: Builds the expression that computes an artifact's search
+    vector.
+- update_search_vectors: Recomputes the search vector of the given artifacts in one
+    query.
+- update_tag_ids: Recomputes the tag id array of the given artifacts in one query.
+- build_search_query: Turns the text typed in the search box into a prefix search
+    query.
+- parse_artifact_id: Reads the artifact id a search text may be.
+- search_filter: Builds the filter that matches the artifacts found by a search text.
+- search_artifacts: Filters, ranks and highlights a queryset of artifacts for a search
+    text.
+- render_highlight: Turns a highlighted description fragment into escaped HTML.
+- name_filter: Builds the exact or typo-tolerant filter for a shape, culture or tag
+    name.
+- resolve_tag_ids: Finds the ids of the tags that match each of the given names.
+- tags_filter: Builds the filter for the artifacts that have every one of the given
+    tags.
+- filter_catalog: Applies the catalog filters (query, culture, shape, tags, fuzzy).
+- suggest_names: Lists the names most similar to a misspelled one ("did you mean").
+
+Typo-tolerant matching uses the `pg_trgm` extension, with trigram GIN indexes on the
+names and the description created in migration 0003. Descriptions are matched by word
+similarity, which Django only supports from version 4.0, so on older versions the
+`TrigramWordSimilarity` function and the `trigram_word_similar` lookup are defined here.
+
+Tags are filtered on `Artifact.tag_ids`, a sorted copy of the artifact's tag ids with a
+GIN index (migration 0004), so any number of tags is matched with a single `@>`
+containment lookup instead of one join per tag.
+"""
+
+import re
+from html import escape
+from functools import reduce
+from operator import or_
+from django.contrib.postgres.aggregates import ArrayAgg, StringAgg
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+    TrigramSimilarity,
+)
+from django.db.models import (
+    BigIntegerField,
+    Case,
+    CharField,
+    F,
+    FloatField,
+    Func,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    TextField,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from .models import Artifact, Culture, Shape, Tag
+
+try:
+    from django.contrib.postgres.search import TrigramWordSimilarity
+except ImportError:  # Django < 4.0
+    from django.contrib.postgres.lookups import PostgresOperatorLookup
+
+    class TrigramWordSimilarity(Func):
+        """
+        Greatest similarity between a string and the words of a text, as defined by
+        Django 4.0.
+        """
+
+        function = "WORD_SIMILARITY"
+        output_field = FloatField()
+
+        def __init__(self, string, expression, **extra):
+            if not hasattr(string, "resolve_expression"):
+                string = Value(string)
+            super().__init__(string, expression, **extra)
+
+    class TrigramWordSimilar(PostgresOperatorLookup):
+        """
+        Matches the texts with a word similar to a string, as defined by Django 4.0.
+        """
+
+        lookup_name = "trigram_word_similar"
+        postgres_operator = "%%>"
+
+    CharField.register_lookup(TrigramWordSimilar)
+    TextField.register_lookup(TrigramWordSimilar)
+
+SEARCH_CONFIG = "spanish_unaccent"
+PREFIX_CONFIG = "simple_unaccent"
+
+# Markers wrapped around the matching words by PostgreSQL. They are control characters,
+# which descriptions do not contain, so the headline can be escaped before they are
+# turned into <mark> tags. Django 3.2 quotes the options of the headline as Latin-1,
+# so the markers must be Latin-1 characters
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_STOP = "\x03"
+
+# Largest value of a bigint primary key
+MAX_ARTIFACT_ID = 2**63 - 1
+
+# Maximum number of "did you mean" suggestions per name
+SUGGESTION_LIMIT = 5
+
+
+def search_vector_expression():
+    """
+    Builds the expression that computes the search vector of an artifact.
+
+    The description has the highest weight, followed by the shape and culture names and
+    finally the tag names. Related names are read with subqueries, so the expression can
+    be used in a queryset update.
+
+    Returns:
+        CombinedSearchVector: The search vector expression.
+    """
+    shape_name = Shape.objects.filter(pk=OuterRef("id_shape")).values("name")
+    culture_name = Culture.objects.filter(pk=OuterRef("id_culture")).values("name")
+    tag_names = (
+        Tag.objects.filter(artifact=OuterRef("pk"))
+        .order_by()
+        .values("artifact")
+        .annotate(names=StringAgg("name", delimiter=" "))
+        .values("names")
+    )
+
+    def names(subquery):
+        return Coalesce(Subquery(subquery), Value(""), output_field=TextField())
+
+    return (
+        SearchVector("description", weight="A", config=SEARCH_CONFIG)
+        + SearchVector(names(shape_name), weight="B", config=SEARCH_CONFIG)
+        + SearchVector(names(culture_name), weight="B", config=SEARCH_CONFIG)
+        + SearchVector(names(tag_names), weight="C", config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(artifacts):
+    """
+    Recomputes the search vector of the given artifacts.
+
+    Args:
+        artifacts (QuerySet): The artifacts to update.
+
+    Returns:
+        int: The number of updated artifacts.
+    """
+    return artifacts.update(search_vector=search_vector_expression())
+
+
+def update_tag_ids(artifacts):
+    """
+    Recomputes the tag id array of the given artifacts from their id_tags relation.
+
+    Args:
+        artifacts (QuerySet): The artifacts to update.
+
+    Returns:
+        int: The number of updated artifacts.
+    """
+    tag_ids = (
+        Artifact.id_tags.through.objects.filter(artifact=OuterRef("pk"))
+        .order_by()
+        .values("artifact")
+        .annotate(ids=ArrayAgg("tag_id", ordering="tag_id"))
+        .values("ids")
+    )
+    array = ArrayField(BigIntegerField())
+    return artifacts.update(
+        tag_ids=Coalesce(
+            Subquery(tag_ids, output_field=array),
+            Value([], output_field=array),
+            output_field=array,
+        )
+    )
+
+
+def build_search_query(text):
+    """
+    Builds a prefix search query from the text typed in the search box.
+
+    Every word must be present, and the last characters typed may be the beginning of a
+    longer word, so results show up while the user is still typing. The last word is
+    also matched without stemming or stop words, since a partial word like "de" (as in
+    "decoración") would otherwise be dropped as a Spanish stop word.
+
+    Args:
+        text (str): The search text.
+
+    Returns:
+        SearchQuery: The search query, or None if the text has no words.
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    stemmed = SearchQuery(
+        " & ".join(f"{word}:*" for word in words),
+        search_type="raw",
+        config=SEARCH_CONFIG,
+    )
+    typing = SearchQuery(f"{words[-1]}:*", search_type="raw", config=PREFIX_CONFIG)
+    if len(words) > 1:
+        typing = (
+            SearchQuery(
+                " & ".join(f"{word}:*" for word in words[:-1]),
+                search_type="raw",
+                config=SEARCH_CONFIG,
+            )
+            & typing
+        )
+    return stemmed | typing
+
+
+def parse_artifact_id(text):
+    """
+    Reads the artifact id a search text may be.
+
+    Args:
+        text (str): The stripped search text.
+
+    Returns:
+        int: The id, or None if the text is not a decimal number that fits in the
+            primary key.
+    """
+    if not text.isdecimal():
+        return None
+    artifact_id = int(text)
+    return artifact_id if artifact_id <= MAX_ARTIFACT_ID else None
+
+
+def render_highlight(headline):
+    """
+    Turns a headline built by `search_artifacts` into HTML, escaping the description
+    and wrapping the matching words in <mark> tags.
+
+    Args:
+        headline (str): The headline, or None.
+
+    Returns:
+        str: The HTML fragment, or None.
+    """
+    if headline is None:
+        return None
+    return (
+        escape(headline)
+        .replace(HIGHLIGHT_START, "<mark>")
+        .replace(HIGHLIGHT_STOP, "</mark>")
+    )
+
+
+def search_filter(text, fuzzy=False):
+    """
+    Builds the filter that matches the artifacts found by a search text, without
+    ranking them.
+
+    Args:
+        text (str): The search text.
+        fuzzy (bool): Whether to also match misspelled words.
+
+    Returns:
+        Q: The filter. It matches every artifact if the text has no words.
+    """
+    text = text.strip()
+    query = build_search_query(text)
+    if query is None:
+        return Q()
+
+    q_objects = Q(search_vector=query)
+    artifact_id = parse_artifact_id(text)
+    if artifact_id is not None:
+        q_objects |= Q(id=artifact_id)
+    if fuzzy:
+        q_objects |= Q(description__trigram_word_similar=text)
+    return q_objects
+
+
+def search_artifacts(queryset, text, fuzzy=False):
+    """
+    Filters a queryset of artifacts by a search text.
+
+    Matching artifacts are annotated with their `rank` and a `highlight` snippet of the
+    description, with the matching words between HIGHLIGHT_START and HIGHLIGHT_STOP
+    (see `render_highlight`), and ordered by relevance. If the text is a number, the
+    artifact with that id is also matched and listed first. In fuzzy mode, descriptions
+    containing words similar to the text are matched too, so misspelled searches still
+    find results.
+
+    Args:
+        queryset (QuerySet): The artifacts to search.
+        text (str): The search text.
+        fuzzy (bool): Whether to also match misspelled words.
+
+    Returns:
+        QuerySet: The matching artifacts, ordered by relevance.
+    """
+    text = text.strip()
+    query = build_search_query(text)
+    if query is None:
+        return queryset
+
+    exact_id = Value(0)
+    similarity = Value(0.0)
+    artifact_id = parse_artifact_id(text)
+    if artifact_id is not None:
+        exact_id = Case(
+            When(id=artifact_id, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    if fuzzy:
+        similarity = TrigramWordSimilarity(text, "description")
+
+    return (
+        queryset.filter(search_filter(text, fuzzy))
+        .annotate(
+            exact_id=exact_id,
+            rank=SearchRank(F("search_vector"), query),
+            similarity=similarity,
+            highlight=SearchHeadline(
+                "description",
+                query,
+                config=SEARCH_CONFIG,
+                start_sel=HIGHLIGHT_START,
+                stop_sel=HIGHLIGHT_STOP,
+            ),
+        )
+        .order_by("-exact_id", "-rank", "-similarity", "id")
+    )
+
+
+def name_filter(field, name, fuzzy=False):
+    """
+    Builds the filter for a shape, culture or tag name.
+
+    Args:
+        field (str): The lookup path of the name field, e.g. "id_culture__name".
+        name (str): The name to match.
+        fuzzy (bool): Whether to match similar names instead of the exact name,
+            ignoring case.
+
+    Returns:
+        Q: The filter.
+    """
+    if fuzzy:
+        return Q(**{f"{field}__trigram_similar": name})
+    return Q(**{f"{field}__iexact": name})
+
+
+def resolve_tag_ids(names, fuzzy=False):
+    """
+    Finds the ids of the tags that match each of the given names.
+
+    Exact names are resolved with a single query. In fuzzy mode a name may match several
+    similar tags, so each name is resolved with its own trigram lookup.
+
+    Args:
+        names (list): The tag names.
+        fuzzy (bool): Whether to match similar names instead of the exact name,
+            ignoring case.
+
+    Returns:
+        list: For each name, the set of ids of the matching tags.
+    """
+    if fuzzy:
+        return [
+            set(
+                Tag.objects.filter(name__trigram_similar=name).values_list(
+                    "id", flat=True
+                )
+            )
+            for name in names
+        ]
+    if not names:
+        return []
+    ids = {}
+    lookup = reduce(or_, (Q(name__iexact=name) for name in names))
+    for tag_id, tag_name in Tag.objects.filter(lookup).values_list("id", "name"):
+        ids.setdefault(tag_name.lower(), set()).add(tag_id)
+    return [ids.get(name.lower(), set()) for name in names]
+
+
+def tags_filter(names, fuzzy=False):
+    """
+    Builds the filter for the artifacts that have every one of the given tags.
+
+    Args:
+        names (list): The tag names.
+        fuzzy (bool): Whether to match similar names instead of the exact names,
+            ignoring case. An artifact then needs one of the tags similar to each name.
+
+    Returns:
+        Q: The filter. It matches no artifact if a name has no matching tag.
+    """
+    required = set()
+    q_objects = Q()
+    for ids in resolve_tag_ids(names, fuzzy):
+        if not ids:
+            return Q(pk__in=[])
+        if len(ids) == 1:
+            required |= ids
+        else:
+            q_objects &= Q(tag_ids__overlap=sorted(ids))
+    if required:
+        q_objects &= Q(tag_ids__contains=sorted(required))
+    return q_objects
+
+
+def filter_catalog(queryset, params):
+    """
+    Applies the catalog filters to a queryset of artifacts.
+
+    Args:
+        queryset (QuerySet): The artifacts to filter.
+        params (dict): The filter parameters, as sent to the catalog: `query`,
+            `culture`, `shape`, `tags` (comma separated) and `fuzzy`.
+
+    Returns:
+        QuerySet: The filtered artifacts, ranked and highlighted if there is a `query`.
+    """
+    description = params.get("query", None)
+    culture = params.get("culture", None)
+    shape = params.get("shape", None)
+    tags = params.get("tags", None)
+    # Typo-tolerant mode: match similar names and descriptions
+    fuzzy = str(params.get("fuzzy", "false")).lower() == "true"
+
+    q_objects = Q()
+
+    if culture is not None:
+        q_objects &= name_filter("id_culture__name", culture, fuzzy)
+    if shape is not None:
+        q_objects &= name_filter("id_shape__name", shape, fuzzy)
+    if tags is not None:
+        # Single containment lookup on the indexed tag id array
+        q_objects &= tags_filter([tag.strip() for tag in tags.split(",")], fuzzy)
+
+    queryset = queryset.filter(q_objects)
+
+    # Full-text search over the description and the shape, culture and tag names,
+    # ranked by relevance. A numeric query also matches the Id of the artifact
+    if description is not None:
+        queryset = search_artifacts(queryset, description, fuzzy)
+
+    return queryset
+
+
+def suggest_names(model, name, limit=SUGGESTION_LIMIT):
+    """
+    Lists the names most similar to a possibly misspelled one.
+
+    Args:
+        model: The Shape, Culture or Tag model class.
+        name (str): The name to look for.
+        limit (int): Maximum number of suggestions.
+
+    Returns:
+        list: The most similar instances, annotated with their `similarity`.
+    """
+    return list(
+        model.objects.filter(name__trigram_similar=name)
+        .annotate(similarity=TrigramSimilarity("name", name))
+        .order_by("-similarity", "name")[:limit]
+    )
@@ -9,6 +9,18 @@ front-end applications, as well as parsing JSON data to update or create model i
 The module utilizes Django REST Framework's serializers for model serialization, providing methods
 to define custom fields, validation, and object creation or updating logic.
 
+Artifacts are serialized from their ArtifactCatalogEntry when it exists, falling back to the
+related rows otherwise.
+
+The resized variants of the thumbnail and images (see `piezas.assets`) are returned as
+`srcset`-style maps of URLs by format and width, e.g. {"webp": {"320w": url, ...}}.
+The simplified versions of the 3D model are returned as a list of their triangle counts,
+byte sizes and URLs, from the lightest to the heaviest. Its material and texture are
+their web versions, with the texture downscaled and recompressed, when they were built;
+the original files are still downloaded in full. The thumbnail and images also come
+with their dimensions, dominant color and a tiny placeholder data URI, so the page can
+reserve their space and paint a preview before they load.
+
 Serializers Included:
 - ShapeSerializer: Handles serialization for Shape model instances.
 - CultureSerializer: Handles serialization for Culture model instances.
@@ -21,13 +33,23 @@ Serializers Included:
 - UpdateArtifactSerializer: Supports updating existing Artifact instances with partial or full data.
 - InstitutionSerializer: Handles serialization for Institution model instances.
 - ArtifactRequesterSerializer: Handles serialization for ArtifactRequester model instances.
+- IdListField: Parses a list of artifact ids, also sent as comma separated strings.
+- BulkDownloadSerializer: Validates the body of a bulk download request.
 """
 
 import os  # unused import
 import logging
-from django.conf import settings  # unused import
+from django.conf import settings
 from django.core.files import File  # unused import
+from django.core.files.storage import default_storage
+from django.db.models import BigIntegerField
 from rest_framework import serializers
+from .catalog import (
+    ATTRIBUTE_KEYS,
+    MODEL_KEYS,
+    build_image_preview,
+    build_model_stats,
+)
 from .models import (
     ArtifactRequester,
     Tag,
@@ -36,13 +58,80 @@ from .models import (
     Artifact,
     Model,  # unused import
     Thumbnail,
-    Image,
     Institution,
 )
+from .search import render_highlight
 
 logger = logging.getLogger(__name__)
 
 
+def lod_urls(request, lods):
+    """
+    Builds the list of the simplified versions of a 3D model.
+
+    Args:
+    - request: The HTTP request object.
+    - lods: The triangle count, size and storage name of each version.
+
+    Returns:
+    - A list with the triangle count, size in bytes and absolute URL of each version,
+      from the lightest to the heaviest.
+    """
+    return [
+        {
+            "triangles": lod["triangles"],
+            "size": lod["size"],
+            "url": request.build_absolute_uri(default_storage.url(lod["glb"])),
+        }
+        for lod in sorted(lods, key=lambda lod: lod["triangles"])
+    ]
+
+
+def variant_urls(request, variants):
+    """
+    Builds the srcset-style map of the variants of a thumbnail or image.
+
+    Args:
+    - request: The HTTP request object.
+    - variants: The storage names of the variants, by format and width descriptor.
+
+    Returns:
+    - A dictionary with the absolute URLs of the variants, by format and width
+      descriptor, from the narrowest to the widest.
+    """
+    formats = sorted(
+        variants,
+        key=lambda fmt: (
+            settings.DERIVATIVE_FORMATS.index(fmt)
+            if fmt in settings.DERIVATIVE_FORMATS
+            else len(settings.DERIVATIVE_FORMATS)
+        ),
+    )
+    return {
+        fmt: {
+            width: request.build_absolute_uri(default_storage.url(name))
+            for width, name in sorted(
+                variants[fmt].items(), key=lambda item: int(item[0].rstrip("w"))
+            )
+        }
+        for fmt in formats
+    }
+
+
+def get_catalog_entry(instance):
+    """
+    Retrieves the catalog entry of an artifact.
+
+    Args:
+    - instance: The instance of the artifact.
+
+    Returns:
+    - The ArtifactCatalogEntry of the artifact, or None if it was not built yet.
+    """
+    # A missing one-to-one relation raises an AttributeError subclass
+    return getattr(instance, "catalog_entry", None)
+
+
 class ShapeSerializer(serializers.ModelSerializer):
     """
     Serializer for the Shape model.
@@ -122,14 +211,22 @@ class ArtifactSerializer(serializers.ModelSerializer):
     Attributes:
     - attributes: The attributes of the artifact.
     - thumbnail: The thumbnail of the artifact.
+    - thumbnail_variants: The resized variants of the thumbnail.
     - model: The model of the artifact.
     - images: The images of the artifact.
+    - image_variants: The resized variants of each image.
+    - thumbnail_preview: The dimensions, color and placeholder of the thumbnail.
+    - image_previews: The dimensions, color and placeholder of each image.
     """
 
     attributes = serializers.SerializerMethodField()
     thumbnail = serializers.SerializerMethodField()
+    thumbnail_variants = serializers.SerializerMethodField()
+    thumbnail_preview = serializers.SerializerMethodField()
     model = serializers.SerializerMethodField()
     images = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
+    image_previews = serializers.SerializerMethodField()
 
     class Meta:
         """
@@ -145,8 +242,12 @@ class ArtifactSerializer(serializers.ModelSerializer):
             "id",
             "attributes",
             "thumbnail",
+            "thumbnail_variants",
+            "thumbnail_preview",
             "model",
             "images",
+            "image_variants",
+            "image_previews",
         ]
 
     def get_attributes(self, instance):
@@ -159,6 +260,9 @@ class ArtifactSerializer(serializers.ModelSerializer):
         Returns:
         - A dictionary with the attributes of the artifact.
         """
+        entry = get_catalog_entry(instance)
+        if entry is not None:
+            return {key: entry.attributes.get(key) for key in ATTRIBUTE_KEYS}
         Tags = [{"id": tag.id, "value": tag.name} for tag in instance.id_tags.all()]
         wholeDict = {
             "shape": {"id": instance.id_shape.id, "value": instance.id_shape.name},
@@ -181,6 +285,13 @@ class ArtifactSerializer(serializers.ModelSerializer):
         Returns:
         - The URL of the thumbnail of the artifact.
         """
+        entry = get_catalog_entry(instance)
+        if entry is not None:
+            if entry.thumbnail:
+                return self.context["request"].build_absolute_uri(
+                    default_storage.url(entry.thumbnail)
+                )
+            return None
         if instance.id_thumbnail:
             return self.context["request"].build_absolute_uri(
                 instance.id_thumbnail.path.url
@@ -188,6 +299,24 @@ class ArtifactSerializer(serializers.ModelSerializer):
         else:
             return None
 
+    def get_thumbnail_variants(self, instance):
+        """
+        Method to obtain the resized variants of the thumbnail of the artifact.
+
+        Args:
+        - instance: The instance of the artifact.
+
+        Returns:
+        - A dictionary with the URLs of the variants by format and width, empty if the
+          artifact has no thumbnail or it has no variants.
+        """
+        entry = get_catalog_entry(instance)
+        if entry is not None:
+            variants = entry.thumbnail_variants
+        else:
+            variants = instance.id_thumbnail.variants if instance.id_thumbnail else {}
+        return variant_urls(self.context["request"], variants)
+
     def get_model(self, instance):
         """
         Method to obtain the model of the artifact.
@@ -196,17 +325,59 @@ class ArtifactSerializer(serializers.ModelSerializer):
         - instance: The instance of the artifact.
 
         Returns:
-        - A dictionary with the URL of the object, material and texture of the model.
-        """
+        - A dictionary with the URL of the object, material and texture of the model,
+          of its GLB conversion, or None if it was not built, its simplified versions,
+          the mipmap chain of its texture and its statistics. The material and texture
+          are their web versions when they were built; the originals are downloaded
+          with ArtifactModelFileAPIView.
+        """
+        entry = get_catalog_entry(instance)
+        if entry is not None and entry.model is not None:
+            modelDict = {
+                key: self.context["request"].build_absolute_uri(
+                    default_storage.url(entry.model[key])
+                )
+                for key in MODEL_KEYS
+            }
+            glb = entry.model.get("glb")
+            modelDict["glb"] = (
+                self.context["request"].build_absolute_uri(default_storage.url(glb))
+                if glb
+                else None
+            )
+            modelDict["lods"] = lod_urls(
+                self.context["request"], entry.model.get("lods", [])
+            )
+            modelDict["mipmaps"] = [
+                self.context["request"].build_absolute_uri(default_storage.url(name))
+                for name in entry.model.get("mipmaps", [])
+            ]
+            modelDict["stats"] = entry.model.get("stats")
+            return modelDict
         realModel = instance.id_model
+        material = realModel.web_material or realModel.material
+        texture = realModel.web_texture or realModel.texture
         modelDict = {
             "object": self.context["request"].build_absolute_uri(realModel.object.url),
-            "material": self.context["request"].build_absolute_uri(
-                realModel.material.url
+            "material": self.context["request"].build_absolute_uri(material.url),
+            "texture": self.context["request"].build_absolute_uri(texture.url),
+            "glb": (
+                self.context["request"].build_absolute_uri(realModel.glb.url)
+                if realModel.glb
+                else None
             ),
-            "texture": self.context["request"].build_absolute_uri(
-                realModel.texture.url
+            "lods": lod_urls(
+                self.context["request"],
+                [
+                    {"triangles": lod.triangles, "size": lod.size, "glb": lod.glb.name}
+                    for lod in realModel.lods.all()
+                ],
             ),
+            "mipmaps": [
+                self.context["request"].build_absolute_uri(default_storage.url(name))
+                for name in realModel.web_texture_mipmaps
+            ],
+            "stats": build_model_stats(realModel),
         }
         return modelDict
 
@@ -220,12 +391,72 @@ class ArtifactSerializer(serializers.ModelSerializer):
         Returns:
         - A list with the URLs of the images of the artifact.
         """
-        everyImage = Image.objects.filter(id_artifact=instance.id)
+        entry = get_catalog_entry(instance)
+        if entry is not None:
+            return [
+                self.context["request"].build_absolute_uri(default_storage.url(name))
+                for name in entry.images
+            ]
+        everyImage = instance.images.all()
         Images = []
         for image in everyImage:
             Images.append(self.context["request"].build_absolute_uri(image.path.url))
         return Images
 
+    def get_image_variants(self, instance):
+        """
+        Method to obtain the resized variants of the images of the artifact.
+
+        Args:
+        - instance: The instance of the artifact.
+
+        Returns:
+        - A list with the URLs of the variants of each image by format and width, in
+          the same order as the images.
+        """
+        entry = get_catalog_entry(instance)
+        if entry is not None:
+            variants = entry.image_variants
+        else:
+            variants = [image.variants for image in instance.images.all()]
+        return [variant_urls(self.context["request"], item) for item in variants]
+
+    def get_thumbnail_preview(self, instance):
+        """
+        Method to obtain the dimensions, dominant color and placeholder of the thumbnail
+        of the artifact.
+
+        Args:
+        - instance: The instance of the artifact.
+
+        Returns:
+        - A dictionary with the width, height, color and placeholder of the thumbnail,
+          or None if the artifact has no thumbnail.
+        """
+        entry = get_catalog_entry(instance)
+        if entry is not None:
+            return entry.thumbnail_preview
+        if instance.id_thumbnail:
+            return build_image_preview(instance.id_thumbnail)
+        return None
+
+    def get_image_previews(self, instance):
+        """
+        Method to obtain the dimensions, dominant color and placeholder of the images
+        of the artifact.
+
+        Args:
+        - instance: The instance of the artifact.
+
+        Returns:
+        - A list with the width, height, color and placeholder of each image, in the
+          same order as the images.
+        """
+        entry = get_catalog_entry(instance)
+        if entry is not None:
+            return entry.image_previews
+        return [build_image_preview(image) for image in instance.images.all()]
+
 
 class CatalogSerializer(serializers.ModelSerializer):
     """
@@ -236,10 +467,16 @@ class CatalogSerializer(serializers.ModelSerializer):
     Attributes:
     - attributes: The attributes of the artifact.
     - thumbnail: The thumbnail of the artifact.
+    - thumbnail_variants: The resized variants of the thumbnail.
+    - thumbnail_preview: The dimensions, color and placeholder of the thumbnail.
+    - highlight: The matching fragment of the description when searching.
     """
 
     attributes = serializers.SerializerMethodField(read_only=True)
     thumbnail = serializers.SerializerMethodField(read_only=True)
+    thumbnail_variants = serializers.SerializerMethodField(read_only=True)
+    thumbnail_preview = serializers.SerializerMethodField(read_only=True)
+    highlight = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         """
@@ -251,7 +488,14 @@ class CatalogSerializer(serializers.ModelSerializer):
         """
 
         model = Artifact
-        fields = ["id", "attributes", "thumbnail"]
+        fields = [
+            "id",
+            "attributes",
+            "thumbnail",
+            "thumbnail_variants",
+            "thumbnail_preview",
+            "highlight",
+        ]
 
     def get_attributes(self, instance):
         """
@@ -263,9 +507,12 @@ class CatalogSerializer(serializers.ModelSerializer):
         Returns:
         - A dictionary with the attributes of the artifact.
         """
-        shapeInstance = Shape.objects.get(id=instance.id_shape.id)
-        tagsInstances = Tag.objects.filter(id__in=instance.id_tags.all())
-        cultureInstance = Culture.objects.get(id=instance.id_culture.id)
+        entry = get_catalog_entry(instance)
+        if entry is not None:
+            return {key: entry.attributes.get(key) for key in ATTRIBUTE_KEYS}
+        shapeInstance = instance.id_shape
+        tagsInstances = instance.id_tags.all()
+        cultureInstance = instance.id_culture
         description = instance.description
         tags = []
         for tag in tagsInstances:
@@ -289,6 +536,13 @@ class CatalogSerializer(serializers.ModelSerializer):
         Returns:
         - The URL of the thumbnail of the artifact.
         """
+        entry = get_catalog_entry(instance)
+        if entry is not None:
+            if entry.thumbnail:
+                return self.context["request"].build_absolute_uri(
+                    default_storage.url(entry.thumbnail)
+                )
+            return None
         if instance.id_thumbnail:
             return self.context["request"].build_absolute_uri(
                 instance.id_thumbnail.path.url
@@ -296,6 +550,56 @@ class CatalogSerializer(serializers.ModelSerializer):
         else:
             return None
 
+    def get_thumbnail_variants(self, instance):
+        """
+        Method to obtain the resized variants of the thumbnail of the artifact.
+
+        Args:
+        - instance: The instance of the artifact.
+
+        Returns:
+        - A dictionary with the URLs of the variants by format and width, empty if the
+          artifact has no thumbnail or it has no variants.
+        """
+        entry = get_catalog_entry(instance)
+        if entry is not None:
+            variants = entry.thumbnail_variants
+        else:
+            variants = instance.id_thumbnail.variants if instance.id_thumbnail else {}
+        return variant_urls(self.context["request"], variants)
+
+    def get_thumbnail_preview(self, instance):
+        """
+        Method to obtain the dimensions, dominant color and placeholder of the thumbnail
+        of the artifact.
+
+        Args:
+        - instance: The instance of the artifact.
+
+        Returns:
+        - A dictionary with the width, height, color and placeholder of the thumbnail,
+          or None if the artifact has no thumbnail.
+        """
+        entry = get_catalog_entry(instance)
+        if entry is not None:
+            return entry.thumbnail_preview
+        if instance.id_thumbnail:
+            return build_image_preview(instance.id_thumbnail)
+        return None
+
+    def get_highlight(self, instance):
+        """
+        Method to obtain the highlighted fragment of the description.
+
+        Args:
+        - instance: The instance of the artifact.
+
+        Returns:
+        - The fragment of the description, escaped as HTML, with the matching words
+          wrapped in <mark> tags, or None if the catalog is not being searched.
+        """
+        return render_highlight(getattr(instance, "highlight", None))
+
 
 class UpdateArtifactSerializer(serializers.ModelSerializer):
     """
@@ -394,3 +698,104 @@ class ArtifactRequesterSerializer(serializers.ModelSerializer):
 
         model = ArtifactRequester
         fields = "__all__"
+
+
+def requester_max_length(name):
+    """
+    Retrieves the maximum length of a field of the ArtifactRequester model.
+
+    Args:
+    - name: The name of the field.
+
+    Returns:
+    - The maximum number of characters of the field.
+    """
+    return ArtifactRequester._meta.get_field(name).max_length
+
+
+class IdListField(serializers.ListField):
+    """
+    Field for a list of artifact ids, which may also be sent as comma separated
+    strings, e.g. ["1,2", 3] or "1,2,3".
+
+    Attributes:
+    - child: The field of each id, a positive number that fits in the primary key.
+    """
+
+    child = serializers.IntegerField(min_value=1, max_value=BigIntegerField.MAX_BIGINT)
+
+    def to_internal_value(self, data):
+        """
+        Method to parse the list of ids.
+
+        Args:
+        - data: A list of ids or comma separated strings of ids, or a single one.
+
+        Returns:
+        - The list of ids, as numbers.
+        """
+        if isinstance(data, (str, int)):
+            data = [data]
+        if isinstance(data, list):
+            data = [
+                value
+                for item in data
+                for value in (str(item).split(",") if isinstance(item, str) else [item])
+                if str(value).strip()
+            ]
+        return super().to_internal_value(data)
+
+
+class BulkDownloadSerializer(serializers.Serializer):
+    """
+    Serializer for the body of a bulk download request.
+
+    The artifacts are selected by id, or with the same filters as the catalog. The data
+    of the requester is only needed when the user is not logged in, and is limited to
+    the size of the ArtifactRequester fields.
+
+    Attributes:
+    - ids: The ids of the artifacts.
+    - query: The search text.
+    - culture: The name of the culture.
+    - shape: The name of the shape.
+    - tags: The comma separated names of the tags.
+    - fuzzy: Whether to match similar names and descriptions.
+    - fullName: The name of the requester.
+    - rut: The RUT of the requester.
+    - email: The email of the requester.
+    - comments: The comments of the requester.
+    - institution: The institution of the requester.
+    """
+
+    ids = IdListField(required=False, allow_empty=True)
+    query = serializers.CharField(
+        required=False, allow_blank=True, trim_whitespace=False
+    )
+    culture = serializers.CharField(required=False, allow_blank=True)
+    shape = serializers.CharField(required=False, allow_blank=True)
+    tags = serializers.CharField(required=False, allow_blank=True)
+    fuzzy = serializers.BooleanField(required=False)
+    fullName = serializers.CharField(
+        required=False, allow_blank=True, max_length=requester_max_length("name")
+    )
+    rut = serializers.CharField(
+        required=False, allow_blank=True, max_length=requester_max_length("rut")
+    )
+    email = serializers.EmailField(
+        required=False, allow_blank=True, max_length=requester_max_length("email")
+    )
+    comments = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        allow_null=True,
+        max_length=requester_max_length("comments"),
+    )
+    institution = serializers.PrimaryKeyRelatedField(
+        queryset=Institution.objects.all(),
+        required=False,
+        allow_null=True,
+        pk_field=serializers.IntegerField(
+            min_value=1, max_value=BigIntegerField.MAX_BIGINT
+        ),
+    )
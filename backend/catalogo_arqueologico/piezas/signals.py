@@ -0,0 +1,422 @@
+"""
+This module defines the signal handlers of the 'piezas' application.
+
+The handlers keep the denormalized data derived from each artifact up to date whenever
+the artifact, its tags or the shape, culture, tags, thumbnail, model and images it
+references change: the search vector, tag id array and modification date stored on the
+artifact, its catalog entry and the in-memory facet index. The facet index and the
+cached API responses, which any change to the catalog data invalidates, are only updated
+once the changes are committed, so other requests never see uncommitted data in them.
+
+Functions:
+- files_storing: Stores the new files of a thumbnail, image or model, recording their
+    hash and size.
+- artifact_saved: Refreshes an artifact after it is created or updated.
+- artifact_deleted: Removes an artifact from the facet index after it is deleted.
+- artifact_tags_changed: Refreshes the artifacts whose tags were added, removed or
+    cleared.
+- metadata_saved: Refreshes the artifacts that reference a shape, culture or tag after
+    it changes.
+- metadata_deleting: Remembers the artifacts that reference a shape, culture or tag
+    before it is deleted.
+- metadata_deleted: Refreshes the artifacts that referenced a deleted shape, culture
+    or tag.
+- file_saved: Refreshes the catalog entries of the artifacts that reference a thumbnail
+    or model after it changes.
+- model_files_saved: Builds the missing or stale precompressed copies of the object and
+    material files of a model after it is saved.
+- thumbnail_deleting: Remembers the artifacts that reference a thumbnail before it is
+    deleted.
+- thumbnail_deleted: Refreshes the catalog entries of the artifacts that referenced a
+    deleted thumbnail.
+- image_changing: Remembers the artifact an image belonged to before it is saved.
+- image_saved: Refreshes the catalog entries of the artifacts an image was moved
+    between.
+- image_deleted: Refreshes the catalog entry of the artifact a deleted image belonged
+    to.
+- catalog_changed: Invalidates the cached catalog responses after any change to the
+    catalog data.
+"""
+
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.db import transaction
+from django.dispatch import receiver
+from .assets import compress_model_files
+from .cache import bump_version
+from .catalog import refresh_catalog_entries, touch_artifacts
+from .facets import facet_index
+from .models import (
+    Artifact,
+    Culture,
+    Image,
+    Institution,
+    Model,
+    Shape,
+    Tag,
+    Thumbnail,
+)
+from .search import update_search_vectors, update_tag_ids
+from .storage import link_for_field
+
+# Facet name and artifact lookup of each kind of metadata
+METADATA = {
+    Shape: ("shape", "id_shape"),
+    Culture: ("culture", "id_culture"),
+    Tag: ("tag", "id_tags"),
+}
+
+# Artifact lookup of each kind of file
+FILES = {
+    Thumbnail: "id_thumbnail",
+    Model: "id_model",
+}
+
+# File, hash and size fields of the rows with files in the content-addressed storage
+CONTENT_FIELDS = {
+    Thumbnail: [("path", "sha256", "size")],
+    Image: [("path", "sha256", "size")],
+    Model: [
+        ("texture", "texture_sha256", "texture_size"),
+        ("object", "object_sha256", "object_size"),
+        ("material", "material_sha256", "material_size"),
+    ],
+}
+
+
+@receiver(pre_save, sender=Thumbnail)
+@receiver(pre_save, sender=Image)
+@receiver(pre_save, sender=Model)
+def files_storing(sender, instance, raw=False, **kwargs):
+    """
+    Stores the new files of a thumbnail, image or model before it is saved, recording
+    their hash and size, so the bytes are hashed while they are written.
+
+    Files already stored, e.g. assigned by name, are left as they are.
+
+    Args:
+        sender: The Thumbnail, Image or Model model class.
+        instance: The thumbnail, image or model being saved.
+        raw (bool): True if the instance is being loaded from a fixture.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    if raw:
+        return
+    for file_field, hash_field, size_field in CONTENT_FIELDS[sender]:
+        file = getattr(instance, file_field)
+        if not file or file._committed:
+            continue
+        field = sender._meta.get_field(file_field)
+        digest, size = field.storage.save_blob(file.file)
+        file.name = link_for_field(field, digest, file.name, instance)
+        file._committed = True
+        setattr(instance, hash_field, digest)
+        setattr(instance, size_field, size)
+
+
+@receiver(post_save, sender=Artifact)
+def artifact_saved(sender, instance, raw=False, **kwargs):
+    """
+    Refreshes the search vector, catalog entry and facets of an artifact after it is
+    saved.
+
+    Args:
+        sender: The Artifact model class.
+        instance (Artifact): The saved artifact.
+        raw (bool): True if the artifact is being loaded from a fixture.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    if raw:
+        return
+    artifact_ids = [instance.pk]
+    update_search_vectors(Artifact.objects.filter(pk=instance.pk))
+    refresh_catalog_entries(artifact_ids)
+    transaction.on_commit(lambda: facet_index.update_artifacts(artifact_ids))
+
+
+@receiver(post_delete, sender=Artifact)
+def artifact_deleted(sender, instance, **kwargs):
+    """
+    Removes an artifact from the facet index after it is deleted.
+
+    Args:
+        sender: The Artifact model class.
+        instance (Artifact): The deleted artifact.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    # The primary key is cleared once every handler ran
+    artifact_ids = [instance.pk]
+    transaction.on_commit(lambda: facet_index.update_artifacts(artifact_ids))
+
+
+@receiver(m2m_changed, sender=Artifact.id_tags.through)
+def artifact_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Refreshes the search vector, tag ids, catalog entries and facets of the artifacts
+    whose tags changed.
+
+    Args:
+        sender: The intermediate model of Artifact.id_tags.
+        instance: The artifact, or the tag when the relation is changed from the tag
+            side.
+        action (str): The kind of change. Only completed changes are handled, besides
+            "pre_clear" from the tag side.
+        reverse (bool): True if the relation is changed from the tag side.
+        pk_set (set): The primary keys of the added or removed objects.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    if reverse and action == "pre_clear":
+        # Remember which artifacts had the tag, since they are unreachable after
+        # clearing
+        instance._cleared_artifact_ids = list(
+            instance.artifact.values_list("pk", flat=True)
+        )
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        artifact_ids = [instance.pk]
+    elif action == "post_clear":
+        artifact_ids = getattr(instance, "_cleared_artifact_ids", [])
+    else:
+        artifact_ids = list(pk_set)
+    artifacts = Artifact.objects.filter(pk__in=artifact_ids)
+    update_search_vectors(artifacts)
+    update_tag_ids(artifacts)
+    touch_artifacts(artifact_ids)
+    refresh_catalog_entries(artifact_ids)
+    transaction.on_commit(lambda: facet_index.update_artifacts(artifact_ids))
+
+
+@receiver(post_save, sender=Shape)
+@receiver(post_save, sender=Culture)
+@receiver(post_save, sender=Tag)
+def metadata_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    Refreshes the search vector and catalog entries of the artifacts that reference a
+    shape, culture or tag, and its name in the facet index.
+
+    Args:
+        sender: The Shape, Culture or Tag model class.
+        instance: The saved shape, culture or tag.
+        created (bool): True if the instance was just created.
+        raw (bool): True if the instance is being loaded from a fixture.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    if raw:
+        return
+    facet, lookup = METADATA[sender]
+    value_id, name = instance.pk, instance.name
+    transaction.on_commit(lambda: facet_index.update_name(facet, value_id, name))
+    if not created:
+        artifacts = Artifact.objects.filter(**{lookup: instance})
+        update_search_vectors(artifacts)
+        artifact_ids = list(artifacts.values_list("pk", flat=True))
+        touch_artifacts(artifact_ids)
+        refresh_catalog_entries(artifact_ids)
+
+
+@receiver(pre_delete, sender=Shape)
+@receiver(pre_delete, sender=Culture)
+@receiver(pre_delete, sender=Tag)
+def metadata_deleting(sender, instance, **kwargs):
+    """
+    Remembers the artifacts that reference a shape, culture or tag before it is deleted,
+    since they are detached from it without signals.
+
+    Args:
+        sender: The Shape, Culture or Tag model class.
+        instance: The shape, culture or tag being deleted.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    _, lookup = METADATA[sender]
+    instance._artifact_ids = list(
+        Artifact.objects.filter(**{lookup: instance}).values_list("pk", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Shape)
+@receiver(post_delete, sender=Culture)
+@receiver(post_delete, sender=Tag)
+def metadata_deleted(sender, instance, **kwargs):
+    """
+    Refreshes the search vector, tag ids and catalog entries of the artifacts that
+    referenced a deleted shape, culture or tag, and removes it from the facet index.
+
+    Args:
+        sender: The Shape, Culture or Tag model class.
+        instance: The deleted shape, culture or tag.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    facet, _ = METADATA[sender]
+    value_id = instance.pk
+    transaction.on_commit(lambda: facet_index.update_name(facet, value_id))
+    artifacts = Artifact.objects.filter(pk__in=getattr(instance, "_artifact_ids", []))
+    update_search_vectors(artifacts)
+    if sender is Tag:
+        update_tag_ids(artifacts)
+    touch_artifacts(getattr(instance, "_artifact_ids", []))
+    refresh_catalog_entries(getattr(instance, "_artifact_ids", []))
+
+
+@receiver(post_save, sender=Thumbnail)
+@receiver(post_save, sender=Model)
+def file_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    Refreshes the catalog entries of the artifacts that reference a thumbnail or model.
+
+    Args:
+        sender: The Thumbnail or Model model class.
+        instance: The saved thumbnail or model.
+        created (bool): True if the instance was just created.
+        raw (bool): True if the instance is being loaded from a fixture.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    if raw or created:
+        return
+    artifact_ids = list(
+        Artifact.objects.filter(**{FILES[sender]: instance}).values_list(
+            "pk", flat=True
+        )
+    )
+    touch_artifacts(artifact_ids)
+    refresh_catalog_entries(artifact_ids)
+
+
+@receiver(post_save, sender=Model)
+def model_files_saved(sender, instance, raw=False, **kwargs):
+    """
+    Builds the missing or stale precompressed copies of the object and material files
+    of a model, so nginx does not serve copies of replaced files.
+
+    Args:
+        sender: The Model model class.
+        instance (Model): The saved model.
+        raw (bool): True if the instance is being loaded from a fixture.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    if raw:
+        return
+    compress_model_files(instance)
+
+
+@receiver(pre_delete, sender=Thumbnail)
+def thumbnail_deleting(sender, instance, **kwargs):
+    """
+    Remembers the artifacts that reference a thumbnail before it is deleted, since they
+    are detached from it without signals.
+
+    Args:
+        sender: The Thumbnail model class.
+        instance (Thumbnail): The thumbnail being deleted.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    instance._artifact_ids = list(instance.artifact.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Thumbnail)
+def thumbnail_deleted(sender, instance, **kwargs):
+    """
+    Refreshes the catalog entries of the artifacts that referenced a deleted thumbnail.
+
+    Args:
+        sender: The Thumbnail model class.
+        instance (Thumbnail): The deleted thumbnail.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    touch_artifacts(getattr(instance, "_artifact_ids", []))
+    refresh_catalog_entries(getattr(instance, "_artifact_ids", []))
+
+
+@receiver(pre_save, sender=Image)
+def image_changing(sender, instance, raw=False, **kwargs):
+    """
+    Remembers the artifact an image belonged to before it is saved, since saving it may
+    move it to another artifact or unlink it.
+
+    Args:
+        sender: The Image model class.
+        instance (Image): The image being saved.
+        raw (bool): True if the image is being loaded from a fixture.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    if raw or instance.pk is None:
+        instance._previous_artifact_id = None
+        return
+    instance._previous_artifact_id = (
+        Image.objects.filter(pk=instance.pk)
+        .values_list("id_artifact", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Image)
+def image_saved(sender, instance, raw=False, **kwargs):
+    """
+    Refreshes the catalog entries of the artifacts an image was moved between.
+
+    Args:
+        sender: The Image model class.
+        instance (Image): The saved image.
+        raw (bool): True if the image is being loaded from a fixture.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    if raw:
+        return
+    artifact_ids = {instance.id_artifact_id, instance._previous_artifact_id} - {None}
+    if artifact_ids:
+        touch_artifacts(artifact_ids)
+        refresh_catalog_entries(artifact_ids)
+
+
+@receiver(post_delete, sender=Image)
+def image_deleted(sender, instance, **kwargs):
+    """
+    Refreshes the catalog entry of the artifact a deleted image belonged to.
+
+    The refresh waits for the transaction to be committed, since the image may be
+    deleted along with its artifact, which is deleted after it.
+
+    Args:
+        sender: The Image model class.
+        instance (Image): The deleted image.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    if instance.id_artifact_id is not None:
+        artifact_ids = [instance.id_artifact_id]
+
+        def refresh():
+            touch_artifacts(artifact_ids)
+            refresh_catalog_entries(artifact_ids)
+
+        transaction.on_commit(refresh)
+
+
+@receiver([post_save, post_delete], sender=Artifact)
+@receiver([post_save, post_delete], sender=Shape)
+@receiver([post_save, post_delete], sender=Culture)
+@receiver([post_save, post_delete], sender=Tag)
+@receiver([post_save, post_delete], sender=Thumbnail)
+@receiver([post_save, post_delete], sender=Model)
+@receiver([post_save, post_delete], sender=Image)
+@receiver([post_save, post_delete], sender=Institution)
+@receiver(m2m_changed, sender=Artifact.id_tags.through)
+def catalog_changed(sender, action=None, **kwargs):
+    """
+    Invalidates the cached catalog responses after any change to the catalog data.
+
+    Args:
+        sender: The changed model class, or the intermediate model of Artifact.id_tags.
+        action (str): The kind of change, when the tags of an artifact changed. Only
+            completed changes are handled.
+        **kwargs: Arbitrary keyword arguments.
+    """
+    if action is None or action.startswith("post_"):
+        # Bumping before the commit would let concurrent requests cache the old data
+        # under the new version
+        transaction.on_commit(bump_version)
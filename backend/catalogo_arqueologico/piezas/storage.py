@@ -0,0 +1,348 @@
+"""
+This module defines the content-addressed storage of the uploaded media.
+
+Every file is stored once, as a blob named after the SHA-256 hash of its bytes, under
+MEDIA_ROOT/BLOBS_URL, e.g. `blobs/3f/3fa9...`. The files the models reference, e.g.
+`objects/vasija.obj`, are hard links to their blob, so uploading or importing the same
+bytes again, under any name, takes no extra space. Saving the same bytes under a name
+already linked to them returns that name instead of a suffixed copy.
+
+The bytes are hashed while they are written, so files are read only once. The hash and
+size of the files of the Thumbnail, Image and Model rows are recorded on the rows by the
+`piezas.signals` handlers, and identify the files by content: the
+`unique_model_triplet` constraint of the models is on the hashes of their files.
+
+Files are spread over two levels of subfolders named after the hash of their file name,
+e.g. `thumbnails/3f/a9/vasija.png`, so no folder holds more than a few files even with
+hundreds of thousands of them. The texture and material of a 3D model are kept in the
+same subfolders, since the material references the texture by a relative path: whichever
+is stored first is placed after its name, and the other one next to it. Files stored
+before this layout are moved with the `shardMedia` management command. The API only
+exposes the file name, so files are looked up by it, in whichever folder they are, with
+`media_lookup`.
+
+Blobs are not removed when a file is deleted, since other files may link to them; the
+`collectMediaGarbage` management command removes the blobs no file links to anymore.
+Existing files are moved into the blob store with the `hashMedia` management command.
+
+Classes:
+- ContentAddressedStorage: File system storage that stores every distinct file once.
+- ShardedPath: Upload path of a file field, in subfolders named after the file name.
+
+Functions:
+- link_for_field: Saves a stored blob under the upload name of a file field.
+- link_into: Saves a stored blob under the upload name of a file field of a row, and
+    assigns it.
+- shard_name: Builds the sharded storage name of a file.
+- is_sharded: Checks whether a storage name follows the sharded layout.
+- flat_name: Removes the subfolders of the sharded layout from a storage name.
+- media_lookup: Builds the lookup of a file by its name, in any layout.
+"""
+
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.utils import validate_file_name
+from django.db.models import Q
+from django.utils.deconstruct import deconstructible
+
+# Size of the chunks read when hashing a stored file
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Subfolders of a sharded storage name, e.g. "3f/a9/" in "thumbnails/3f/a9/vasija.png"
+SHARD_PATTERN = re.compile(r"[0-9a-f]{2}/[0-9a-f]{2}/[^/]+$")
+# The same subfolders, anywhere in a storage name
+SHARD_FOLDERS = re.compile(r"(?<![^/])[0-9a-f]{2}/[0-9a-f]{2}/(?=[^/]+$)")
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that stores every distinct file once, as a blob named after its
+    hash, and saves files as hard links to their blob.
+    """
+
+    def blob_name(self, digest):
+        """
+        Builds the storage name of a blob.
+
+        Args:
+            digest (str): The SHA-256 hash of the blob, in hexadecimal.
+
+        Returns:
+            str: The storage name of the blob.
+        """
+        return f"{settings.BLOBS_URL}{digest[:2]}/{digest}"
+
+    def save_blob(self, content):
+        """
+        Stores the content of a file as a blob, unless it is already stored.
+
+        Args:
+            content (File): The file, read chunk by chunk.
+
+        Returns:
+            tuple: The SHA-256 hash of the content, in hexadecimal, and its size.
+        """
+        folder = self.path(settings.BLOBS_URL)
+        os.makedirs(folder, exist_ok=True)
+        descriptor, temporary = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(descriptor, "wb") as target:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    size += len(chunk)
+                    target.write(chunk)
+            digest = digest.hexdigest()
+            blob = self.path(self.blob_name(digest))
+            if os.path.exists(blob):
+                os.remove(temporary)
+            else:
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                # Temporary files are private, stored files get the upload permissions
+                os.chmod(temporary, self.file_permissions_mode or 0o644)
+                os.replace(temporary, blob)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        return digest, size
+
+    def link(self, digest, name, max_length=None):
+        """
+        Saves a stored blob under a name, as a hard link.
+
+        Args:
+            digest (str): The SHA-256 hash of the blob, in hexadecimal.
+            name (str): The desired storage name.
+            max_length (int): The maximum length of the name.
+
+        Returns:
+            str: The storage name, which is the desired one unless another file already
+                has it.
+        """
+        validate_file_name(name, allow_relative_path=True)
+        blob = self.path(self.blob_name(digest))
+        if self.exists(name) and os.path.samefile(self.path(name), blob):
+            return name
+        while True:
+            name = self.get_available_name(name, max_length=max_length)
+            path = self.path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                os.link(blob, path)
+            except FileExistsError:
+                # Another process took the name since it was found available
+                continue
+            return name
+
+    def adopt(self, name):
+        """
+        Moves an existing file into the blob store, replacing it with a hard link to its
+        blob, so a copy of a blob stored before takes no extra space.
+
+        Args:
+            name (str): The storage name of the file.
+
+        Returns:
+            tuple: The SHA-256 hash of the file, in hexadecimal, and its size.
+        """
+        path = self.path(name)
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, "rb") as source:
+            for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+                size += len(chunk)
+        digest = digest.hexdigest()
+        blob = self.path(self.blob_name(digest))
+        os.makedirs(os.path.dirname(blob), exist_ok=True)
+        try:
+            os.link(path, blob)
+            return digest, size
+        except FileExistsError:
+            pass
+        if not os.path.samefile(path, blob):
+            # The link is swapped in atomically, so readers always find the file
+            temporary = f"{path}.{digest[:8]}.tmp"
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            os.link(blob, temporary)
+            os.replace(temporary, path)
+        return digest, size
+
+    def save(self, name, content, max_length=None):
+        """
+        Saves a file as a hard link to its blob, storing the blob if needed.
+
+        Args:
+            name (str): The desired storage name. Defaults to the name of the file.
+            content (File): The file.
+            max_length (int): The maximum length of the name.
+
+        Returns:
+            str: The storage name.
+        """
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        digest, _ = self.save_blob(content)
+        return self.link(digest, name, max_length=max_length)
+
+
+def link_for_field(field, digest, name, instance=None):
+    """
+    Saves a stored blob under the upload name of a file field, e.g. `objects/<name>` for
+    the object of a Model.
+
+    Args:
+        field (FileField): The file field.
+        digest (str): The SHA-256 hash of the blob, in hexadecimal.
+        name (str): The name of the file.
+        instance (Model): The row the file belongs to, if its upload name depends on it.
+
+    Returns:
+        str: The storage name.
+    """
+    return field.storage.link(
+        digest, field.generate_filename(instance, name), max_length=field.max_length
+    )
+
+
+def link_into(instance, field_name, digest, name):
+    """
+    Saves a stored blob under the upload name of a file field of a row, and assigns it
+    to the row, so the files of the other fields stored next to it (see `ShardedPath`)
+    find its name.
+
+    Args:
+        instance (Model): The row, which may be unsaved.
+        field_name (str): The name of the file field.
+        digest (str): The SHA-256 hash of the blob, in hexadecimal.
+        name (str): The name of the file.
+
+    Returns:
+        str: The storage name.
+    """
+    field = instance._meta.get_field(field_name)
+    name = link_for_field(field, digest, name, instance)
+    setattr(instance, field_name, name)
+    return name
+
+
+def shard_name(folder, filename):
+    """
+    Builds the sharded storage name of a file.
+
+    Args:
+        folder (str): The folder of the file, e.g. "thumbnails/".
+        filename (str): The name of the file, without folders.
+
+    Returns:
+        str: The storage name, e.g. "thumbnails/3f/a9/vasija.png".
+    """
+    digest = hashlib.sha256(filename.encode("utf-8")).hexdigest()
+    return f"{folder}{digest[:2]}/{digest[2:4]}/{filename}"
+
+
+def is_sharded(name, folder):
+    """
+    Checks whether a storage name follows the sharded layout.
+
+    Args:
+        name (str): The storage name.
+        folder (str): The folder of the file, e.g. "thumbnails/".
+
+    Returns:
+        bool: True if the file is in the subfolders of the sharded layout.
+    """
+    return name.startswith(folder) and bool(SHARD_PATTERN.match(name[len(folder) :]))
+
+
+def flat_name(name):
+    """
+    Removes the subfolders of the sharded layout from a storage name, e.g. to name the
+    file in an archive.
+
+    Args:
+        name (str): The storage name, e.g. "thumbnails/3f/a9/vasija.png".
+
+    Returns:
+        str: The name without subfolders, e.g. "thumbnails/vasija.png".
+    """
+    return SHARD_FOLDERS.sub("", name)
+
+
+def media_lookup(field_name, folder, filename):
+    """
+    Builds the lookup of a file by its name, in the sharded or the flat layout.
+
+    Suffixed names, e.g. "vasija_1a2b3c4.png", are in the subfolders of the name they
+    were suffixed from, so they are matched by their ending.
+
+    Args:
+        field_name (str): The name of the file field, e.g. "path".
+        folder (str): The folder of the file, e.g. "thumbnails/".
+        filename (str): The name of the file, without folders.
+
+    Returns:
+        Q: The lookup.
+    """
+    return Q(**{field_name: f"{folder}{filename}"}) | Q(
+        **{
+            f"{field_name}__startswith": folder,
+            f"{field_name}__endswith": f"/{filename}",
+        }
+    )
+
+
+@deconstructible
+class ShardedPath:
+    """
+    Upload path of a file field, in subfolders named after the file name.
+
+    A field can be stored next to another file field of the same row, its sibling, e.g.
+    the texture of a 3D model next to its material. When the sibling is already stored
+    in the same folder, the file is placed in its subfolders instead.
+
+    Attributes:
+        folder (str): The folder of the files, e.g. "thumbnails/".
+        sibling (str): The name of the file field the files are stored next to, or
+            None.
+    """
+
+    def __init__(self, folder, sibling=None):
+        self.folder = folder
+        self.sibling = sibling
+
+    def __call__(self, instance, filename):
+        """
+        Builds the storage name of an uploaded file.
+
+        Args:
+            instance (Model): The row the file belongs to.
+            filename (str): The name of the uploaded file.
+
+        Returns:
+            str: The storage name.
+        """
+        filename = os.path.basename(filename)
+        if self.sibling is not None and instance is not None:
+            sibling = getattr(instance, self.sibling)
+            if sibling and sibling._committed and sibling.name.startswith(self.folder):
+                return f"{posixpath.dirname(sibling.name)}/{filename}"
+        return shard_name(self.folder, filename)
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, ShardedPath)
+            and self.folder == other.folder
+            and self.sibling == other.sibling
+        )
@@ -0,0 +1,8 @@
+"""
+Tests of the piezas application.
+
+They need PostgreSQL, like the application, and store the media files in a temporary
+folder. Run them from the folder that contains `manage.py` with:
+
+    python manage.py test piezas
+"""
@@ -0,0 +1,102 @@
+"""
+Tests of the cached download archives of the artifacts.
+"""
+
+import os
+import zipfile
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.http import QueryDict
+from django.utils.datastructures import MultiValueDict
+from piezas import archives
+from piezas.models import Artifact
+from piezas.views import ArtifactCreateUpdateAPIView
+from .utils import MediaTestCase, create_artifact, png_bytes
+
+
+class ArchiveCacheTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.artifact = self.load(create_artifact("Vasija roja", images=1).id)
+
+    def load(self, pk):
+        return (
+            Artifact.objects.select_related("id_thumbnail", "id_model")
+            .prefetch_related("images")
+            .get(pk=pk)
+        )
+
+    def test_archive_is_built_once(self):
+        with mock.patch.object(
+            archives, "stream_zip", wraps=archives.stream_zip
+        ) as stream_zip:
+            path = archives.cached_archive(self.artifact)
+            self.assertEqual(archives.cached_archive(self.artifact), path)
+
+        self.assertEqual(stream_zip.call_count, 1)
+        self.assertEqual(archives.current_archive_path(self.artifact), path)
+        with zipfile.ZipFile(path) as archive:
+            names = archive.namelist()
+        self.assertEqual(names, sorted(names))
+        self.assertEqual(len(names), 5)
+
+    def test_archive_name_follows_the_files(self):
+        path = archives.cached_archive(self.artifact)
+
+        texture = self.artifact.id_model.texture.path
+        stat = os.stat(texture)
+        os.utime(texture, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        self.assertNotEqual(archives.current_archive_path(self.artifact), path)
+
+    def test_rebuilt_archive_has_the_same_bytes(self):
+        path = archives.cached_archive(self.artifact)
+        with open(path, "rb") as file:
+            content = file.read()
+        os.remove(path)
+
+        with open(archives.cached_archive(self.artifact), "rb") as file:
+            self.assertEqual(file.read(), content)
+
+    def test_uploads_discard_the_outdated_archive(self):
+        path = archives.cached_archive(self.artifact)
+        data = QueryDict(mutable=True)
+        data["thumbnail"] = self.artifact.id_thumbnail.path.name
+        data.setlist(
+            "images", [image.path.name for image in self.artifact.images.all()]
+        )
+        files = MultiValueDict(
+            {"new_images": [SimpleUploadedFile("nueva.png", png_bytes("black"))]}
+        )
+
+        instance = Artifact.objects.get(pk=self.artifact.id)
+
+        ArtifactCreateUpdateAPIView().handle_file_uploads(instance, files, data)
+
+        self.assertFalse(os.path.exists(path))
+        self.assertNotEqual(archives.current_archive_path(instance), path)
+
+    def test_warm_archives(self):
+        other = create_artifact("Plato negro")
+        Artifact.objects.create(description="Sin modelo")
+
+        call_command("warmArchives", other.id)
+
+        self.assertFalse(os.path.exists(archives.current_archive_path(self.artifact)))
+        path = archives.current_archive_path(self.load(other.id))
+        with zipfile.ZipFile(path) as archive:
+            self.assertIsNone(archive.testzip())
+
+        call_command("warmArchives")
+
+        self.assertTrue(os.path.exists(archives.current_archive_path(self.artifact)))
+
+    def test_archive_has_the_files_of_the_artifact(self):
+        path = archives.cached_archive(self.artifact)
+
+        with open(self.artifact.id_model.object.path, "rb") as file:
+            content = file.read()
+        with zipfile.ZipFile(path) as archive:
+            names = [name for name in archive.namelist() if name.endswith(".obj")]
+            self.assertEqual(archive.read(names[0]), content)
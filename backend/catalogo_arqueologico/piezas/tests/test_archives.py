@@ -0,0 +1,80 @@
+"""
+Tests of the streamed ZIP archives of the downloads (`piezas.archives`).
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest import mock
+from django.test import SimpleTestCase
+from piezas import archives
+
+
+class StreamZipTests(SimpleTestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder, ignore_errors=True)
+        self.files = {
+            "model/vasija.obj": b"v 0 0 0\n" * 5000,
+            "model/vasija.mtl": b"newmtl vasija\nmap_Kd vasija.png\n",
+            "model/vasija.png": os.urandom(3000),
+            "thumbnail/vasija.jpg": os.urandom(200),
+        }
+        self.entries = []
+        for arcname, content in self.files.items():
+            path = os.path.join(self.folder, arcname.replace("/", "_"))
+            with open(path, "wb") as file:
+                file.write(content)
+            self.entries.append((path, arcname))
+
+    def archive(self, **kwargs):
+        return b"".join(archives.stream_zip(self.entries, **kwargs))
+
+    def test_archive_holds_every_file(self):
+        with zipfile.ZipFile(io.BytesIO(self.archive(chunk_size=1024))) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(archive.namelist(), list(self.files))
+            for arcname, content in self.files.items():
+                self.assertEqual(archive.read(arcname), content)
+
+    def test_compressed_files_are_stored(self):
+        with zipfile.ZipFile(io.BytesIO(self.archive())) as archive:
+            methods = {info.filename: info.compress_type for info in archive.infolist()}
+
+        self.assertEqual(
+            methods,
+            {
+                "model/vasija.obj": zipfile.ZIP_DEFLATED,
+                "model/vasija.mtl": zipfile.ZIP_DEFLATED,
+                "model/vasija.png": zipfile.ZIP_STORED,
+                "thumbnail/vasija.jpg": zipfile.ZIP_STORED,
+            },
+        )
+
+    def test_archive_is_streamed_in_chunks(self):
+        chunks = list(archives.stream_zip(self.entries, chunk_size=1024))
+
+        self.assertGreater(len(chunks), len(self.entries))
+        self.assertLess(max(len(chunk) for chunk in chunks), 8 * 1024)
+
+    def test_archive_is_deterministic(self):
+        self.assertEqual(self.archive(), self.archive())
+
+    def test_read_ahead_builds_the_same_archive(self):
+        expected = self.archive()
+
+        self.assertEqual(self.archive(workers=2, window=2), expected)
+        with mock.patch.object(archives, "READ_AHEAD_MAX_BYTES", 1000):
+            self.assertEqual(self.archive(workers=2, window=2), expected)
+
+    def test_out_of_range_times_are_clamped(self):
+        path = self.entries[0][0]
+        os.utime(path, (0, 0))
+
+        with zipfile.ZipFile(io.BytesIO(self.archive())) as archive:
+            info = archive.getinfo(self.entries[0][1])
+
+        self.assertEqual(info.date_time, archives.ZIP_MIN_DATE_TIME)
+        self.assertEqual(archives.zip_date_time(2**33), archives.ZIP_MAX_DATE_TIME)
@@ -0,0 +1,58 @@
+"""
+Tests of the coalesced builds of the cached files (`piezas.mediacache.build_once`).
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from django.test import SimpleTestCase
+from piezas.mediacache import build_once, discard
+
+
+class BuildOnceTests(SimpleTestCase):
+    def setUp(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder, ignore_errors=True)
+        self.path = os.path.join(folder, "archives", "pieza.zip")
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        # Long enough for every thread to be waiting for the lock
+        time.sleep(0.2)
+        yield b"contenido"
+
+    def test_concurrent_builds_are_coalesced(self):
+        threads = [
+            threading.Thread(target=build_once, args=(self.path, self.build))
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.builds, 1)
+        with open(self.path, "rb") as file:
+            self.assertEqual(file.read(), b"contenido")
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ["pieza.zip"])
+
+    def test_failed_build_leaves_nothing(self):
+        def build():
+            yield b"parte"
+            raise OSError("disco lleno")
+
+        with self.assertRaises(OSError):
+            build_once(self.path, build)
+
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), [])
+
+    def test_discard(self):
+        build_once(self.path, self.build)
+
+        self.assertTrue(discard(self.path))
+        self.assertFalse(discard(self.path))
+        self.assertEqual(build_once(self.path, self.build), self.path)
+        self.assertEqual(self.builds, 2)
@@ -0,0 +1,115 @@
+"""
+Tests of the download of several artifacts in one archive
+(`ArtifactBulkDownloadAPIView`).
+"""
+
+import io
+import zipfile
+from django.test import override_settings
+from piezas.models import ArtifactRequester, Culture, Institution
+from rest_framework.test import APIClient
+from .utils import MediaTestCase, create_artifact
+
+
+class BulkDownloadTests(MediaTestCase):
+    url = "/api/catalog/artifacts/download"
+
+    def setUp(self):
+        super().setUp()
+        self.inca = Culture.objects.create(name="Inca")
+        self.artifacts = [
+            create_artifact("Vasija roja", culture=self.inca, images=1),
+            create_artifact("Plato negro", culture=self.inca),
+            create_artifact("Jarro blanco"),
+        ]
+        self.institution = Institution.objects.create(name="Museo")
+        self.requester = {
+            "fullName": "Ana Pérez",
+            "rut": "123456785",
+            "email": "ana@example.com",
+            "institution": self.institution.id,
+        }
+        self.client = APIClient()
+
+    def post(self, body, format="json"):
+        return self.client.post(self.url, {**self.requester, **body}, format=format)
+
+    def archive_folders(self, response):
+        content = b"".join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertIsNone(archive.testzip())
+            return sorted({name.split("/")[0] for name in archive.namelist()})
+
+    def test_download_by_ids(self):
+        ids = [self.artifacts[0].id, self.artifacts[2].id]
+
+        response = self.post({"ids": ids})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.archive_folders(response), [f"artifact_{pk}" for pk in ids]
+        )
+        self.assertEqual(
+            sorted(ArtifactRequester.objects.values_list("artifact_id", flat=True)), ids
+        )
+
+    def test_download_by_comma_separated_ids(self):
+        ids = [self.artifacts[0].id, self.artifacts[1].id]
+
+        response = self.post({"ids": f"{ids[0]},{ids[1]}"}, format="multipart")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ArtifactRequester.objects.count(), 2)
+
+    def test_download_by_filters(self):
+        response = self.post({"culture": "Inca"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.archive_folders(response),
+            [f"artifact_{artifact.id}" for artifact in self.artifacts[:2]],
+        )
+
+    def test_invalid_bodies(self):
+        for body in (
+            {"ids": ["uno"]},
+            {"ids": [2**63]},
+            {"ids": [0]},
+            {"tags": ["rojo", "negro"]},
+            {"query": {"text": "vasija"}},
+            {"rut": "1" * 20},
+            {"fullName": "A" * 51},
+            {"email": "correo"},
+            {"institution": 2**64},
+        ):
+            with self.subTest(body=body):
+                response = self.post(body)
+
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("detail", response.data)
+        self.assertFalse(ArtifactRequester.objects.exists())
+
+    def test_requester_is_required(self):
+        self.requester = {}
+
+        response = self.post({"ids": [self.artifacts[0].id]})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_no_artifacts(self):
+        response = self.post({"culture": "Maya"})
+
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(BULK_DOWNLOAD_MAX_ARTIFACTS=2)
+    def test_too_many_artifacts(self):
+        response = self.post({"ids": [artifact.id for artifact in self.artifacts]})
+
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(BULK_DOWNLOAD_MAX_BYTES=10)
+    def test_too_large(self):
+        response = self.post({"ids": [self.artifacts[0].id]})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ArtifactRequester.objects.exists())
@@ -0,0 +1,84 @@
+"""
+Tests of the catalog read model (`piezas.catalog`) and the signals that maintain it.
+"""
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from piezas.cache import get_cache
+from piezas.models import ArtifactCatalogEntry, Culture, Image, Shape, Tag
+from rest_framework.test import APIClient
+from .utils import MediaTestCase, create_artifact, png_bytes
+
+
+class CatalogEntryTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.shape = Shape.objects.create(name="Vasija")
+        self.culture = Culture.objects.create(name="Diaguita")
+        self.tag = Tag.objects.create(name="Rojo")
+        self.artifact = create_artifact(
+            "Vasija roja", self.shape, self.culture, [self.tag], images=1
+        )
+
+    def entry(self):
+        return ArtifactCatalogEntry.objects.get(artifact=self.artifact)
+
+    def test_entry_is_created_with_the_artifact(self):
+        entry = self.entry()
+
+        self.assertEqual(entry.attributes["description"], "Vasija roja")
+        self.assertEqual(entry.attributes["shape"]["value"], "Vasija")
+        self.assertEqual(entry.attributes["culture"]["value"], "Diaguita")
+        self.assertEqual([tag["value"] for tag in entry.attributes["tags"]], ["Rojo"])
+        self.assertEqual(entry.thumbnail, self.artifact.id_thumbnail.path.name)
+        self.assertEqual(entry.model["object"], self.artifact.id_model.object.name)
+        self.assertEqual(len(entry.images), 1)
+
+    def test_entry_follows_the_related_rows(self):
+        self.shape.name = "Plato"
+        self.shape.save()
+        negro = Tag.objects.create(name="Negro")
+        self.artifact.id_tags.add(negro)
+        self.culture.delete()
+
+        attributes = self.entry().attributes
+        self.assertEqual(attributes["shape"]["value"], "Plato")
+        self.assertEqual(
+            [tag["value"] for tag in attributes["tags"]], ["Rojo", "Negro"]
+        )
+        self.assertIsNone(attributes["culture"])
+
+    def test_entry_follows_the_images(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = Image.objects.create(
+                id_artifact=self.artifact,
+                path=ContentFile(png_bytes("black"), name="nueva.png"),
+            )
+        self.assertEqual(self.entry().images[-1], image.path.name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.delete()
+        self.assertEqual(len(self.entry().images), 1)
+
+    def test_entry_is_deleted_with_the_artifact(self):
+        self.artifact.delete()
+
+        self.assertFalse(ArtifactCatalogEntry.objects.exists())
+
+    def test_rebuild(self):
+        ArtifactCatalogEntry.objects.all().delete()
+
+        call_command("rebuildCatalog", batch_size=1)
+
+        self.assertEqual(self.entry().attributes["description"], "Vasija roja")
+
+    def test_detail_is_the_same_without_entry(self):
+        client = APIClient()
+        url = f"/api/catalog/artifact/{self.artifact.id}/"
+        with_entry = client.get(url).data
+
+        ArtifactCatalogEntry.objects.all().delete()
+        get_cache().clear()
+        without_entry = client.get(url).data
+
+        self.assertEqual(with_entry, without_entry)
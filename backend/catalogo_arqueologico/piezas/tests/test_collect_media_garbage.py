@@ -0,0 +1,133 @@
+"""
+Tests of the collectMediaGarbage management command.
+"""
+
+import hashlib
+import os
+import time
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from piezas.management.commands.collectMediaGarbage import Command, referenced_names
+from piezas.models import Artifact, Thumbnail
+from .utils import MediaTestCase
+
+LOGGER = "piezas.management.commands.collectMediaGarbage"
+
+# Content of the unused file, big enough to show in the freed space
+UNUSED_CONTENT = b"x" * 1024**2
+
+
+class CollectMediaGarbageTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.used = Thumbnail.objects.create(path=ContentFile(b"used", name="used.png"))
+        Artifact.objects.create(description="Vasija", id_thumbnail=self.used)
+        self.unused = Thumbnail.objects.create(
+            path=ContentFile(b"unused row", name="unused.png")
+        )
+        self.orphan = default_storage.save(
+            "thumbnails/orphan.png", ContentFile(UNUSED_CONTENT)
+        )
+
+    def collect(self, *args):
+        """
+        Runs the command and returns its summary: the last line of its log.
+        """
+        with self.assertLogs(LOGGER, "INFO") as logs:
+            call_command("collectMediaGarbage", *args)
+        return logs.records[-1].getMessage()
+
+    def blob_exists(self, content):
+        """
+        Checks whether the blob of a content is stored.
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        return default_storage.exists(default_storage.blob_name(digest))
+
+    def test_grace_period_keeps_recent_rows_and_files(self):
+        self.collect()
+
+        self.assertTrue(Thumbnail.objects.filter(pk=self.unused.pk).exists())
+        self.assertTrue(default_storage.exists(self.unused.path.name))
+        self.assertTrue(default_storage.exists(self.orphan))
+
+    def test_removes_unused_rows_files_and_blobs(self):
+        self.collect("--grace-hours", "0")
+
+        self.assertFalse(Thumbnail.objects.filter(pk=self.unused.pk).exists())
+        self.assertTrue(Thumbnail.objects.filter(pk=self.used.pk).exists())
+        self.assertFalse(default_storage.exists(self.unused.path.name))
+        self.assertFalse(default_storage.exists(self.orphan))
+        self.assertTrue(default_storage.exists(self.used.path.name))
+        self.assertFalse(self.blob_exists(b"unused row"))
+        self.assertFalse(self.blob_exists(UNUSED_CONTENT))
+        self.assertTrue(self.blob_exists(b"used"))
+
+    def test_last_link_of_a_blob_frees_its_space(self):
+        summary = self.collect("--grace-hours", "0")
+
+        self.assertIn("1.0 MiB were freed", summary)
+
+    def test_blob_linked_by_a_used_file_is_kept(self):
+        used = Thumbnail.objects.create(
+            path=ContentFile(UNUSED_CONTENT, name="copy.png")
+        )
+        Artifact.objects.create(description="Plato", id_thumbnail=used)
+
+        summary = self.collect("--grace-hours", "0")
+
+        self.assertFalse(default_storage.exists(self.orphan))
+        self.assertTrue(default_storage.exists(used.path.name))
+        self.assertIn("0.0 MiB were freed", summary)
+        with default_storage.open(used.path.name) as file:
+            self.assertEqual(file.read(), UNUSED_CONTENT)
+
+    def test_file_referenced_again_is_kept(self):
+        command = Command()
+        command.dry_run = False
+        command.file_cutoff = time.time()
+        command.links = {}
+        files = command.unused_files("thumbnails/", referenced_names())
+        self.assertEqual([name for _, name, _ in files], [self.orphan])
+
+        # An upload starts using the file after it was listed
+        Thumbnail.objects.create(path=self.orphan)
+        removed, _ = command.remove(files, True)
+
+        self.assertEqual(removed, 0)
+        self.assertTrue(default_storage.exists(self.orphan))
+
+    def test_dry_run_reports_what_the_run_removes(self):
+        names = sorted(
+            os.path.join(directory, name)
+            for directory, _, files in os.walk(default_storage.path(""))
+            for name in files
+        )
+        with self.assertLogs(LOGGER, "INFO") as dry_run:
+            call_command("collectMediaGarbage", "--dry-run", "--grace-hours", "0")
+
+        self.assertEqual(
+            names,
+            sorted(
+                os.path.join(directory, name)
+                for directory, _, files in os.walk(default_storage.path(""))
+                for name in files
+            ),
+        )
+        self.assertTrue(Thumbnail.objects.filter(pk=self.unused.pk).exists())
+
+        with self.assertLogs(LOGGER, "INFO") as run:
+            call_command("collectMediaGarbage", "--grace-hours", "0")
+
+        self.assertEqual(
+            [
+                record.getMessage().replace("would be", "were")
+                for record in dry_run.records
+            ],
+            [record.getMessage() for record in run.records],
+        )
+        self.assertIn(
+            "1 unused Thumbnail rows were deleted",
+            [record.getMessage() for record in run.records],
+        )
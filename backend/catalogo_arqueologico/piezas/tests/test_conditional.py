@@ -0,0 +1,80 @@
+"""
+Tests of the conditional GET support of the public read views (`piezas.conditional`).
+"""
+
+from django.core.files.base import ContentFile
+from piezas.models import Artifact, Institution, Model, Shape
+from rest_framework.test import APIClient
+from .utils import MediaTestCase
+
+
+class ConditionalResponseTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        model = Model.objects.create(
+            texture=ContentFile(b"texture", name="vasija.png"),
+            object=ContentFile(b"object", name="vasija.obj"),
+            material=ContentFile(b"material", name="vasija.mtl"),
+        )
+        self.artifact = Artifact.objects.create(description="Vasija", id_model=model)
+        self.client = APIClient()
+
+    def assertRevalidates(self, url):
+        """
+        Checks that a response carries validators and that sending them back returns
+        an empty 304 response.
+        """
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("no-cache", response["Cache-Control"])
+        etag = response["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 304)
+        return etag
+
+    def test_catalog(self):
+        self.assertRevalidates("/api/catalog/artifacts/")
+
+    def test_artifact(self):
+        self.assertRevalidates(f"/api/catalog/artifact/{self.artifact.id}/")
+
+    def test_metadata_and_institutions(self):
+        Shape.objects.create(name="Vasija")
+        Institution.objects.create(name="Museo")
+        self.assertRevalidates("/api/catalog/metadata/")
+        self.assertRevalidates("/api/catalog/institutions/")
+
+    def test_etag_depends_on_the_query(self):
+        etag = self.assertRevalidates("/api/catalog/artifacts/")
+
+        response = self.client.get(
+            "/api/catalog/artifacts/", {"page": 2}, HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertNotEqual(response.status_code, 304)
+
+    def test_change_invalidates_the_etag(self):
+        url = f"/api/catalog/artifact/{self.artifact.id}/"
+        etag = self.assertRevalidates(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.artifact.description = "Vasija pintada"
+            self.artifact.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["attributes"]["description"], "Vasija pintada")
+
+    def test_missing_artifact(self):
+        response = self.client.get("/api/catalog/artifact/0/", HTTP_IF_NONE_MATCH="*")
+
+        self.assertEqual(response.status_code, 404)
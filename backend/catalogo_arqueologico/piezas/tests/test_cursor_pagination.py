@@ -0,0 +1,100 @@
+"""
+Tests of the keyset (cursor) pagination of the catalog.
+"""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from piezas.models import Artifact
+from rest_framework.test import APIClient
+from .utils import MediaTestCase
+
+
+class CursorPaginationTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.artifacts = [
+            Artifact.objects.create(description=f"Pieza {index:02}")
+            for index in range(20)
+        ]
+        self.client = APIClient()
+
+    def walk(self, params):
+        """
+        Follows the next links from the first page, and returns the ids of every page.
+        """
+        pages = []
+        response = self.client.get("/api/catalog/artifacts/", params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append([artifact["id"] for artifact in response.data["data"]])
+            if response.data["next"] is None:
+                return pages
+            response = self.client.get(response.data["next"])
+
+    def test_pages_follow_the_ids(self):
+        pages = self.walk({"pagination": "cursor"})
+
+        self.assertEqual([len(page) for page in pages], [9, 9, 2])
+        self.assertEqual(sum(pages, []), [artifact.id for artifact in self.artifacts])
+
+    def test_sort_keys(self):
+        pages = self.walk({"pagination": "cursor", "sort": "-description"})
+        descending = sum(pages, [])
+
+        self.assertEqual(
+            descending, [artifact.id for artifact in reversed(self.artifacts)]
+        )
+
+    def test_unknown_sort_key_sorts_by_id(self):
+        pages = self.walk({"pagination": "cursor", "sort": "search_vector"})
+
+        self.assertEqual(sum(pages, []), [artifact.id for artifact in self.artifacts])
+
+    def test_total(self):
+        response = self.client.get("/api/catalog/artifacts/", {"pagination": "cursor"})
+        self.assertEqual(response.data["total"], 20)
+
+        response = self.client.get(
+            "/api/catalog/artifacts/", {"pagination": "cursor", "count": "false"}
+        )
+        self.assertIsNone(response.data["total"])
+
+    def test_total_is_cached_across_pages(self):
+        response = self.client.get("/api/catalog/artifacts/", {"pagination": "cursor"})
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(response.data["next"])
+
+        self.assertEqual(response.data["total"], 20)
+        self.assertFalse(
+            any("COUNT(" in query["sql"].upper() for query in queries.captured_queries)
+        )
+
+    def test_deep_pages_do_not_use_offset(self):
+        response = self.client.get("/api/catalog/artifacts/", {"pagination": "cursor"})
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(response.data["next"])
+
+        self.assertFalse(
+            any("OFFSET" in query["sql"] for query in queries.captured_queries)
+        )
+
+    def test_search_is_not_paginated_by_cursor(self):
+        response = self.client.get(
+            "/api/catalog/artifacts/", {"pagination": "cursor", "query": "pieza"}
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("detail", response.data)
+
+    def test_search_is_paginated_by_page(self):
+        response = self.client.get("/api/catalog/artifacts/", {"query": "pieza"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total"], 20)
+
+    def test_empty_search_is_paginated_by_cursor(self):
+        pages = self.walk({"pagination": "cursor", "query": " "})
+
+        self.assertEqual(len(sum(pages, [])), 20)
@@ -0,0 +1,84 @@
+"""
+Tests of the resized variants of the thumbnails and images (`piezas.assets`).
+"""
+
+import io
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import override_settings
+from PIL import Image as PILImage
+from piezas.assets import available_formats, build_variants, process_image_assets
+from piezas.models import Image, Thumbnail
+from rest_framework.test import APIClient
+from .utils import MediaTestCase, create_artifact, png_bytes
+
+
+@override_settings(DERIVATIVE_WIDTHS=(8, 16, 64), DERIVATIVE_FORMATS=("webp", "bmp3"))
+class DerivativeTests(MediaTestCase):
+    def test_variants_are_never_enlarged(self):
+        name = default_storage.save("vasija.png", ContentFile(png_bytes(size=(20, 10))))
+
+        variants = build_variants(name)
+
+        # Formats Pillow can not encode are skipped
+        self.assertEqual(list(variants), ["webp"])
+        self.assertEqual(list(variants["webp"]), ["8w", "16w"])
+        with default_storage.open(variants["webp"]["8w"]) as file:
+            self.assertEqual(PILImage.open(file).size, (8, 4))
+
+    def test_small_images_keep_their_width(self):
+        name = default_storage.save("vasija.png", ContentFile(png_bytes(size=(4, 4))))
+
+        self.assertEqual(list(build_variants(name)["webp"]), ["4w"])
+
+    def test_rotated_images(self):
+        buffer = io.BytesIO()
+        exif = PILImage.Exif()
+        exif[0x0112] = 6
+        PILImage.new("RGB", (20, 10), "red").save(buffer, "JPEG", exif=exif)
+        name = default_storage.save("vasija.jpg", ContentFile(buffer.getvalue()))
+
+        variants = build_variants(name)
+
+        with default_storage.open(variants["webp"]["8w"]) as file:
+            self.assertEqual(PILImage.open(file).size, (8, 16))
+
+    def test_thumbnail_variants_and_preview(self):
+        artifact = create_artifact("Vasija roja")
+        thumbnail = artifact.id_thumbnail
+
+        variants = process_image_assets(thumbnail)
+
+        thumbnail.refresh_from_db()
+        self.assertEqual(thumbnail.variants, variants)
+        self.assertEqual((thumbnail.width, thumbnail.height), (4, 4))
+        self.assertEqual(thumbnail.dominant_color, "#0000ff")
+        self.assertTrue(thumbnail.placeholder.startswith("data:image/"))
+
+        response = APIClient().get("/api/catalog/artifacts/")
+        srcset = response.data["data"][0]["thumbnail_variants"]
+        self.assertEqual(list(srcset), ["webp"])
+        self.assertTrue(srcset["webp"]["4w"].startswith("http://testserver/"))
+
+    def test_unreadable_images_are_skipped(self):
+        thumbnail = Thumbnail.objects.create(
+            path=ContentFile(b"no es una imagen", name="roto.png")
+        )
+
+        with self.assertLogs("piezas.assets", "WARNING"):
+            self.assertEqual(process_image_assets(thumbnail), {})
+
+        thumbnail.refresh_from_db()
+        self.assertEqual(thumbnail.variants, {})
+
+    def test_build_derivatives(self):
+        artifact = create_artifact("Vasija roja", images=2)
+
+        command = "piezas.management.commands.buildDerivatives"
+        with self.assertLogs(command, "INFO"):
+            call_command("buildDerivatives", workers=2, batch_size=1)
+
+        self.assertNotEqual(Thumbnail.objects.get().variants, {})
+        for image in Image.objects.filter(id_artifact=artifact):
+            self.assertEqual(list(image.variants), available_formats())
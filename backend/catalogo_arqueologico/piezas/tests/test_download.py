@@ -0,0 +1,98 @@
+"""
+Tests of the download of the archive of an artifact (`ArtifactDownloadAPIView`).
+"""
+
+import io
+import zipfile
+from django.conf import settings
+from django.test import override_settings
+from piezas.models import ArtifactRequester, Institution
+from rest_framework.test import APIClient
+from .utils import MediaTestCase, create_artifact
+
+
+class ArtifactDownloadTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.artifact = create_artifact("Vasija roja", images=1)
+        self.institution = Institution.objects.create(name="Museo")
+        self.client = APIClient()
+        self.url = f"/api/catalog/artifact/{self.artifact.id}/download"
+
+    def request_download(self, artifact=None):
+        artifact = artifact or self.artifact
+        response = self.client.post(
+            f"/api/catalog/artifact/{artifact.id}/download",
+            {
+                "fullName": "Ana Pérez",
+                "rut": "123456785",
+                "email": "ana@example.com",
+                "comments": "Investigación",
+                "institution": self.institution.id,
+            },
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.data["token"]
+
+    def test_download_requires_a_token(self):
+        for params in ({}, {"token": "falso"}):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+
+                self.assertEqual(response.status_code, 403)
+                self.assertIn("detail", response.data)
+
+    def test_download_with_a_token(self):
+        token = self.request_download()
+
+        response = self.client.get(self.url, {"token": token})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ArtifactRequester.objects.get().artifact, self.artifact)
+        content = b"".join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertEqual(len(archive.namelist()), 5)
+
+    def test_token_of_another_artifact(self):
+        other = create_artifact("Plato negro")
+        token = self.request_download(other)
+
+        response = self.client.get(self.url, {"token": token})
+
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(DOWNLOAD_TOKEN_MAX_AGE=-1)
+    def test_expired_token(self):
+        token = self.request_download()
+
+        response = self.client.get(self.url, {"token": token})
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_resumed_download(self):
+        token = self.request_download()
+
+        response = self.client.get(self.url, {"token": token}, HTTP_RANGE="bytes=10-")
+
+        self.assertEqual(response.status_code, 206)
+        full = self.client.get(self.url, {"token": token})
+        self.assertEqual(
+            b"".join(response.streaming_content), b"".join(full.streaming_content)[10:]
+        )
+
+    def test_download_sent_by_nginx(self):
+        token = self.request_download()
+
+        with override_settings(DOWNLOAD_ACCEL_REDIRECT=True):
+            response = self.client.get(self.url, {"token": token})
+            refused = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            response["X-Accel-Redirect"].startswith(
+                f"{settings.PROTECTED_MEDIA_URL}{settings.ARCHIVES_URL}"
+            )
+        )
+        self.assertEqual(refused.status_code, 403)
+        self.assertFalse(refused.has_header("X-Accel-Redirect"))
@@ -0,0 +1,110 @@
+"""
+Tests of the facet counts of the catalog (`piezas.facets`).
+"""
+
+from django.db import transaction
+from piezas.facets import facet_index, popcount
+from piezas.models import Artifact, Culture, Shape, Tag
+from rest_framework.test import APIClient
+from .utils import MediaTestCase
+
+
+class FacetIndexTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.diaguita = Culture.objects.create(name="Diaguita")
+        self.inca = Culture.objects.create(name="Inca")
+        self.vasija = Shape.objects.create(name="Vasija")
+        self.plato = Shape.objects.create(name="Plato")
+        self.rojo = Tag.objects.create(name="Rojo")
+        self.negro = Tag.objects.create(name="Negro")
+        self.artifacts = [
+            self.create("Vasija roja", self.diaguita, self.vasija, [self.rojo]),
+            self.create("Vasija negra", self.diaguita, self.vasija, [self.negro]),
+            self.create(
+                "Plato rojo y negro", self.inca, self.plato, [self.rojo, self.negro]
+            ),
+        ]
+        self.index = facet_index
+
+    def create(self, description, culture, shape, tags):
+        artifact = Artifact.objects.create(
+            description=description, id_culture=culture, id_shape=shape
+        )
+        artifact.id_tags.set(tags)
+        return artifact
+
+    def counts(self, data, key):
+        return {value["value"]: value["count"] for value in data[key]}
+
+    def test_counts_without_filters(self):
+        data = self.index.counts({})
+
+        self.assertEqual(self.counts(data, "cultures"), {"Diaguita": 2, "Inca": 1})
+        self.assertEqual(self.counts(data, "shapes"), {"Vasija": 2, "Plato": 1})
+        self.assertEqual(self.counts(data, "tags"), {"Rojo": 2, "Negro": 2})
+
+    def test_counts_ignore_the_filter_of_their_facet(self):
+        data = self.index.counts({"culture": {self.inca.id}})
+
+        self.assertEqual(self.counts(data, "cultures"), {"Diaguita": 2, "Inca": 1})
+        self.assertEqual(self.counts(data, "shapes"), {"Plato": 1})
+        self.assertEqual(self.counts(data, "tags"), {"Rojo": 1, "Negro": 1})
+
+    def test_tags_are_combined(self):
+        data = self.index.counts({"tag": [{self.rojo.id}, {self.negro.id}]})
+
+        self.assertEqual(self.counts(data, "cultures"), {"Inca": 1})
+
+    def test_counts_within_matches(self):
+        matches = [self.artifacts[0].id, self.artifacts[2].id, 10**12]
+        data = self.index.counts({}, matches)
+
+        self.assertEqual(self.counts(data, "cultures"), {"Diaguita": 1, "Inca": 1})
+        self.assertEqual(self.counts(data, "tags"), {"Rojo": 2, "Negro": 1})
+
+    def test_positions_are_dense_and_reused(self):
+        self.index.rebuild()
+        self.assertEqual(sorted(self.index.positions.values()), [0, 1, 2])
+
+        # The signal handlers update the index in place once the changes are committed
+        deleted = self.artifacts[1]
+        position = self.index.positions[deleted.id]
+        with self.captureOnCommitCallbacks(execute=True):
+            deleted.delete()
+            added = self.create("Vasija nueva", self.inca, self.vasija, [self.negro])
+
+        self.assertIsNotNone(self.index.generation)
+        self.assertEqual(self.index.positions[added.id], position)
+        self.assertEqual(self.index.everything.bit_length(), 3)
+        data = self.index.counts({})
+        self.assertEqual(self.counts(data, "cultures"), {"Inca": 2, "Diaguita": 1})
+        self.assertEqual(self.counts(data, "tags"), {"Rojo": 2, "Negro": 2})
+
+    def test_rolled_back_changes_are_not_indexed(self):
+        self.index.rebuild()
+        generation = self.index.generation
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.create("Vasija nueva", self.inca, self.vasija, [self.negro])
+                raise RuntimeError
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.index.generation, generation)
+        self.assertEqual(len(self.index.positions), 3)
+
+    def test_popcount(self):
+        for bitmap in (0, 1, 0b1011, (1 << 200) - 1, (1 << 1000) | 1):
+            with self.subTest(bitmap=bitmap):
+                self.assertEqual(popcount(bitmap), bin(bitmap).count("1"))
+
+    def test_catalog_facets(self):
+        response = APIClient().get(
+            "/api/catalog/artifacts/", {"facets": "true", "culture": "Inca"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        facets = response.data["facets"]
+        self.assertEqual(self.counts(facets, "cultures"), {"Diaguita": 2, "Inca": 1})
+        self.assertEqual(self.counts(facets, "shapes"), {"Plato": 1})
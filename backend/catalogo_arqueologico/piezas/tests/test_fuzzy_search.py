@@ -0,0 +1,72 @@
+"""
+Tests of the typo-tolerant matching of the catalog and the name suggestions
+(`piezas.search`).
+"""
+
+from piezas.models import Artifact, Culture, Shape, Tag
+from piezas.search import filter_catalog, search_artifacts, suggest_names
+from rest_framework.test import APIClient
+from .utils import MediaTestCase
+
+
+class FuzzySearchTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.diaguita = Culture.objects.create(name="Diaguita")
+        self.inca = Culture.objects.create(name="Inca")
+        self.vasija = Shape.objects.create(name="Vasija")
+        self.ceramica = Tag.objects.create(name="Cerámica")
+        self.pintada = Tag.objects.create(name="Pintada")
+        self.jarro = Artifact.objects.create(
+            description="Jarro zoomorfo con decoración pintada",
+            id_culture=self.diaguita,
+            id_shape=self.vasija,
+        )
+        self.jarro.id_tags.set([self.ceramica, self.pintada])
+        self.plato = Artifact.objects.create(
+            description="Plato de greda", id_culture=self.inca
+        )
+
+    def filter(self, **params):
+        return list(filter_catalog(Artifact.objects.order_by("id"), params))
+
+    def test_misspelled_description(self):
+        found = search_artifacts(Artifact.objects.all(), "zomorfo", fuzzy=True)
+
+        self.assertEqual(list(found), [self.jarro])
+        exact = search_artifacts(Artifact.objects.all(), "zomorfo")
+        self.assertEqual(list(exact), [])
+
+    def test_misspelled_names(self):
+        self.assertEqual(self.filter(culture="Diagita", fuzzy="true"), [self.jarro])
+        self.assertEqual(self.filter(shape="Vasijas", fuzzy="true"), [self.jarro])
+        self.assertEqual(
+            self.filter(tags="Pintadas,Ceramica", fuzzy="true"), [self.jarro]
+        )
+
+    def test_exact_names_ignore_case(self):
+        self.assertEqual(self.filter(culture="diaguita"), [self.jarro])
+        self.assertEqual(self.filter(culture="Diagita"), [])
+        self.assertEqual(self.filter(tags="PINTADA, Cerámica"), [self.jarro])
+
+    def test_suggest_names(self):
+        Culture.objects.create(name="Diaguita Inca")
+
+        suggestions = suggest_names(Culture, "Diagita")
+
+        self.assertEqual(suggestions[0], self.diaguita)
+        self.assertNotIn(self.inca, suggestions)
+        self.assertGreater(suggestions[0].similarity, suggestions[-1].similarity)
+
+    def test_suggestions_view(self):
+        response = APIClient().get(
+            "/api/catalog/metadata/suggestions/",
+            {"culture": "Diaguta", "tags": "Pintda", "query": "vasja"},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.data["data"]
+        self.assertEqual(data["culture"][0]["value"], "Diaguita")
+        self.assertEqual(data["tags"]["Pintda"][0]["value"], "Pintada")
+        self.assertEqual(data["query"]["shapes"][0]["value"], "Vasija")
+        self.assertNotIn("shape", data)
@@ -0,0 +1,166 @@
+"""
+Tests of the conversion of the 3D models to binary glTF (`piezas.gltf`).
+"""
+
+import json
+import struct
+import numpy as np
+from django.test import SimpleTestCase
+from piezas import gltf
+from piezas.assets import process_model_assets
+from piezas.meshes import Mesh
+from rest_framework.test import APIClient
+from .utils import MediaTestCase, create_artifact, png_bytes
+
+COMPONENTS = {"SCALAR": 1, "VEC2": 2, "VEC3": 3}
+DTYPES = {
+    gltf.BYTE: np.int8,
+    gltf.UNSIGNED_SHORT: np.uint16,
+    gltf.UNSIGNED_INT: np.uint32,
+    gltf.FLOAT: np.float32,
+}
+
+
+def read_glb(data):
+    """
+    Splits a GLB file into its JSON description and its binary chunk.
+    """
+    magic, version, length = struct.unpack_from("<III", data)
+    assert (magic, version, length) == (gltf.GLB_MAGIC, 2, len(data))
+    json_length, json_type = struct.unpack_from("<II", data, 12)
+    assert json_type == gltf.CHUNK_JSON
+    description = json.loads(data[20 : 20 + json_length])
+    bin_length, bin_type = struct.unpack_from("<II", data, 20 + json_length)
+    assert bin_type == gltf.CHUNK_BIN
+    start = 28 + json_length
+    return description, data[start : start + bin_length]
+
+
+def read_accessor(description, binary, index):
+    """
+    Reads the data of an accessor, as an array with one row per element.
+    """
+    accessor = description["accessors"][index]
+    view = description["bufferViews"][accessor["bufferView"]]
+    dtype = np.dtype(DTYPES[accessor["componentType"]])
+    components = COMPONENTS[accessor["type"]]
+    stride = view.get("byteStride", dtype.itemsize * components)
+    data = binary[view["byteOffset"] : view["byteOffset"] + view["byteLength"]]
+    rows = np.frombuffer(data, dtype=dtype).reshape(accessor["count"], -1)
+    assert rows.shape[1] * dtype.itemsize == stride
+    return rows[:, :components]
+
+
+def quad(uvs=True):
+    """
+    Builds a unit square made of two triangles.
+    """
+    positions = np.array([[0, 0, 0], [2, 0, 0], [2, 1, 0], [0, 1, 0]], np.float32)
+    normals = np.tile(np.array([0, 0, 1], np.float32), (4, 1))
+    coordinates = np.array([[0, 0], [1, 0], [1, 1], [0, 1]], np.float32)
+    indices = np.array([0, 1, 2, 0, 2, 3], np.uint32)
+    return Mesh(positions, normals, coordinates if uvs else None, [("barro", indices)])
+
+
+class BuildGlbTests(SimpleTestCase):
+    def test_float_attributes(self):
+        description, binary = read_glb(gltf.build_glb(quad()))
+
+        self.assertEqual(description["asset"]["version"], "2.0")
+        self.assertEqual(description["buffers"][0]["byteLength"], len(binary))
+        primitive = description["meshes"][0]["primitives"][0]
+        position = primitive["attributes"]["POSITION"]
+        positions = read_accessor(description, binary, position)
+        np.testing.assert_array_equal(positions, quad().positions)
+        accessor = description["accessors"][position]
+        self.assertEqual((accessor["min"], accessor["max"]), ([0, 0, 0], [2, 1, 0]))
+        indices = read_accessor(description, binary, primitive["indices"])
+        self.assertEqual(indices.dtype, np.uint16)
+        self.assertEqual(indices.reshape(-1).tolist(), [0, 1, 2, 0, 2, 3])
+        self.assertNotIn("extensionsUsed", description)
+
+    def test_quantized_attributes(self):
+        mesh = quad()
+        description, binary = read_glb(gltf.build_glb(mesh, quantize=True))
+
+        self.assertEqual(description["extensionsRequired"], ["KHR_mesh_quantization"])
+        attributes = description["meshes"][0]["primitives"][0]["attributes"]
+        node = description["nodes"][0]
+        positions = read_accessor(description, binary, attributes["POSITION"])
+        self.assertEqual(positions.dtype, np.uint16)
+        dequantized = positions * node["scale"][0] + node["translation"]
+        np.testing.assert_allclose(dequantized, mesh.positions, atol=1e-4)
+        normals = read_accessor(description, binary, attributes["NORMAL"])
+        self.assertEqual(normals.tolist(), [[0, 0, 127]] * 4)
+        uvs = read_accessor(description, binary, attributes["TEXCOORD_0"])
+        np.testing.assert_allclose(uvs / 65535, mesh.uvs, atol=1e-4)
+
+    def test_coordinates_outside_the_texture_are_not_quantized(self):
+        mesh = quad()
+        mesh.uvs = mesh.uvs * 2
+        description, _ = read_glb(gltf.build_glb(mesh, quantize=True))
+
+        attributes = description["meshes"][0]["primitives"][0]["attributes"]
+        accessor = description["accessors"][attributes["TEXCOORD_0"]]
+        self.assertEqual(accessor["componentType"], gltf.FLOAT)
+
+    def test_embedded_texture(self):
+        texture = png_bytes()
+        materials = {"barro": {"Kd": (1.0, 1.0, 1.0), "d": 1.0, "map_Kd": "a.png"}}
+        description, binary = read_glb(
+            gltf.build_glb(quad(), materials, (texture, "image/png"))
+        )
+
+        image = description["images"][0]
+        view = description["bufferViews"][image["bufferView"]]
+        start = view["byteOffset"]
+        self.assertEqual(binary[start : start + view["byteLength"]], texture)
+        self.assertEqual(image["mimeType"], "image/png")
+        material = description["materials"][0]
+        self.assertEqual(material["name"], "barro")
+        pbr = material["pbrMetallicRoughness"]
+        self.assertEqual(pbr["baseColorTexture"]["index"], 0)
+
+    def test_colored_material(self):
+        materials = {"barro": {"Kd": (0.5, 0.25, 0.0), "d": 0.5}}
+        description, _ = read_glb(
+            gltf.build_glb(quad(uvs=False), materials, (png_bytes(), "image/png"))
+        )
+
+        # Without texture coordinates the texture can not be applied
+        self.assertNotIn("images", description)
+        material = description["materials"][0]
+        self.assertEqual(
+            material["pbrMetallicRoughness"]["baseColorFactor"], [0.5, 0.25, 0.0, 0.5]
+        )
+        self.assertEqual(material["alphaMode"], "BLEND")
+
+    def test_large_meshes_use_32_bit_indices(self):
+        count = 70000
+        positions = np.random.default_rng(0).random((count, 3), dtype=np.float32)
+        normals = np.tile(np.array([0, 0, 1], np.float32), (count, 1))
+        indices = np.arange(count - count % 3, dtype=np.uint32)
+        mesh = Mesh(positions, normals, None, [(None, indices)])
+
+        description, binary = read_glb(gltf.build_glb(mesh))
+
+        primitive = description["meshes"][0]["primitives"][0]
+        read = read_accessor(description, binary, primitive["indices"])
+        self.assertEqual(read.dtype, np.uint32)
+        self.assertEqual(read[-1, 0], indices[-1])
+
+
+class ModelGlbTests(MediaTestCase):
+    def test_detail_links_the_glb_and_the_original_files(self):
+        artifact = create_artifact("Vasija roja")
+        process_model_assets(artifact.id_model)
+        url = f"/api/catalog/artifact/{artifact.id}/"
+
+        model = APIClient().get(url).data["model"]
+
+        self.assertTrue(model["glb"].endswith(".glb"))
+        self.assertTrue(model["object"].endswith(".obj"))
+        artifact.id_model.refresh_from_db()
+        with artifact.id_model.glb.open("rb") as file:
+            description, _ = read_glb(file.read())
+        self.assertIn("images", description)
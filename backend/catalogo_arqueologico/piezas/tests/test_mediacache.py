@@ -0,0 +1,116 @@
+"""
+Tests of the downloads of media files (`piezas.mediacache`).
+"""
+
+import os
+from django.conf import settings
+from django.test import RequestFactory
+from piezas.mediacache import parse_range, send_file
+from rest_framework.test import APIClient
+from .utils import MediaTestCase, create_artifact
+
+CONTENT = bytes(range(256)) * 4
+
+
+class ParseRangeTests(MediaTestCase):
+    def test_ranges(self):
+        cases = {
+            "bytes=0-9": (0, 9),
+            "bytes=1000-": (1000, 1023),
+            "bytes=1000-5000": (1000, 1023),
+            "bytes=-24": (1000, 1023),
+            "bytes=-5000": (0, 1023),
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(parse_range(header, len(CONTENT)), expected)
+
+    def test_ignored_ranges(self):
+        for header in ("bytes=0-1,5-6", "bytes=9-0", "bytes=-", "items=0-9", "0-9"):
+            with self.subTest(header=header):
+                self.assertIsNone(parse_range(header, len(CONTENT)))
+
+    def test_unsatisfiable_ranges(self):
+        for header in ("bytes=1024-", "bytes=-0"):
+            with self.subTest(header=header):
+                with self.assertRaises(ValueError):
+                    parse_range(header, len(CONTENT))
+
+
+class SendFileTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(settings.MEDIA_ROOT, "archivo.bin")
+        with open(self.path, "wb") as file:
+            file.write(CONTENT)
+
+    def send(self, **headers):
+        request = RequestFactory().get("/", **headers)
+        return send_file(self.path, "archivo.bin", request=request)
+
+    def test_whole_file(self):
+        response = self.send()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertIn("attachment", response["Content-Disposition"])
+
+    def test_range(self):
+        response = self.send(HTTP_RANGE="bytes=10-19")
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT[10:20])
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(CONTENT)}")
+        self.assertEqual(response["Content-Length"], "10")
+
+    def test_unsatisfiable_range(self):
+        response = self.send(HTTP_RANGE=f"bytes={len(CONTENT)}-")
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], f"bytes */{len(CONTENT)}")
+
+    def test_if_range_matches(self):
+        etag = self.send()["ETag"]
+
+        response = self.send(HTTP_RANGE="bytes=-4", HTTP_IF_RANGE=etag)
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT[-4:])
+
+    def test_if_range_of_an_outdated_file(self):
+        etag = self.send()["ETag"]
+        with open(self.path, "ab") as file:
+            file.write(b"more")
+
+        response = self.send(HTTP_RANGE="bytes=-4", HTTP_IF_RANGE=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT + b"more")
+
+
+class ModelFileDownloadTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.artifact = create_artifact("Vasija roja")
+        self.client = APIClient()
+
+    def test_resumed_texture_download(self):
+        url = f"/api/catalog/artifact/{self.artifact.id}/download/texture"
+        with open(self.artifact.id_model.texture.path, "rb") as file:
+            texture = file.read()
+
+        response = self.client.get(url, HTTP_RANGE="bytes=8-")
+
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(b"".join(response.streaming_content), texture[8:])
+
+    def test_unknown_file(self):
+        for pk, kind in ((self.artifact.id, "glb"), (0, "object")):
+            with self.subTest(pk=pk, kind=kind):
+                url = f"/api/catalog/artifact/{pk}/download/{kind}"
+
+                response = self.client.get(url)
+
+                self.assertEqual(response.status_code, 404)
@@ -0,0 +1,182 @@
+"""
+Tests of the reading and simplification of the 3D models (`piezas.meshes`).
+"""
+
+import os
+import shutil
+import tempfile
+import numpy as np
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase, override_settings
+from piezas.assets import process_model_assets
+from piezas.meshes import Mesh, compute_normals, parse_mtl, parse_obj, simplify
+from piezas.models import Artifact, Model
+from rest_framework.test import APIClient
+from .utils import MediaTestCase, png_bytes
+
+
+def grid_obj(size):
+    """
+    Builds the OBJ file of a wavy square of size x size cells, with texture coordinates.
+    """
+    lines = []
+    for row in range(size + 1):
+        for column in range(size + 1):
+            height = np.sin(row / 3) * np.cos(column / 3)
+            lines.append(f"v {column / size} {row / size} {height / size}")
+            lines.append(f"vt {column / size} {row / size}")
+    lines.append("usemtl barro")
+    for row in range(size):
+        for column in range(size):
+            first = row * (size + 1) + column + 1
+            quad = (first, first + 1, first + size + 2, first + size + 1)
+            lines.append("f " + " ".join(f"{index}/{index}" for index in quad))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def grid_mesh(size):
+    """
+    Builds the mesh of a flat square of size x size cells, with texture coordinates.
+    """
+    coordinates = np.linspace(0, 1, size + 1, dtype=np.float32)
+    xs, ys = np.meshgrid(coordinates, coordinates)
+    positions = np.stack([xs.ravel(), ys.ravel(), np.zeros(xs.size)], axis=1)
+    positions = positions.astype(np.float32)
+    triangles = []
+    for row in range(size):
+        for column in range(size):
+            first = row * (size + 1) + column
+            triangles.append((first, first + 1, first + size + 2))
+            triangles.append((first, first + size + 2, first + size + 1))
+    triangles = np.asarray(triangles, dtype=np.uint32)
+    return Mesh(
+        positions,
+        compute_normals(positions, triangles),
+        positions[:, :2].copy(),
+        [("barro", triangles.reshape(-1))],
+    )
+
+
+class ParseTests(SimpleTestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.folder, name)
+        with open(path, "wb") as file:
+            file.write(content)
+        return path
+
+    def test_polygons_are_split_into_triangles(self):
+        path = self.write(
+            "cuadrado.obj",
+            b"v 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\n"
+            b"vt 0 0\nvt 1 0\nvt 1 1\nvt 0 1\n"
+            b"usemtl barro\nf 1/1 2/2 3/3 4/4\nusemtl vidrio\nf -4/-4 -2/-2 -1/-1\n",
+        )
+
+        mesh = parse_obj(path)
+
+        self.assertEqual(mesh.vertex_count, 4)
+        self.assertEqual(mesh.triangle_count, 3)
+        self.assertEqual([name for name, _ in mesh.groups], ["barro", "vidrio"])
+        # The texture origin is moved to the top left
+        self.assertEqual(mesh.uvs[:, 1].tolist(), [1.0, 1.0, 0.0, 0.0])
+        np.testing.assert_allclose(mesh.normals, [[0, 0, 1]] * 4, atol=1e-6)
+
+    def test_texture_seams_split_vertices(self):
+        path = self.write(
+            "costura.obj",
+            b"v 0 0 0\nv 1 0 0\nv 0 1 0\nv 1 1 0\n"
+            b"vt 0 0\nvt 1 0\nvt 0 1\nvt 0.5 0.5\n"
+            b"f 1/1 2/2 3/3\nf 2/4 4/2 3/3\n",
+        )
+
+        mesh = parse_obj(path)
+
+        self.assertEqual(mesh.vertex_count, 5)
+
+    def test_invalid_files(self):
+        for content in (b"v 0 0 0\n", b"v 0 0 0\nv 1 0 0\nf 1 2 3\n"):
+            with self.subTest(content=content):
+                with self.assertRaises(ValueError):
+                    parse_obj(self.write("roto.obj", content))
+
+    def test_materials(self):
+        path = self.write(
+            "vasija.mtl",
+            b"# comentario\nKd 0 0 0\nnewmtl barro\nKd 0.5 0.25 0\nTr 0.25\n"
+            b"map_Kd -s 1 1 1 vasija.png\nnewmtl vidrio\nd 0.5\n",
+        )
+
+        materials = parse_mtl(path)
+
+        self.assertEqual(
+            materials,
+            {
+                "barro": {"Kd": (0.5, 0.25, 0.0), "d": 0.75, "map_Kd": "vasija.png"},
+                "vidrio": {"Kd": (1.0, 1.0, 1.0), "d": 0.5},
+            },
+        )
+
+    def test_parsed_grid(self):
+        mesh = parse_obj(self.write("grilla.obj", grid_obj(10)))
+
+        self.assertEqual(mesh.vertex_count, 121)
+        self.assertEqual(mesh.triangle_count, 200)
+
+
+class SimplifyTests(SimpleTestCase):
+    def test_meshes_within_the_budget_are_kept(self):
+        mesh = grid_mesh(4)
+
+        self.assertIs(simplify(mesh, mesh.triangle_count), mesh)
+
+    def test_budget_is_met(self):
+        mesh = grid_mesh(40)
+
+        for budget in (100, 500, 1000):
+            with self.subTest(budget=budget):
+                lod = simplify(mesh, budget)
+
+                self.assertLessEqual(lod.triangle_count, budget)
+                self.assertGreater(lod.triangle_count, budget // 4)
+                indices = lod.groups[0][1]
+                self.assertEqual(lod.groups[0][0], "barro")
+                self.assertLess(int(indices.max()), lod.vertex_count)
+                np.testing.assert_allclose(
+                    np.linalg.norm(lod.normals, axis=1), 1, atol=1e-5
+                )
+                np.testing.assert_allclose(
+                    lod.positions.min(axis=0), [0, 0, 0], atol=0.1
+                )
+                np.testing.assert_allclose(
+                    lod.positions.max(axis=0), [1, 1, 0], atol=0.1
+                )
+
+    def test_impossible_budget(self):
+        self.assertIsNone(simplify(grid_mesh(4), 0))
+
+
+@override_settings(LOD_TRIANGLE_BUDGETS=(50, 200, 5000))
+class ModelLodTests(MediaTestCase):
+    def test_detail_lists_the_simplified_versions(self):
+        model = Model.objects.create(
+            texture=ContentFile(png_bytes(), name="grilla.png"),
+            object=ContentFile(grid_obj(12), name="grilla.obj"),
+            material=ContentFile(
+                b"newmtl barro\nmap_Kd grilla.png\n", name="grilla.mtl"
+            ),
+        )
+        process_model_assets(model)
+        artifact = Artifact.objects.create(description="Grilla", id_model=model)
+
+        response = APIClient().get(f"/api/catalog/artifact/{artifact.id}/")
+
+        lods = response.data["model"]["lods"]
+        self.assertEqual(len(lods), 2)
+        self.assertLessEqual(lods[0]["triangles"], 50)
+        self.assertLessEqual(lods[1]["triangles"], 200)
+        self.assertLess(lods[0]["size"], lods[1]["size"])
+        self.assertTrue(all(lod["url"].endswith(".glb") for lod in lods))
@@ -0,0 +1,140 @@
+"""
+Tests of the statistics of the 3D models: the scan of their object files
+(`piezas.meshes.scan_obj`), `piezas.assets.measure_model` and the measureModels
+management command.
+"""
+
+import os
+import shutil
+import tempfile
+from unittest import mock
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connections
+from django.test import SimpleTestCase
+from piezas.assets import measure_model, process_model_assets
+from piezas.meshes import scan_obj
+from piezas.models import Artifact, Model
+from rest_framework.test import APIClient
+from .utils import MediaTestCase, png_bytes
+
+LOGGER = "piezas.management.commands.measureModels"
+
+# A quad and a triangle, with texture coordinates and normals that are not vertices
+OBJ_CONTENT = (
+    b"# Vasija\n"
+    b"v -1 0 2\nv 1 0 2\nv 1 3 2\nv -1 3 -0.5\nv 0 4 1e-1\n"
+    b"vt 0 0\nvt 1 0\nvn 0 0 1\n"
+    b"f 1 2 3 4\nf\t3 4 5\n"
+)
+
+
+class ScanObjTests(SimpleTestCase):
+    def setUp(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        self.path = os.path.join(folder, "vasija.obj")
+
+    def scan(self, content):
+        with open(self.path, "wb") as obj:
+            obj.write(content)
+        return scan_obj(self.path)
+
+    def test_counts_and_bounding_box(self):
+        self.assertEqual(
+            self.scan(OBJ_CONTENT),
+            {"vertices": 5, "faces": 2, "min": [-1, 0, -0.5], "max": [1, 4, 2]},
+        )
+
+    def test_lines_split_across_blocks(self):
+        with mock.patch("piezas.meshes.SCAN_BLOCK_SIZE", 7):
+            stats = self.scan(OBJ_CONTENT)
+
+        self.assertEqual(stats["vertices"], 5)
+        self.assertEqual(stats["faces"], 2)
+        self.assertEqual(stats["max"], [1, 4, 2])
+
+    def test_last_line_without_newline(self):
+        stats = self.scan(b"v 0 0 0\nv 2 1 1")
+
+        self.assertEqual(stats["vertices"], 2)
+        self.assertEqual(stats["max"], [2, 1, 1])
+
+    def test_file_without_vertices(self):
+        self.assertEqual(
+            self.scan(b"# Sin vertices\nf 1 2 3\n"),
+            {"vertices": 0, "faces": 1, "min": None, "max": None},
+        )
+
+    def test_invalid_coordinates(self):
+        with self.assertRaises(ValueError):
+            self.scan(b"v 0 0 0\nv 1 uno 0\n")
+
+
+class MeasureModelTests(MediaTestCase):
+    def create_model(self, texture=None):
+        return Model.objects.create(
+            object=ContentFile(OBJ_CONTENT, name="vasija.obj"),
+            material=ContentFile(b"newmtl barro\n", name="vasija.mtl"),
+            texture=ContentFile(texture or png_bytes(size=(8, 2)), name="vasija.png"),
+        )
+
+    def test_measure_model(self):
+        model = self.create_model()
+
+        measure_model(model)
+
+        self.assertEqual((model.vertex_count, model.face_count), (5, 2))
+        self.assertEqual(model.bounding_box_min, [-1, 0, -0.5])
+        self.assertEqual(model.object_size, len(OBJ_CONTENT))
+        self.assertEqual(model.material_size, len(b"newmtl barro\n"))
+        self.assertEqual(model.texture_size, len(png_bytes(size=(8, 2))))
+        self.assertEqual((model.texture_width, model.texture_height), (8, 2))
+
+    def test_unreadable_statistics_are_none(self):
+        model = self.create_model(texture=b"not an image")
+        model.object.save("roto.obj", ContentFile(b"v 0 0 cero\n"), save=False)
+
+        with self.assertLogs("piezas.assets", "WARNING") as logs:
+            measure_model(model)
+
+        self.assertEqual(len(logs.records), 2)
+        self.assertIsNone(model.vertex_count)
+        self.assertIsNone(model.bounding_box_max)
+        self.assertEqual(model.object_size, len(b"v 0 0 cero\n"))
+        self.assertIsNone(model.texture_width)
+
+    def test_detail_lists_the_statistics(self):
+        model = self.create_model()
+        process_model_assets(model)
+        artifact = Artifact.objects.create(description="Vasija", id_model=model)
+
+        response = APIClient().get(f"/api/catalog/artifact/{artifact.id}/")
+
+        stats = response.data["model"]["stats"]
+        self.assertEqual(stats["vertices"], 5)
+        self.assertEqual(stats["bounding_box"]["max"], [1, 4, 2])
+        self.assertEqual(stats["texture"], {"width": 8, "height": 2})
+
+    def test_command_measures_the_models_without_statistics(self):
+        # Models store their file sizes when saved, but not their geometry
+        model = self.create_model()
+        Artifact.objects.create(description="Vasija", id_model=model)
+        measured = Model.objects.create(
+            object=ContentFile(b"v 0 0 0\n", name="punto.obj")
+        )
+        process_model_assets(measured)
+
+        # Closing the connections before forking would end the transaction of the test
+        with mock.patch.object(connections, "close_all"):
+            with self.assertLogs(LOGGER, "INFO") as logs:
+                call_command("measureModels", "--workers", "1", "--missing")
+
+        model.refresh_from_db()
+        self.assertEqual((model.vertex_count, model.face_count), (5, 2))
+        self.assertEqual(model.texture_width, 8)
+        self.assertEqual(
+            logs.records[-1].getMessage(),
+            "1 models measured, 0 could not be measured. "
+            "1 catalog entries were refreshed",
+        )
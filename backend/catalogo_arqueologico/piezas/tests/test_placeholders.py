@@ -0,0 +1,93 @@
+"""
+Tests of the dimensions, dominant colors and placeholders of the thumbnails and images.
+"""
+
+import base64
+import io
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from PIL import Image as PILImage
+from piezas.assets import describe_image, process_image_assets
+from rest_framework.test import APIClient
+from .utils import MediaTestCase, create_artifact
+
+
+def save_image(name, image, fmt="PNG", **options):
+    """
+    Saves an image in the storage and returns its storage name.
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **options)
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def decode_placeholder(placeholder):
+    """
+    Decodes a placeholder data URI into its format and image.
+    """
+    header, data = placeholder.split(",", 1)
+    fmt = header[len("data:image/") : -len(";base64")]
+    image = PILImage.open(io.BytesIO(base64.b64decode(data)))
+    image.load()
+    return fmt, image
+
+
+@override_settings(PLACEHOLDER_SIZE=16)
+class DescribeImageTests(MediaTestCase):
+    def test_dimensions_color_and_placeholder(self):
+        image = PILImage.new("RGB", (200, 100), "#204080")
+        image.paste((255, 0, 0), (0, 0, 40, 20))
+        name = save_image("vasija.png", image)
+
+        preview = describe_image(name)
+
+        self.assertEqual((preview["width"], preview["height"]), (200, 100))
+        self.assertEqual(preview["dominant_color"], "#204080")
+        fmt, placeholder = decode_placeholder(preview["placeholder"])
+        self.assertEqual(placeholder.format.lower(), fmt)
+        self.assertEqual(placeholder.size, (16, 8))
+
+    def test_transparency_is_flattened(self):
+        name = save_image("vasija.png", PILImage.new("RGBA", (20, 20), (0, 0, 0, 0)))
+
+        preview = describe_image(name)
+
+        _, placeholder = decode_placeholder(preview["placeholder"])
+        self.assertNotIn("A", placeholder.getbands())
+
+    def test_rotated_images(self):
+        exif = PILImage.Exif()
+        exif[0x0112] = 6
+        name = save_image(
+            "vasija.jpg", PILImage.new("RGB", (40, 20), "red"), "JPEG", exif=exif
+        )
+
+        preview = describe_image(name)
+
+        self.assertEqual((preview["width"], preview["height"]), (20, 40))
+        _, placeholder = decode_placeholder(preview["placeholder"])
+        self.assertEqual(placeholder.size, (8, 16))
+
+    def test_unreadable_images(self):
+        name = default_storage.save("roto.png", ContentFile(b"no es una imagen"))
+
+        with self.assertRaises(OSError):
+            describe_image(name)
+
+    def test_catalog_lists_the_previews(self):
+        artifact = create_artifact("Vasija roja", images=1)
+        process_image_assets(artifact.id_thumbnail)
+        process_image_assets(artifact.images.get())
+        client = APIClient()
+
+        catalog = client.get("/api/catalog/artifacts/").data["data"][0]
+        detail = client.get(f"/api/catalog/artifact/{artifact.id}/").data
+
+        preview = catalog["thumbnail_preview"]
+        self.assertEqual(detail["thumbnail_preview"], preview)
+        self.assertEqual((preview["width"], preview["height"]), (4, 4))
+        self.assertEqual(preview["color"], "#0000ff")
+        self.assertTrue(preview["placeholder"].startswith("data:image/"))
+        [image_preview] = detail["image_previews"]
+        self.assertEqual(image_preview["color"], "#008000")
@@ -0,0 +1,119 @@
+"""
+Tests of the per-view query budgets (`piezas.mixins`).
+"""
+
+from unittest import mock
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from piezas.cache import get_cache
+from piezas.mixins import QueryBudgetExceeded, QueryBudgetMixin
+from piezas.models import ArtifactCatalogEntry, Culture, Shape, Tag
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+from .utils import MediaTestCase, create_artifact
+
+
+class CountingView(QueryBudgetMixin, APIView):
+    """
+    View that runs as many queries as asked.
+    """
+
+    query_budget = 1
+
+    def get(self, request):
+        for _ in range(int(request.GET["queries"])):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        return Response({})
+
+
+class QueryBudgetMixinTests(MediaTestCase):
+    def get(self, queries):
+        request = RequestFactory().get("/", {"queries": queries})
+        return CountingView.as_view()(request)
+
+    def test_within_budget(self):
+        with mock.patch("piezas.mixins.logger") as logger:
+            self.assertEqual(self.get(1).status_code, 200)
+
+        logger.warning.assert_not_called()
+
+    def test_over_budget_is_logged(self):
+        with self.assertLogs("piezas.mixins", "WARNING") as logs:
+            self.assertEqual(self.get(3).status_code, 200)
+
+        self.assertIn("CountingView ran 3 queries", logs.output[0])
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_over_budget_fails_in_strict_mode(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.get(2)
+
+    @override_settings(QUERY_BUDGETS={"CountingView": 3})
+    def test_budget_from_settings(self):
+        with mock.patch("piezas.mixins.logger") as logger:
+            self.get(3)
+
+        logger.warning.assert_not_called()
+
+
+@override_settings(QUERY_BUDGET_STRICT=True)
+class CatalogQueryBudgetTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.shape = Shape.objects.create(name="Vasija")
+        self.culture = Culture.objects.create(name="Diaguita")
+        self.tags = [Tag.objects.create(name=f"Tag {index}") for index in range(3)]
+        self.client = APIClient()
+
+    def create(self, count, start=0):
+        return [
+            create_artifact(
+                f"Pieza {index}",
+                shape=self.shape,
+                culture=self.culture,
+                tags=self.tags,
+                images=2,
+            )
+            for index in range(start, start + count)
+        ]
+
+    def count_queries(self, url, params=None):
+        """
+        Requests a page, from an empty catalog cache, and counts its queries.
+        """
+        get_cache().clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_catalog_queries_do_not_depend_on_the_page_size(self):
+        self.create(2)
+        few = self.count_queries("/api/catalog/artifacts/", {"tags": "Tag 0"})
+        self.create(8, start=2)
+        many = self.count_queries("/api/catalog/artifacts/", {"tags": "Tag 0,Tag 1"})
+
+        self.assertEqual(few, many)
+
+    def test_catalog_without_entries(self):
+        self.create(4)
+        ArtifactCatalogEntry.objects.all().delete()
+
+        response = self.client.get("/api/catalog/artifacts/")
+
+        self.assertEqual(len(response.data["data"]), 4)
+        self.assertEqual(len(response.data["data"][0]["attributes"]["tags"]), 3)
+
+    def test_detail_with_and_without_entry(self):
+        (artifact,) = self.create(1)
+        url = f"/api/catalog/artifact/{artifact.id}/"
+        with_entry = self.client.get(url).data
+
+        ArtifactCatalogEntry.objects.all().delete()
+        get_cache().clear()
+        without_entry = self.client.get(url).data
+
+        self.assertEqual(with_entry, without_entry)
@@ -0,0 +1,96 @@
+"""
+Tests of the images resized on request (`ImageResizeAPIView`).
+"""
+
+import io
+import os
+import time
+from unittest import mock
+from django.conf import settings
+from django.test import override_settings
+from PIL import Image as PILImage
+from piezas import assets
+from piezas.mediacache import evict
+from rest_framework.test import APIClient
+from .utils import MediaTestCase, create_artifact
+
+
+class ImageResizeTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.artifact = create_artifact("Vasija roja", images=1)
+        self.thumbnail = self.artifact.id_thumbnail
+        self.client = APIClient()
+        self.url = f"/api/catalog/thumbnail/{self.thumbnail.id}/resize"
+
+    def cached_files(self):
+        folder = os.path.join(settings.MEDIA_ROOT, settings.RESIZE_CACHE_URL)
+        return sorted(name for name in os.listdir(folder) if not name.startswith("."))
+
+    @override_settings(RESIZE_WIDTHS=(2, 3), RESIZE_FORMATS=("png", "webp"))
+    def test_resized_image(self):
+        response = self.client.get(self.url, {"w": "2", "fm": "png"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertIn("public", response["Cache-Control"])
+        content = b"".join(response.streaming_content)
+        self.assertEqual(PILImage.open(io.BytesIO(content)).size, (2, 2))
+
+        image = self.artifact.images.get()
+        response = self.client.get(
+            f"/api/catalog/image/{image.id}/resize", {"w": "3", "q": "50"}
+        )
+        self.assertEqual(response["Content-Type"], "image/webp")
+
+    @override_settings(RESIZE_WIDTHS=(2,))
+    def test_resized_image_is_cached(self):
+        with mock.patch.object(
+            assets, "render_image", wraps=assets.render_image
+        ) as render_image:
+            self.client.get(self.url, {"w": "2"})
+            self.client.get(self.url, {"w": "2"})
+            # Every quality of a lossless format is the same file
+            self.client.get(self.url, {"w": "2", "fm": "png", "q": "50"})
+            self.client.get(self.url, {"w": "2", "fm": "png", "q": "90"})
+
+        self.assertEqual(render_image.call_count, 2)
+        self.assertEqual(len(self.cached_files()), 2)
+
+    def test_invalid_parameters(self):
+        for params in (
+            {},
+            {"w": "abc"},
+            {"w": "123"},
+            {"w": "320", "q": "1"},
+            {"w": "320", "fm": "gif"},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+
+                self.assertEqual(response.status_code, 400)
+
+    def test_missing_image(self):
+        response = self.client.get("/api/catalog/thumbnail/0/resize", {"w": "320"})
+        self.assertEqual(response.status_code, 404)
+
+        os.remove(self.thumbnail.path.path)
+        response = self.client.get(self.url, {"w": "320"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_eviction_removes_the_least_recently_used_files(self):
+        folder = os.path.join(settings.MEDIA_ROOT, settings.RESIZE_CACHE_URL)
+        os.makedirs(folder)
+        now = time.time()
+        for index, name in enumerate(("viejo.webp", "medio.webp", "nuevo.webp")):
+            path = os.path.join(folder, name)
+            with open(path, "wb") as file:
+                file.write(b"x" * 100)
+            os.utime(path, (now + index, now + index))
+
+        removed = evict(folder, 250)
+
+        self.assertGreaterEqual(removed, 1)
+        self.assertNotIn("viejo.webp", self.cached_files())
+        self.assertIn("nuevo.webp", self.cached_files())
+        self.assertEqual(evict(folder, 250, interval=60), 0)
@@ -0,0 +1,84 @@
+"""
+Tests of the server-side cache of the public catalog responses (`piezas.cache`).
+"""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from piezas.cache import bump_shared_version, get_version
+from piezas.models import Institution, Shape
+from rest_framework.test import APIClient
+from .utils import MediaTestCase, create_artifact
+
+
+class ResponseCacheTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.shape = Shape.objects.create(name="Vasija")
+        self.artifact = create_artifact("Vasija roja", self.shape)
+        self.client = APIClient()
+
+    def test_responses_are_cached(self):
+        for url in (
+            "/api/catalog/artifacts/",
+            f"/api/catalog/artifact/{self.artifact.id}/",
+            "/api/catalog/metadata/",
+            "/api/catalog/institutions/",
+        ):
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                with CaptureQueriesContext(connection) as queries:
+                    second = self.client.get(url)
+
+                self.assertEqual(second.status_code, 200)
+                self.assertEqual(second.data, first.data)
+                self.assertEqual(len(queries), 0)
+
+    def test_parameters_are_normalized(self):
+        self.client.get("/api/catalog/artifacts/", {"shape": "Vasija", "page": "1"})
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/catalog/artifacts/?page=1&shape=Vasija")
+
+        self.assertEqual(len(queries), 0)
+
+    def test_errors_are_not_cached(self):
+        url = "/api/catalog/artifact/0/"
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertGreater(len(queries), 0)
+
+    def test_changes_invalidate_the_responses_once_committed(self):
+        version = get_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            Institution.objects.create(name="Museo")
+        self.assertEqual(get_version(), version)
+
+        for callback in callbacks:
+            callback()
+
+        self.assertGreater(get_version(), version)
+        response = self.client.get("/api/catalog/institutions/")
+        self.assertIn("Museo", str(response.data))
+
+    def test_renamed_shape_is_served(self):
+        url = f"/api/catalog/artifact/{self.artifact.id}/"
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.shape.name = "Plato"
+            self.shape.save()
+
+        self.assertIn("Plato", str(self.client.get(url).data))
+
+    def test_commands_warn_about_private_caches(self):
+        version = get_version()
+
+        with self.assertLogs("piezas.cache", "WARNING"):
+            shared = bump_shared_version()
+
+        self.assertFalse(shared)
+        self.assertEqual(get_version(), version + 1)
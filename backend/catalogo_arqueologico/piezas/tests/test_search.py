@@ -0,0 +1,107 @@
+"""
+Tests of the full-text search of the catalog (`piezas.search`).
+"""
+
+from django.test import TestCase
+from piezas.models import Artifact, Culture
+from piezas.search import (
+    HIGHLIGHT_START,
+    HIGHLIGHT_STOP,
+    MAX_ARTIFACT_ID,
+    parse_artifact_id,
+    render_highlight,
+    search_artifacts,
+)
+from rest_framework.test import APIClient
+from .utils import MediaTestCase
+
+# Arabic-Indic digits, which str.isdecimal accepts and int reads
+ARABIC_INDIC_DIGITS = str.maketrans("0123456789", "٠١٢٣٤٥٦٧٨٩")
+
+
+class ParseArtifactIdTests(TestCase):
+    def test_decimal_number(self):
+        self.assertEqual(parse_artifact_id("12"), 12)
+        self.assertEqual(parse_artifact_id("12".translate(ARABIC_INDIC_DIGITS)), 12)
+
+    def test_not_a_number(self):
+        for text in ("vasija", "12a", "-1", "1.5", "²", "①", ""):
+            with self.subTest(text=text):
+                self.assertIsNone(parse_artifact_id(text))
+
+    def test_number_outside_primary_key(self):
+        self.assertEqual(parse_artifact_id(str(MAX_ARTIFACT_ID)), MAX_ARTIFACT_ID)
+        self.assertIsNone(parse_artifact_id(str(MAX_ARTIFACT_ID + 1)))
+
+
+class RenderHighlightTests(TestCase):
+    def test_escapes_description_and_marks_matches(self):
+        headline = f"<script>alert(1)</script> {HIGHLIGHT_START}vasija{HIGHLIGHT_STOP}"
+
+        self.assertEqual(
+            render_highlight(headline),
+            "&lt;script&gt;alert(1)&lt;/script&gt; <mark>vasija</mark>",
+        )
+
+    def test_no_headline(self):
+        self.assertIsNone(render_highlight(None))
+
+
+class SearchArtifactsTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.vasija = Artifact.objects.create(description="Vasija pintada & greda")
+        self.plato = Artifact.objects.create(description="Plato de greda")
+
+    def search(self, text):
+        return list(search_artifacts(Artifact.objects.all(), text))
+
+    def test_matches_description(self):
+        self.assertEqual(self.search("vasija"), [self.vasija])
+
+    def test_last_word_matches_as_prefix(self):
+        self.assertEqual(self.search("vasija pin"), [self.vasija])
+        self.assertEqual(self.search("pla de"), [self.plato])
+
+    def test_matches_metadata_names(self):
+        culture = Culture.objects.create(name="Diaguita")
+        self.plato.id_culture = culture
+        self.plato.save()
+
+        self.assertEqual(self.search("diaguita"), [self.plato])
+
+        culture.name = "Animas"
+        culture.save()
+        self.assertEqual(self.search("animas"), [self.plato])
+
+    def test_artifact_id_is_listed_first(self):
+        numbered = Artifact.objects.create(description=f"Vasija {self.vasija.id}")
+
+        self.assertEqual(
+            self.search(str(self.vasija.id)), [self.vasija, numbered]
+        )
+
+    def test_number_matches_artifact_id(self):
+        text = str(self.plato.id).translate(ARABIC_INDIC_DIGITS)
+
+        self.assertEqual(self.search(text), [self.plato])
+
+    def test_numbers_that_are_not_ids(self):
+        for text in ("²", str(MAX_ARTIFACT_ID + 1), "9" * 40):
+            with self.subTest(text=text):
+                self.assertEqual(self.search(text), [])
+
+    def test_catalog_highlight_is_escaped(self):
+        response = APIClient().get("/api/catalog/artifacts/", {"query": "pintada"})
+
+        self.assertEqual(response.status_code, 200)
+        (artifact,) = response.data["data"]
+        self.assertEqual(
+            artifact["highlight"], "Vasija <mark>pintada</mark> &amp; greda"
+        )
+
+    def test_catalog_search_with_huge_number(self):
+        response = APIClient().get("/api/catalog/artifacts/", {"query": "9" * 40})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["data"], [])
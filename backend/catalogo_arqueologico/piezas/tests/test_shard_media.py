@@ -0,0 +1,127 @@
+"""
+Tests of the sharded layout of the media folder and the shardMedia management command.
+"""
+
+import os
+import posixpath
+from unittest import mock
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from piezas.models import Artifact, Model, Thumbnail
+from piezas.storage import is_sharded, shard_name
+from .utils import MediaTestCase
+
+LOGGER = "piezas.management.commands.shardMedia"
+
+
+class ShardedUploadTests(MediaTestCase):
+    def test_texture_is_stored_next_to_material(self):
+        model = Model.objects.create(
+            texture=ContentFile(b"texture", name="textura.png"),
+            object=ContentFile(b"object", name="vasija.obj"),
+            material=ContentFile(b"material", name="vasija.mtl"),
+        )
+
+        self.assertEqual(
+            posixpath.dirname(model.texture.name),
+            posixpath.dirname(model.material.name),
+        )
+
+
+class ShardMediaTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        # Files stored before the sharded layout, with their names assigned as they are
+        self.thumbnail = Thumbnail.objects.create(
+            path=self.store("thumbnails/vasija.png", b"thumbnail")
+        )
+        self.model = Model.objects.create(
+            texture=self.store("materials/textura.png", b"texture"),
+            object=self.store("objects/vasija.obj", b"object"),
+            material=self.store("materials/vasija.mtl", b"material"),
+        )
+        with open(default_storage.path("objects/vasija.obj.gz"), "wb") as sidecar:
+            sidecar.write(b"gzip")
+        self.artifact = Artifact.objects.create(
+            description="Vasija", id_thumbnail=self.thumbnail, id_model=self.model
+        )
+
+    def store(self, name, content):
+        return default_storage.save(name, ContentFile(content))
+
+    def shard(self):
+        """
+        Runs the command and returns its log records.
+        """
+        with self.assertLogs(LOGGER, "INFO") as logs:
+            call_command("shardMedia")
+        return logs.records
+
+    def summary(self, records):
+        """
+        Returns the summary of the command: its last information line.
+        """
+        return [r.getMessage() for r in records if r.levelname == "INFO"][-1]
+
+    def test_moves_files_to_sharded_layout(self):
+        records = self.shard()
+
+        self.assertEqual(
+            self.summary(records), "4 files moved to the sharded layout, 0 could not"
+        )
+        self.thumbnail.refresh_from_db()
+        self.model.refresh_from_db()
+        self.assertEqual(
+            self.thumbnail.path.name, shard_name("thumbnails/", "vasija.png")
+        )
+        self.assertTrue(is_sharded(self.model.object.name, "objects/"))
+        with default_storage.open(self.model.object.name) as obj:
+            self.assertEqual(obj.read(), b"object")
+        self.assertTrue(default_storage.exists(f"{self.model.object.name}.gz"))
+
+    def test_texture_is_moved_next_to_material(self):
+        self.shard()
+
+        self.model.refresh_from_db()
+        self.assertEqual(
+            self.model.material.name, shard_name("materials/", "vasija.mtl")
+        )
+        self.assertEqual(
+            posixpath.dirname(self.model.texture.name),
+            posixpath.dirname(self.model.material.name),
+        )
+
+    def test_old_names_are_kept_for_private_cache(self):
+        self.shard()
+
+        self.assertTrue(default_storage.exists("thumbnails/vasija.png"))
+        self.assertTrue(default_storage.exists("objects/vasija.obj.gz"))
+
+    @mock.patch("piezas.management.commands.shardMedia.is_shared", return_value=True)
+    def test_old_names_are_removed_for_shared_cache(self, is_shared):
+        self.shard()
+
+        self.assertFalse(default_storage.exists("thumbnails/vasija.png"))
+        self.assertFalse(default_storage.exists("materials/textura.png"))
+        self.assertFalse(default_storage.exists("objects/vasija.obj.gz"))
+
+    def test_sharded_files_are_skipped(self):
+        self.shard()
+
+        self.assertEqual(
+            self.summary(self.shard()),
+            "0 files moved to the sharded layout, 0 could not",
+        )
+
+    def test_missing_files_keep_their_name(self):
+        os.remove(default_storage.path("thumbnails/vasija.png"))
+
+        records = self.shard()
+
+        self.assertIn("ERROR", [record.levelname for record in records])
+        self.assertEqual(
+            self.summary(records), "3 files moved to the sharded layout, 1 could not"
+        )
+        self.thumbnail.refresh_from_db()
+        self.assertEqual(self.thumbnail.path.name, "thumbnails/vasija.png")
@@ -0,0 +1,139 @@
+"""
+Tests of the precompressed copies of the object and material files of the 3D models.
+"""
+
+import gzip
+import os
+from unittest import mock
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from piezas.assets import (
+    SKIPPED_SIDECAR_SUFFIX,
+    build_sidecars,
+    compress_model_files,
+    remove_sidecars,
+    sidecar_encodings,
+)
+from piezas.models import Model
+from .utils import MediaTestCase
+
+LOGGER = "piezas.management.commands.compressModels"
+
+# An OBJ file big enough to be smaller once compressed
+OBJ_CONTENT = b"v 0 0 0\nv 1 0 0\nv 0 1 0\n" * 200 + b"f 1 2 3\n"
+
+# A file too small to be smaller once compressed
+TINY_CONTENT = b"v 0 0 0\n"
+
+
+# The tests do not depend on whether the brotli package is installed
+@mock.patch("piezas.assets.brotli", None)
+class SidecarTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.name = default_storage.save("objects/grilla.obj", ContentFile(OBJ_CONTENT))
+        self.path = default_storage.path(self.name)
+
+    def test_encodings(self):
+        self.assertEqual(sidecar_encodings(), ["gz"])
+
+    def test_builds_copy_with_time_of_file(self):
+        built = build_sidecars(self.name)
+
+        self.assertEqual(built, [f"{self.name}.gz"])
+        with gzip.open(f"{self.path}.gz") as copy:
+            self.assertEqual(copy.read(), OBJ_CONTENT)
+        self.assertEqual(
+            os.stat(f"{self.path}.gz").st_mtime_ns, os.stat(self.path).st_mtime_ns
+        )
+
+    def test_copies_are_reproducible(self):
+        build_sidecars(self.name)
+        with open(f"{self.path}.gz", "rb") as copy:
+            first = copy.read()
+        remove_sidecars(self.name)
+        build_sidecars(self.name)
+
+        with open(f"{self.path}.gz", "rb") as copy:
+            self.assertEqual(copy.read(), first)
+
+    def test_up_to_date_copies_are_kept(self):
+        build_sidecars(self.name)
+
+        self.assertEqual(build_sidecars(self.name), [])
+
+    def test_stale_copies_are_rebuilt(self):
+        build_sidecars(self.name)
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        self.assertEqual(build_sidecars(self.name), [f"{self.name}.gz"])
+
+    def test_copies_not_smaller_are_skipped(self):
+        name = default_storage.save("objects/punto.obj", ContentFile(TINY_CONTENT))
+        path = default_storage.path(name)
+
+        self.assertEqual(build_sidecars(name), [])
+        self.assertFalse(os.path.exists(f"{path}.gz"))
+        self.assertTrue(os.path.exists(f"{path}.gz{SKIPPED_SIDECAR_SUFFIX}"))
+        # The marker prevents compressing the file again until it changes
+        with mock.patch("piezas.assets._compress") as compress:
+            self.assertEqual(build_sidecars(name), [])
+        compress.assert_not_called()
+
+    def test_remove_sidecars(self):
+        build_sidecars(self.name)
+        marker = f"{self.path}.br{SKIPPED_SIDECAR_SUFFIX}"
+        with open(marker, "wb"):
+            pass
+
+        remove_sidecars(self.name)
+
+        self.assertFalse(os.path.exists(f"{self.path}.gz"))
+        self.assertFalse(os.path.exists(marker))
+        # Removing missing copies does nothing
+        remove_sidecars(self.name)
+
+
+@mock.patch("piezas.assets.brotli", None)
+class ModelSidecarTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.model = Model.objects.create(
+            object=ContentFile(OBJ_CONTENT, name="grilla.obj"),
+            material=ContentFile(TINY_CONTENT, name="grilla.mtl"),
+        )
+        self.path = self.model.object.path
+
+    def test_saving_model_builds_copies(self):
+        self.assertTrue(os.path.exists(f"{self.path}.gz"))
+        self.assertFalse(os.path.exists(f"{self.model.material.path}.gz"))
+
+    def test_unreadable_files_are_logged_and_their_copies_removed(self):
+        os.remove(self.path)
+
+        with self.assertLogs("piezas.assets", "WARNING"):
+            self.assertEqual(compress_model_files(self.model), [])
+        self.assertFalse(os.path.exists(f"{self.path}.gz"))
+
+    def test_command_builds_missing_copies(self):
+        remove_sidecars(self.model.object.name)
+
+        with self.assertLogs(LOGGER, "INFO") as logs:
+            call_command("compressModels", "--workers", "2")
+
+        self.assertTrue(os.path.exists(f"{self.path}.gz"))
+        self.assertEqual(
+            logs.records[-1].getMessage(),
+            "2 files compressed as gz, 0 could not be compressed. 1 copies were built",
+        )
+
+    def test_command_removes_copies_of_unreadable_files(self):
+        os.remove(self.path)
+
+        with self.assertLogs(LOGGER, "INFO") as logs:
+            call_command("compressModels")
+
+        self.assertFalse(os.path.exists(f"{self.path}.gz"))
+        self.assertIn("1 could not be compressed", logs.records[-1].getMessage())
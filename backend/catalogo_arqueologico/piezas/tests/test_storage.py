@@ -0,0 +1,94 @@
+"""
+Tests of the content-addressed storage of the uploaded media (`piezas.storage`).
+"""
+
+import hashlib
+import os
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from piezas.models import Model
+from piezas.storage import shard_name
+from .utils import MediaTestCase
+
+
+class ContentAddressedStorageTests(MediaTestCase):
+    def assertLinked(self, name, digest):
+        """
+        Checks that a stored file is a hard link to the blob of a hash.
+        """
+        blob = default_storage.path(default_storage.blob_name(digest))
+        self.assertTrue(os.path.samefile(default_storage.path(name), blob))
+
+    def test_save_stores_each_content_once(self):
+        digest = hashlib.sha256(b"vasija").hexdigest()
+        first = default_storage.save("objects/a.obj", ContentFile(b"vasija"))
+        second = default_storage.save("objects/b.obj", ContentFile(b"vasija"))
+
+        self.assertEqual((first, second), ("objects/a.obj", "objects/b.obj"))
+        self.assertLinked(first, digest)
+        self.assertLinked(second, digest)
+        blob = default_storage.path(default_storage.blob_name(digest))
+        self.assertEqual(os.stat(blob).st_nlink, 3)
+
+    def test_save_same_content_under_its_name_keeps_the_name(self):
+        first = default_storage.save("objects/a.obj", ContentFile(b"vasija"))
+        second = default_storage.save("objects/a.obj", ContentFile(b"vasija"))
+
+        self.assertEqual(first, second)
+
+    def test_save_other_content_under_a_taken_name_gets_another_name(self):
+        first = default_storage.save("objects/a.obj", ContentFile(b"vasija"))
+        second = default_storage.save("objects/a.obj", ContentFile(b"plato"))
+
+        self.assertNotEqual(first, second)
+        with default_storage.open(first) as file:
+            self.assertEqual(file.read(), b"vasija")
+        with default_storage.open(second) as file:
+            self.assertEqual(file.read(), b"plato")
+
+    def test_link_stored_blob(self):
+        digest, size = default_storage.save_blob(ContentFile(b"vasija"))
+
+        name = default_storage.link(digest, "materials/a.mtl")
+
+        self.assertEqual((name, size), ("materials/a.mtl", 6))
+        self.assertLinked(name, digest)
+        self.assertEqual(default_storage.link(digest, name), name)
+
+    def test_adopt_moves_file_into_blob_store(self):
+        path = default_storage.path("images/legacy.png")
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as file:
+            file.write(b"legacy")
+
+        digest, size = default_storage.adopt("images/legacy.png")
+
+        self.assertEqual(digest, hashlib.sha256(b"legacy").hexdigest())
+        self.assertEqual(size, 6)
+        self.assertLinked("images/legacy.png", digest)
+
+    def test_adopt_copy_of_stored_blob_links_it(self):
+        stored = default_storage.save("images/new.png", ContentFile(b"legacy"))
+        path = default_storage.path("images/copy.png")
+        with open(path, "wb") as file:
+            file.write(b"legacy")
+
+        digest, _ = default_storage.adopt("images/copy.png")
+
+        self.assertLinked("images/copy.png", digest)
+        self.assertTrue(os.path.samefile(path, default_storage.path(stored)))
+        blob = default_storage.path(default_storage.blob_name(digest))
+        self.assertEqual(os.stat(blob).st_nlink, 3)
+
+    def test_model_files_are_hashed_and_sharded(self):
+        model = Model.objects.create(
+            texture=ContentFile(b"texture", name="vasija.png"),
+            object=ContentFile(b"object", name="vasija.obj"),
+            material=ContentFile(b"material", name="vasija.mtl"),
+        )
+
+        self.assertEqual(model.object.name, shard_name("objects/", "vasija.obj"))
+        self.assertEqual(model.object_sha256, hashlib.sha256(b"object").hexdigest())
+        self.assertEqual(model.object_size, 6)
+        self.assertLinked(model.object.name, model.object_sha256)
+
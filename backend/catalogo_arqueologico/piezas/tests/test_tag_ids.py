@@ -0,0 +1,78 @@
+"""
+Tests of the denormalized tag id array of the artifacts and its backfill command.
+"""
+
+from django.core.management import call_command
+from piezas.cache import get_cache
+from piezas.facets import GENERATION_CACHE_KEY, facet_index
+from piezas.models import Artifact, Tag
+from rest_framework.test import APIClient
+from .utils import MediaTestCase
+
+
+class TagIdsTests(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.rojo = Tag.objects.create(name="Rojo")
+        self.negro = Tag.objects.create(name="Negro")
+        self.blanco = Tag.objects.create(name="Blanco")
+        self.artifact = Artifact.objects.create(description="Vasija")
+        self.other = Artifact.objects.create(description="Plato")
+
+    def tag_ids(self, artifact):
+        artifact.refresh_from_db(fields=["tag_ids"])
+        return artifact.tag_ids
+
+    def test_array_follows_the_relation(self):
+        self.artifact.id_tags.add(self.negro, self.rojo)
+        self.assertEqual(
+            self.tag_ids(self.artifact), sorted([self.rojo.id, self.negro.id])
+        )
+
+        self.artifact.id_tags.remove(self.rojo)
+        self.assertEqual(self.tag_ids(self.artifact), [self.negro.id])
+
+        self.artifact.id_tags.clear()
+        self.assertEqual(self.tag_ids(self.artifact), [])
+
+    def test_array_follows_the_relation_from_the_tag_side(self):
+        self.rojo.artifact.add(self.artifact, self.other)
+        self.assertEqual(self.tag_ids(self.other), [self.rojo.id])
+
+        self.rojo.artifact.clear()
+        self.assertEqual(self.tag_ids(self.artifact), [])
+        self.assertEqual(self.tag_ids(self.other), [])
+
+    def test_deleted_tag_is_removed_from_the_array(self):
+        self.artifact.id_tags.add(self.rojo, self.negro)
+
+        self.rojo.delete()
+
+        self.assertEqual(self.tag_ids(self.artifact), [self.negro.id])
+
+    def test_filter_requires_every_tag(self):
+        self.artifact.id_tags.add(self.rojo, self.negro)
+        self.other.id_tags.add(self.rojo)
+
+        response = APIClient().get("/api/catalog/artifacts/", {"tags": "rojo, Negro"})
+
+        self.assertEqual(response.status_code, 200)
+        ids = [artifact["id"] for artifact in response.data["data"]]
+        self.assertEqual(ids, [self.artifact.id])
+
+    def test_backfill(self):
+        self.artifact.id_tags.add(self.rojo, self.blanco)
+        self.other.id_tags.add(self.negro)
+        # Bulk updates do not send signals
+        Artifact.objects.update(tag_ids=[])
+        facet_index.rebuild()
+        generation = get_cache().get(GENERATION_CACHE_KEY)
+
+        call_command("backfillTagIds", batch_size=1)
+
+        self.assertEqual(
+            self.tag_ids(self.artifact), sorted([self.rojo.id, self.blanco.id])
+        )
+        self.assertEqual(self.tag_ids(self.other), [self.negro.id])
+        self.assertIsNone(facet_index.generation)
+        self.assertEqual(get_cache().get(GENERATION_CACHE_KEY), generation + 1)
@@ -0,0 +1,165 @@
+"""
+Tests of the web versions of the textures and materials of the 3D models.
+"""
+
+import io
+import os
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, override_settings
+from PIL import Image as PILImage
+from piezas.assets import (
+    available_formats,
+    build_web_assets,
+    build_web_material,
+    build_web_texture,
+    process_model_assets,
+    web_texture_size,
+)
+from piezas.models import Artifact, Model
+from rest_framework.test import APIClient
+from .utils import MediaTestCase, OBJ_TRIANGLE, png_bytes
+
+
+def image_bytes(fmt, size, mode="RGB", **options):
+    """
+    Builds an image of a format.
+    """
+    buffer = io.BytesIO()
+    PILImage.new(mode, size, "red").save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+class WebTextureSizeTests(SimpleTestCase):
+    @override_settings(WEB_TEXTURE_MAX_SIZE=2048)
+    def test_sides_are_powers_of_two(self):
+        self.assertEqual(web_texture_size(1000, 300), (1024, 256))
+        self.assertEqual(web_texture_size(512, 700), (512, 512))
+        self.assertEqual(web_texture_size(1, 1), (1, 1))
+
+    @override_settings(WEB_TEXTURE_MAX_SIZE=3000)
+    def test_sides_are_capped(self):
+        self.assertEqual(web_texture_size(5000, 3000), (2048, 2048))
+
+
+@override_settings(WEB_TEXTURE_FORMAT="jpeg", WEB_TEXTURE_MIPMAPS=False)
+class WebTextureTests(MediaTestCase):
+    def create_model(self, texture, name="textura.png"):
+        return Model.objects.create(
+            texture=ContentFile(texture, name=name),
+            object=ContentFile(OBJ_TRIANGLE, name="vasija.obj"),
+            material=ContentFile(
+                b"newmtl barro\nmap_Ka textura.png\nmap_Kd -s 2 2 1 textura.png\n"
+                b"map_Bump relieve.png\n",
+                name="vasija.mtl",
+            ),
+        )
+
+    def open(self, name):
+        return PILImage.open(default_storage.path(name))
+
+    def test_texture_is_resized_and_encoded(self):
+        model = self.create_model(png_bytes(size=(300, 100)))
+
+        name, mipmaps = build_web_texture(model)
+
+        self.assertEqual(name, f"web/{model.pk}_textura.jpg")
+        self.assertEqual(mipmaps, [])
+        with self.open(name) as image:
+            self.assertEqual((image.format, image.size), ("JPEG", (256, 128)))
+
+    def test_transparent_texture_is_kept_lossless(self):
+        model = self.create_model(image_bytes("PNG", (64, 64), "RGBA"))
+
+        name, _ = build_web_texture(model)
+
+        self.assertEqual(name, f"web/{model.pk}_textura.png")
+        with self.open(name) as image:
+            self.assertEqual(image.mode, "RGBA")
+
+    def test_texture_already_fit_is_copied(self):
+        # Encoding a noisy image again at a higher quality would make it larger
+        buffer = io.BytesIO()
+        noise = PILImage.effect_noise((64, 64), 64).convert("RGB")
+        noise.save(buffer, "JPEG", quality=20)
+        texture = buffer.getvalue()
+        model = self.create_model(texture, name="textura.jpg")
+
+        name, _ = build_web_texture(model)
+
+        with default_storage.open(name) as web_texture:
+            self.assertEqual(web_texture.read(), texture)
+
+    @override_settings(WEB_TEXTURE_FORMAT="webp")
+    def test_webp(self):
+        if not available_formats(["webp"]):
+            self.skipTest("Pillow was built without WebP support")
+        model = self.create_model(png_bytes(size=(64, 64)))
+
+        name, _ = build_web_texture(model)
+
+        self.assertEqual(name, f"web/{model.pk}_textura.webp")
+
+    @override_settings(WEB_TEXTURE_MIPMAPS=True)
+    def test_mipmaps(self):
+        model = self.create_model(png_bytes(size=(8, 4)))
+
+        _, mipmaps = build_web_texture(model)
+
+        self.assertEqual(
+            mipmaps, [f"web/{model.pk}_textura_mip{level}.jpg" for level in (1, 2, 3)]
+        )
+        sizes = []
+        for mipmap in mipmaps:
+            with self.open(mipmap) as image:
+                sizes.append(image.size)
+        self.assertEqual(sizes, [(4, 2), (2, 1), (1, 1)])
+
+    def test_material_references_web_texture(self):
+        model = self.create_model(png_bytes(size=(64, 64)))
+        texture, _ = build_web_texture(model)
+
+        name = build_web_material(model, texture)
+
+        self.assertEqual(name, f"web/{model.pk}_vasija.mtl")
+        with default_storage.open(name) as material:
+            lines = material.read().decode().splitlines()
+        reference = os.path.basename(texture)
+        self.assertEqual(
+            lines,
+            [
+                "newmtl barro",
+                f"map_Ka {reference}",
+                f"map_Kd -s 2 2 1 {reference}",
+                "map_Bump relieve.png",
+            ],
+        )
+
+    def test_unreadable_texture_keeps_the_original(self):
+        model = self.create_model(b"not an image")
+
+        with self.assertLogs("piezas.assets", "WARNING"):
+            build_web_assets(model)
+
+        self.assertFalse(model.web_texture)
+        with default_storage.open(model.web_material.name) as material:
+            lines = material.read().decode().splitlines()
+        reference = os.path.relpath(
+            default_storage.path(model.texture.name),
+            os.path.dirname(default_storage.path(model.web_material.name)),
+        )
+        self.assertEqual(lines[2], f"map_Kd -s 2 2 1 {reference}")
+
+    @override_settings(WEB_TEXTURE_MIPMAPS=True)
+    def test_detail_lists_the_web_versions(self):
+        model = self.create_model(png_bytes(size=(2, 2)))
+        process_model_assets(model)
+        artifact = Artifact.objects.create(description="Vasija", id_model=model)
+
+        response = APIClient().get(f"/api/catalog/artifact/{artifact.id}/")
+
+        data = response.data["model"]
+        self.assertTrue(data["texture"].endswith(f"/web/{model.pk}_textura.jpg"))
+        self.assertTrue(data["material"].endswith(f"/web/{model.pk}_vasija.mtl"))
+        [mipmap] = data["mipmaps"]
+        self.assertTrue(mipmap.endswith(f"/web/{model.pk}_textura_mip1.jpg"))
@@ -0,0 +1,102 @@
+"""
+This module contains the helpers shared by the tests of the piezas application.
+
+Classes:
+- MediaTestCase: Test case that stores the media files in a temporary folder.
+
+Functions:
+- png_bytes: Builds a small PNG image.
+- create_artifact: Creates an artifact with its model, thumbnail, images and metadata.
+"""
+
+import io
+import shutil
+import tempfile
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from PIL import Image as PILImage
+from piezas.cache import get_cache
+from piezas.facets import facet_index
+from piezas.models import Artifact, Image, Model, Thumbnail
+
+# A triangle, as an OBJ file
+OBJ_TRIANGLE = b"v 0 0 0\nv 1 0 0\nv 0 1 0\nvt 0 0\nvt 1 0\nvt 0 1\nf 1/1 2/2 3/3\n"
+
+
+def png_bytes(color="red", size=(4, 4)):
+    """
+    Builds a small PNG image.
+
+    Args:
+        color (str): The color of the image.
+        size (tuple): The width and height of the image.
+
+    Returns:
+        bytes: The PNG file.
+    """
+    buffer = io.BytesIO()
+    PILImage.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def create_artifact(
+    description="Vasija", shape=None, culture=None, tags=(), images=0, name=None
+):
+    """
+    Creates an artifact with its model, thumbnail, images and metadata. The files are
+    named and filled after the description, so every artifact has its own files.
+
+    Args:
+        description (str): The description of the artifact.
+        shape (Shape): The shape of the artifact.
+        culture (Culture): The culture of the artifact.
+        tags (iterable): The tags of the artifact.
+        images (int): The number of images of the artifact.
+        name (str): The base name of the files. Defaults to the description.
+
+    Returns:
+        Artifact: The artifact.
+    """
+    name = name or description.lower().replace(" ", "_")
+    model = Model.objects.create(
+        texture=ContentFile(png_bytes(), name=f"{name}.png"),
+        object=ContentFile(OBJ_TRIANGLE + f"# {name}\n".encode(), name=f"{name}.obj"),
+        material=ContentFile(
+            f"newmtl {name}\nmap_Kd {name}.png\n".encode(), name=f"{name}.mtl"
+        ),
+    )
+    thumbnail = Thumbnail.objects.create(
+        path=ContentFile(png_bytes("blue"), name=f"{name}.png")
+    )
+    artifact = Artifact.objects.create(
+        description=description,
+        id_model=model,
+        id_thumbnail=thumbnail,
+        id_shape=shape,
+        id_culture=culture,
+    )
+    if tags:
+        artifact.id_tags.set(tags)
+    for index in range(images):
+        Image.objects.create(
+            id_artifact=artifact,
+            path=ContentFile(png_bytes("green"), name=f"{name}_{index}.png"),
+        )
+    return artifact
+
+
+class MediaTestCase(TestCase):
+    """
+    Test case that stores the media files in a temporary folder, removed afterwards,
+    and starts every test with an empty catalog cache and facet index.
+    """
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root, DOWNLOAD_ACCEL_REDIRECT=False)
+        media.enable()
+        self.addCleanup(media.disable)
+        get_cache().clear()
+        facet_index.generation = None
@@ -13,10 +13,19 @@ of artifact records.
 detailed information about a specific artifact.
 - A list view of metadata, accessible at 'metadata/', which lists all metadata records
 associated with artifacts.
+- A suggestions view, accessible at 'metadata/suggestions/', which lists the shape, culture
+and tag names most similar to possibly misspelled ones.
 - An institutions view, accessible at 'institutions/', listing all institutions that 
 have artifacts in the catalog.
 - A download endpoint for artifacts, accessible at 'artifact/<int:pk>/download', allowing 
 for the downloading of artifact data.
+- A download endpoint for the files of the 3D model of an artifact, accessible at 
+'artifact/<int:pk>/download/<kind>', where kind is texture, object or material.
+- A bulk download endpoint, accessible at 'artifacts/download', which downloads the 
+artifacts selected by id or by the catalog filters in a single archive.
+- Resizing endpoints for thumbnails and images, accessible at 'thumbnail/<int:pk>/resize' 
+and 'image/<int:pk>/resize', which serve them at the width, format and quality given in 
+the query parameters.
 
 Each route is connected to a view from the 'piezas' application, which handles the 
 request and response logic for that endpoint.
@@ -34,6 +43,18 @@ urlpatterns = [
     path("artifact/<int:pk>/", views.ArtifactDetailAPIView.as_view()),
     path("artifact/<int:pk>/update", views.ArtifactCreateUpdateAPIView.as_view()),
     path("metadata/", views.MetadataListAPIView.as_view()),
+    path("metadata/suggestions/", views.MetadataSuggestionsAPIView.as_view()),
     path("institutions/", views.InstitutionAPIView.as_view()),
     path("artifact/<int:pk>/download", views.ArtifactDownloadAPIView.as_view()),
+    path(
+        "artifact/<int:pk>/download/<str:kind>",
+        views.ArtifactModelFileAPIView.as_view(),
+    ),
+    path("artifacts/download", views.ArtifactBulkDownloadAPIView.as_view()),
+    path(
+        "thumbnail/<int:pk>/resize",
+        views.ImageResizeAPIView.as_view(),
+        {"kind": "thumbnail"},
+    ),
+    path("image/<int:pk>/resize", views.ImageResizeAPIView.as_view(), {"kind": "image"}),
 ]
@@ -5,30 +5,43 @@ and Artifact Downloads in the application.
 Classes:
 - ArtifactDetailAPIView: Provides a detail view for a single artifact. 
 - MetadataListAPIView: Provides a list view for metadata related to artifacts. 
+- MetadataSuggestionsAPIView: Suggests metadata names similar to misspelled ones.
 - ArtifactDownloadAPIView: Handles both the retrieval of detailed information about 
     an artifact and the creation of artifact requester records. 
+- ArtifactModelFileAPIView: Downloads a single file of the 3D model of an artifact.
+- ArtifactBulkDownloadAPIView: Downloads several artifacts in a single archive.
+- ImageResizeAPIView: Serves a thumbnail or image resized on request.
 - CustomPageNumberPagination: Provides paginated responses for API views.
+- CatalogCursorPagination: Provides keyset (cursor) paginated responses for the catalog.
 - CatalogAPIView: Provides a list view for artifacts in the catalog.
 - ArtifactCreateUpdateAPIView: Provides functionality for creating and updating artifacts.
 - InstitutionAPIView: Provides a list view for institutions.
+
+The public read views (artifact detail, metadata, catalog and institutions) cache their
+responses with `piezas.cache.cached_response` until the catalog data changes, and answer
+conditional requests with `piezas.conditional.conditional_response`.
 """
 
+import functools
 import math
-import zipfile
-from io import BytesIO
 import logging
+import mimetypes
 import os
 from rest_framework import permissions, generics, status
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
-from django.db.models import Q
+from django.core import signing
 from django.core.files import File
-from django.http import HttpResponse
+from django.core.files.storage import default_storage
 from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from PIL import Image as PillowImage
 from .serializers import (
     ArtifactRequesterSerializer,
     ArtifactSerializer,
+    BulkDownloadSerializer,
     CatalogSerializer,
     UpdateArtifactSerializer,
     InstitutionSerializer,
@@ -50,11 +63,38 @@ from .models import (
 )
 from .permissions import IsFuncionarioPermission, IsAdminPermission
 from .authentication import TokenAuthentication
+from .storage import link_for_field, link_into, media_lookup
+from .assets import (
+    available_formats,
+    process_image_assets,
+    process_model_assets,
+    resized_image,
+)
+from .archives import (
+    artifact_archive_entries,
+    bulk_archive_entries,
+    cached_archive,
+    current_archive_path,
+    stream_zip,
+)
+from .mediacache import discard, send_file
+from .cache import cached_response, get_cache, versioned_key
+from .catalog import prefetch_missing_entries
+from .conditional import (
+    artifact_state,
+    catalog_state,
+    conditional_response,
+    institutions_state,
+    metadata_state,
+)
+from .facets import facet_index, resolve_names
+from .mixins import QueryBudgetMixin
+from .search import filter_catalog, resolve_tag_ids, search_filter, suggest_names
 
 logger = logging.getLogger(__name__)
 
 
-class ArtifactDetailAPIView(generics.RetrieveAPIView):
+class ArtifactDetailAPIView(QueryBudgetMixin, generics.RetrieveAPIView):
     """
     A view that provides detail for a single artifact.
 
@@ -67,14 +107,56 @@ class ArtifactDetailAPIView(generics.RetrieveAPIView):
             for serializing the Artifact object.
         permission_classes: Defines the list of permissions that apply to
             this view. It is set to allow any user to access this view.
+        query_budget: Maximum number of queries allowed per request. The artifact
+            is serialized from its catalog entry, loaded in the same query, plus
+            one query for the conditional GET validators. An artifact without entry
+            is serialized from its related rows, joined in the same query except for
+            the prefetched tags, images and simplified models.
+        fallback_prefetches: Relations loaded when the artifact has no entry.
     """
 
-    queryset = Artifact.objects.all()
+    queryset = Artifact.objects.select_related(
+        "catalog_entry", "id_shape", "id_culture", "id_thumbnail", "id_model"
+    )
     serializer_class = ArtifactSerializer
     permission_classes = [permissions.AllowAny]
+    query_budget = 2
+    fallback_prefetches = ("id_tags", "images", "id_model__lods")
+
+    @conditional_response(artifact_state)
+    @cached_response
+    def get(self, request, *args, **kwargs):
+        """
+        Handles GET requests.
+
+        It retrieves the artifact, from the response cache when possible.
 
+        Args:
+            request: The HTTP request object.
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Response: Django REST Framework's Response object containing serialized
+                data for the artifact.
+        """
+        return super().get(request, *args, **kwargs)
 
-class MetadataListAPIView(generics.ListAPIView):
+    def get_object(self):
+        """
+        Retrieves the artifact, with its related rows if it has no catalog entry.
+
+        Returns:
+            Artifact: The artifact.
+        """
+        artifact = super().get_object()
+        self.extra_queries += prefetch_missing_entries(
+            [artifact], self.fallback_prefetches
+        )
+        return artifact
+
+
+class MetadataListAPIView(QueryBudgetMixin, generics.ListAPIView):
     """
     A view that provides a list of metadata related to artifacts.
 
@@ -83,9 +165,16 @@ class MetadataListAPIView(generics.ListAPIView):
     Attributes:
         permission_classes: Defines the list of permissions that apply to this
             view. It is set to allow any user to access this view.
+        query_budget: Maximum number of queries allowed per request. One query
+            per kind of metadata, plus one per kind for the conditional GET
+            validators.
     """
 
     permission_classes = [permissions.AllowAny]
+    query_budget = 6
+
+    @conditional_response(metadata_state)
+    @cached_response
     def get(self, request, *args, **kwargs):
         """
         Handles GET requests.
@@ -127,12 +216,78 @@ class MetadataListAPIView(generics.ListAPIView):
             logger.error(f"Could not retrieve metadata:{e}")
             return Response({"detail": f"Error al obtener metadata"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class MetadataSuggestionsAPIView(generics.GenericAPIView):
+    """
+    A view that suggests shape, culture and tag names similar to the ones given
+    ("did you mean").
+
+    It accepts the same filter parameters as CatalogAPIView: `culture`, `shape`, `tags`
+    and `query`. It extends Django REST Framework's GenericAPIView.
+
+    Attributes:
+        permission_classes: Defines the list of permissions that apply to this
+            view. It is set to allow any user to access this view.
+    """
+
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        """
+        Handles GET requests.
+
+        It looks for the names most similar to each given parameter, using the
+        trigram indexes of the shape, culture and tag names.
+
+        Args:
+            request: The HTTP request object.
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            Response: Django REST Framework's Response object containing the
+                suggestions for each given parameter. Tag suggestions are grouped
+                by the tag they were asked for.
+        """
+
+        def rename_key(instances):
+            return [
+                {"id": item.id, "value": item.name, "similarity": item.similarity}
+                for item in instances
+            ]
+
+        culture = request.query_params.get("culture", None)
+        shape = request.query_params.get("shape", None)
+        tags = request.query_params.get("tags", None)
+        description = request.query_params.get("query", None)
+
+        data = {}
+        if culture is not None:
+            data["culture"] = rename_key(suggest_names(Culture, culture))
+        if shape is not None:
+            data["shape"] = rename_key(suggest_names(Shape, shape))
+        if tags is not None:
+            data["tags"] = {
+                tag.strip(): rename_key(suggest_names(Tag, tag.strip()))
+                for tag in tags.split(",")
+            }
+        if description is not None:
+            # Free text may be the name of any kind of metadata
+            data["query"] = {
+                "shapes": rename_key(suggest_names(Shape, description)),
+                "cultures": rename_key(suggest_names(Culture, description)),
+                "tags": rename_key(suggest_names(Tag, description)),
+            }
+        return Response({"data": data}, status=status.HTTP_200_OK)
+
+
 class ArtifactDownloadAPIView(generics.RetrieveAPIView, generics.CreateAPIView):
     """
     A view that provides downloaded data of detailed information about an artifact.
 
-    Allows the creation of artifact requester records. It extends Django REST
-    Framework's RetrieveAPIView and CreateAPIView.
+    Allows the creation of artifact requester records. Each record comes with a signed
+    download token, valid for DOWNLOAD_TOKEN_MAX_AGE seconds, which the download of the
+    archive requires, so every download is recorded. It extends Django REST Framework's
+    RetrieveAPIView and CreateAPIView.
 
     Attributes:
         queryset: Specifies the queryset that this view will use to retrieve
@@ -143,12 +298,50 @@ class ArtifactDownloadAPIView(generics.RetrieveAPIView, generics.CreateAPIView):
             single object from the queryset.
         permission_classes: Defines the list of permissions that apply to
             this view. It is set to allow any user to access this view.
+        token_salt: Salt of the signed download tokens.
     """
 
     queryset = Artifact.objects.all()
     serializer_class = ArtifactSerializer
     lookup_field = "pk"
     permission_classes = [permissions.AllowAny]
+    token_salt = "piezas.download"
+
+    def make_download_token(self, requester):
+        """
+        Builds the token that authorizes the download of an artifact.
+
+        Args:
+            requester (ArtifactRequester): The recorded requester of the artifact.
+
+        Returns:
+            str: The signed token, holding the ids of the artifact and the requester.
+        """
+        return signing.dumps(
+            {"artifact": requester.artifact_id, "requester": requester.pk},
+            salt=self.token_salt,
+        )
+
+    def check_download_token(self, token, pk):
+        """
+        Checks that a download token authorizes the download of an artifact.
+
+        Args:
+            token (str): The token returned when the requester was recorded.
+            pk (int): The id of the downloaded artifact.
+
+        Returns:
+            bool: True if the token is valid, not expired and issued for the artifact.
+        """
+        try:
+            grant = signing.loads(
+                token,
+                salt=self.token_salt,
+                max_age=settings.DOWNLOAD_TOKEN_MAX_AGE,
+            )
+        except signing.BadSignature:
+            return False
+        return grant.get("artifact") == pk
 
     def post(self, request, *args, **kwargs):
         """
@@ -164,7 +357,8 @@ class ArtifactDownloadAPIView(generics.RetrieveAPIView, generics.CreateAPIView):
 
         Returns:
             Response: Django REST Framework's Response object containing serialized
-                data for the created artifact requester.
+                data for the created artifact requester, and the `token` required to
+                download the artifact.
         """
         logger.info(
             "Creating new artifact requester for artifact {}".format(kwargs.get("pk"))
@@ -218,14 +412,21 @@ class ArtifactDownloadAPIView(generics.RetrieveAPIView, generics.CreateAPIView):
                     {"detail": "Error al crear solicitante"},
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 )
-        return Response({"data": serializer.data}, status=status.HTTP_201_CREATED)
+        return Response(
+            {"data": serializer.data, "token": self.make_download_token(requester)},
+            status=status.HTTP_201_CREATED,
+        )
 
     def get(self, request, *args, **kwargs):
         """
         Handles GET requests.
 
-        It retrieves detailed information about an artifact and returns a response
-        containing the serialized data for the artifact.
+        It sends a ZIP archive with the thumbnail, 3D model files and images of the
+        artifact, built on the first download and cached on disk. The requester is
+        recorded beforehand with a POST request, whose download token must be sent as
+        the `token` query parameter. When DOWNLOAD_ACCEL_REDIRECT is enabled, the
+        archive itself is sent by nginx once the token is checked. Byte ranges are
+        supported, so interrupted downloads can be resumed while the token is valid.
 
         Args:
             request: The HTTP request object.
@@ -233,50 +434,334 @@ class ArtifactDownloadAPIView(generics.RetrieveAPIView, generics.CreateAPIView):
             **kwargs: Arbitrary keyword arguments.
 
         Returns:
-            Response: Django REST Framework's Response object containing serialized
-                data for the artifact.
+            HttpResponse: The ZIP archive of the artifact, or the X-Accel-Redirect
+                response that makes nginx send it. A 403 error is returned if the
+                token is missing, expired or issued for another artifact.
         """
         pk = kwargs.get("pk")
         if pk is not None:
+            token = request.query_params.get("token", "")
+            if not self.check_download_token(token, pk):
+                return Response(
+                    {"detail": "Se requiere registrar la solicitud de descarga"},
+                    status=status.HTTP_403_FORBIDDEN,
+                )
             logger.info(f"Downloading artifact {pk}")
             try:
-                artifact = Artifact.objects.get(pk=pk)
+                artifact = Artifact.objects.select_related(
+                    "id_thumbnail", "id_model"
+                ).get(pk=pk)
             except Artifact.DoesNotExist:
                 return Response(
                     {"detail": "Pieza no encontrada"}, status=status.HTTP_404_NOT_FOUND
                 )
 
-            buffer = BytesIO()
+            entries = artifact_archive_entries(artifact)
+            missing = [path for path, _ in entries if not os.path.isfile(path)]
+            if missing:
+                logger.error(f"Missing files for artifact {pk}: {missing}")
+                return Response(
+                    {"detail": "Error al generar el archivo de descarga"},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
 
-            with zipfile.ZipFile(buffer, "w") as zipf:
-                if artifact.id_thumbnail:
-                    zipf.write(
-                        artifact.id_thumbnail.path.path,
-                        f"thumbnail/{artifact.id_thumbnail.path}",
-                    )
+            # The archive is built once and reused until the files of the artifact
+            # change
+            archive = cached_archive(artifact)
+            return send_file(
+                archive, f"artifact_{pk}.zip", "application/zip", request=request
+            )
 
-                zipf.write(
-                    artifact.id_model.texture.path,
-                    f"model/{artifact.id_model.texture.name}",
-                )
-                zipf.write(
-                    artifact.id_model.object.path,
-                    f"model/{artifact.id_model.object.name}",
-                )
-                zipf.write(
-                    artifact.id_model.material.path,
-                    f"model/{artifact.id_model.material.name}",
-                )
 
-                images = Image.objects.filter(id_artifact=artifact.id)
-                for image in images:
-                    zipf.write(image.path.path, f"model/{image.path}")
+class ArtifactModelFileAPIView(generics.GenericAPIView):
+    """
+    A view that downloads a single file of the 3D model of an artifact.
+
+    Byte ranges are supported, so interrupted downloads of large files can be resumed.
+
+    Attributes:
+        queryset: Specifies the queryset that this view will use to retrieve
+            the Artifact object, with its model.
+        permission_classes: Defines the list of permissions that apply to
+            this view. It is set to allow any user to access this view.
+        model_files: The fields of the model that can be downloaded.
+    """
+
+    queryset = Artifact.objects.select_related("id_model")
+    permission_classes = [permissions.AllowAny]
+    model_files = ("texture", "object", "material")
+
+    def get(self, request, *args, **kwargs):
+        """
+        Handles GET requests.
+
+        Args:
+            request: The HTTP request object.
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments, with the id of the artifact (`pk`)
+                and the downloaded field (`kind`).
+
+        Returns:
+            HttpResponse: The file, or the part of it asked with a Range header.
+        """
+        kind = kwargs.get("kind")
+        artifact = self.get_queryset().filter(pk=kwargs.get("pk")).first()
+        if kind not in self.model_files or artifact is None or not artifact.id_model:
+            return Response(
+                {"detail": "Archivo no encontrado"}, status=status.HTTP_404_NOT_FOUND
+            )
+        field = getattr(artifact.id_model, kind)
+        if not field or not os.path.isfile(field.path):
+            return Response(
+                {"detail": "Archivo no encontrado"}, status=status.HTTP_404_NOT_FOUND
+            )
+        content_type = mimetypes.guess_type(field.name)[0] or "application/octet-stream"
+        return send_file(
+            field.path, os.path.basename(field.name), content_type, request=request
+        )
+
+
+class ArtifactBulkDownloadAPIView(generics.GenericAPIView):
+    """
+    A view that downloads several artifacts in a single ZIP archive.
+
+    The artifacts are selected by id, or with the same filter parameters as the catalog.
+    A requester record is created for every downloaded artifact.
+
+    Attributes:
+        queryset: Specifies the queryset that this view will use to select the
+            artifacts. It retrieves all Artifact objects.
+        permission_classes: Defines the list of permissions that apply to
+            this view. It is set to allow any user to access this view.
+        authentication_classes: Defines the list of authentication classes that
+            apply to this view. Registered users are recorded as requesters with
+            the data of their account.
+    """
+
+    queryset = Artifact.objects.all()
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = [TokenAuthentication]
 
-            buffer.seek(0)
+    def get_artifact_ids(self, data):
+        """
+        Selects the ids of the artifacts to download.
 
-            response = HttpResponse(buffer, content_type="application/zip")
-            response["Content-Disposition"] = f"attachment; filename=artifact_{pk}.zip"
-            return response
+        Args:
+            data (dict): The validated body of the request, with an `ids` list, or the
+                catalog filters (`query`, `culture`, `shape`, `tags` and `fuzzy`).
+
+        Returns:
+            list: The ids of the selected artifacts, at most one more than
+                BULK_DOWNLOAD_MAX_ARTIFACTS.
+        """
+        ids = data.get("ids")
+        if ids:
+            queryset = self.get_queryset().filter(pk__in=ids)
+        else:
+            queryset = filter_catalog(self.get_queryset(), data)
+        limit = settings.BULK_DOWNLOAD_MAX_ARTIFACTS + 1
+        return list(queryset.order_by("id").values_list("id", flat=True)[:limit])
+
+    def get_requester_fields(self, request, data):
+        """
+        Retrieves the data of the requester of the download.
+
+        Args:
+            request: The HTTP request object.
+            data (dict): The validated body of the request.
+
+        Returns:
+            dict: The fields of the requester records, or None if the request lacks
+                them.
+        """
+        user = request.user
+        if user.is_authenticated:
+            return {
+                "name": user.first_name + " " + user.last_name,
+                "rut": user.rut,
+                "email": user.email,
+                "is_registered": True,
+                "institution": user.institution if user.institution else None,
+            }
+
+        if not all(data.get(field) for field in ("fullName", "rut", "email")):
+            return None
+        if data.get("institution") is None:
+            return None
+        return {
+            "name": data["fullName"],
+            "rut": data["rut"],
+            "email": data["email"],
+            "comments": data.get("comments"),
+            "is_registered": False,
+            "institution": data["institution"],
+        }
+
+    def post(self, request, *args, **kwargs):
+        """
+        Handles POST requests.
+
+        It records the requester of every selected artifact with a single query, and
+        streams a ZIP archive with a folder per artifact, holding its thumbnail, 3D
+        model files and images. The files are read by a bounded pool of threads.
+
+        Args:
+            request: The HTTP request object.
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            HttpResponse: The streamed ZIP archive, or a Response with the error. A
+                400 error is returned if the body does not pass BulkDownloadSerializer.
+        """
+        serializer = BulkDownloadSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {
+                    "detail": "Solicitud de descarga inválida",
+                    "errors": serializer.errors,
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        data = serializer.validated_data
+        ids = self.get_artifact_ids(data)
+        if not ids:
+            return Response(
+                {"detail": "No se encontraron piezas"}, status=status.HTTP_404_NOT_FOUND
+            )
+        if len(ids) > settings.BULK_DOWNLOAD_MAX_ARTIFACTS:
+            return Response(
+                {
+                    "detail": "La selección supera el máximo de "
+                    f"{settings.BULK_DOWNLOAD_MAX_ARTIFACTS} piezas por descarga"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        requester = self.get_requester_fields(request, data)
+        if requester is None:
+            return Response(
+                {"detail": "Datos del solicitante incompletos"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        logger.info(f"Downloading {len(ids)} artifacts")
+        artifacts = (
+            Artifact.objects.filter(pk__in=ids)
+            .select_related("id_thumbnail", "id_model")
+            .prefetch_related("images")
+            .order_by("id")
+        )
+        entries = bulk_archive_entries(artifacts)
+        missing = [path for path, _ in entries if not os.path.isfile(path)]
+        if missing:
+            logger.error(f"Missing files for bulk download: {missing}")
+            return Response(
+                {"detail": "Error al generar el archivo de descarga"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        size = sum(os.path.getsize(path) for path, _ in entries)
+        if size > settings.BULK_DOWNLOAD_MAX_BYTES:
+            return Response(
+                {"detail": "La selección supera el tamaño máximo de descarga"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        ArtifactRequester.objects.bulk_create(
+            [ArtifactRequester(artifact_id=pk, **requester) for pk in ids]
+        )
+
+        response = StreamingHttpResponse(
+            stream_zip(
+                entries,
+                workers=settings.BULK_DOWNLOAD_WORKERS,
+                window=settings.BULK_DOWNLOAD_READ_AHEAD,
+            ),
+            content_type="application/zip",
+        )
+        response["Content-Disposition"] = 'attachment; filename="artifacts.zip"'
+        return response
+
+
+class ImageResizeAPIView(generics.GenericAPIView):
+    """
+    A view that serves a thumbnail or image resized on request.
+
+    The width (`w`), format (`fm`) and quality (`q`) are taken from the query
+    parameters and must belong to the RESIZE_WIDTHS, RESIZE_FORMATS and
+    RESIZE_QUALITIES allow-lists. The format is not named `format`, which Django REST
+    Framework reserves to choose the renderer. Resized images are kept in a bounded
+    disk cache (see `piezas.assets.resized_image`).
+
+    Attributes:
+        permission_classes: Defines the list of permissions that apply to
+            this view. It is set to allow any user to access this view.
+        sources: The model of each kind of resizable image.
+    """
+
+    permission_classes = [permissions.AllowAny]
+    sources = {"thumbnail": Thumbnail, "image": Image}
+
+    def get(self, request, *args, **kwargs):
+        """
+        Handles GET requests.
+
+        Args:
+            request: The HTTP request object.
+            *args: Variable length argument list.
+            **kwargs: Arbitrary keyword arguments, with the kind of image (`kind`) and
+                its id (`pk`).
+
+        Returns:
+            HttpResponse: The resized image, or a Response with the error.
+        """
+        params = request.query_params
+        try:
+            width = int(params.get("w", ""))
+            quality = int(params.get("q", settings.DERIVATIVE_QUALITY))
+        except ValueError:
+            width, quality = None, None
+        fmt = params.get("fm", "webp").lower()
+        if (
+            width not in settings.RESIZE_WIDTHS
+            or quality not in settings.RESIZE_QUALITIES
+            or fmt not in available_formats(settings.RESIZE_FORMATS)
+        ):
+            return Response(
+                {"detail": "Parámetros de imagen inválidos"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        model = self.sources[kwargs.get("kind")]
+        name = model.objects.filter(pk=kwargs.get("pk")).values_list("path", flat=True)
+        name = name.first()
+        if not name:
+            return Response(
+                {"detail": "Imagen no encontrada"}, status=status.HTTP_404_NOT_FOUND
+            )
+        try:
+            path = resized_image(name, width, fmt, quality)
+        except FileNotFoundError:
+            return Response(
+                {"detail": "Imagen no encontrada"}, status=status.HTTP_404_NOT_FOUND
+            )
+        except (OSError, ValueError, PillowImage.DecompressionBombError) as e:
+            logger.error(f"Could not resize {name}: {e}")
+            return Response(
+                {"detail": "Error al procesar la imagen"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        stem = os.path.splitext(os.path.basename(name))[0]
+        response = send_file(
+            path,
+            f"{stem}_{width}w.{fmt}",
+            f"image/{fmt}",
+            request=request,
+            as_attachment=False,
+        )
+        patch_cache_control(response, public=True, max_age=settings.RESIZE_MAX_AGE)
+        return response
 
 
 class CustomPageNumberPagination(PageNumberPagination):
@@ -312,7 +797,116 @@ class CustomPageNumberPagination(PageNumberPagination):
         )
 
 
-class CatalogAPIView(generics.ListAPIView):
+class CatalogCursorPagination(CursorPagination):
+    """
+    A keyset pagination class for the catalog.
+
+    Pages are selected with a `WHERE id > last_id` condition on the sort key instead of
+    an OFFSET, so every page has the same cost regardless of its depth. The total is
+    only computed when asked for, and cached for CATALOG_COUNT_CACHE_TIMEOUT seconds.
+    Search results are ordered by relevance, so they are not paginated with it.
+
+    It extends Django REST Framework's CursorPagination.
+
+    Attributes:
+        page_size: Specifies the number of items to display per page.
+        ordering: Specifies the default sort key.
+        sort_query_param: Name of the query parameter used to choose the sort key.
+        sort_keys: Supported sort keys. A leading "-" sorts in descending order.
+        count_query_param: Name of the query parameter used to skip the total. When it
+            is "false", the total is not computed.
+        count_ignored_params: Query parameters that do not change the total.
+    """
+
+    page_size = 9
+    ordering = "id"
+    sort_query_param = "sort"
+    sort_keys = ("id", "-id", "description", "-description")
+    count_query_param = "count"
+    count_ignored_params = ("cursor", "pagination", "sort", "count", "page", "facets")
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Retrieves the ordering requested with the sort query parameter.
+
+        Non-unique sort keys are followed by the id, so the order is always total.
+
+        Args:
+            request: The HTTP request object.
+            queryset: The queryset being paginated.
+            view: The view being paginated.
+
+        Returns:
+            tuple: The fields to order by.
+        """
+        sort = request.query_params.get(self.sort_query_param, self.ordering)
+        if sort not in self.sort_keys:
+            sort = self.ordering
+        if sort.lstrip("-") == "id":
+            return (sort,)
+        return (sort, "id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Paginates the queryset, keeping it to compute the total later if needed.
+
+        Args:
+            queryset: The queryset to paginate.
+            request: The HTTP request object.
+            view: The view being paginated.
+
+        Returns:
+            list: The items of the current page.
+        """
+        self.unpaginated_queryset = queryset
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self):
+        """
+        Retrieves the total number of items, from the cache when possible.
+
+        Returns:
+            int: The total number of items, or None if the client asked to skip it.
+        """
+        requested = self.request.query_params.get(self.count_query_param, "true")
+        if requested.lower() == "false":
+            return None
+        filters = sorted(
+            (key, value)
+            for key, value in self.request.query_params.items()
+            if key not in self.count_ignored_params
+        )
+        cache = get_cache()
+        cache_key = versioned_key("count", filters)
+        count = cache.get(cache_key)
+        if count is None:
+            count = self.unpaginated_queryset.count()
+            cache.set(cache_key, count, settings.CATALOG_COUNT_CACHE_TIMEOUT)
+        return count
+
+    def get_paginated_response(self, data):
+        """
+        Retrieves paginated response data.
+
+        Args:
+            data: The data to be paginated.
+
+        Returns:
+            Response: Django REST Framework's Response object containing paginated data,
+                with links to the next and previous pages.
+        """
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "total": self.get_count(),
+                "per_page": self.page_size,
+                "data": data,
+            }
+        )
+
+
+class CatalogAPIView(QueryBudgetMixin, generics.ListAPIView):
     """
     A view that provides a list of artifacts in the catalog.
 
@@ -323,13 +917,61 @@ class CatalogAPIView(generics.ListAPIView):
             for serializing the Artifact objects.
         pagination_class: Specifies the pagination class that should be used
             for paginating the response data.
+        cursor_pagination_class: Specifies the pagination class used when the
+            client asks for keyset pagination, with `pagination=cursor` or a
+            `cursor` parameter. It is not available with a search text.
         permission_classes: Defines the list of permissions that apply to
             this view. It is set to allow any user to access this view.
+        query_budget: Maximum number of queries allowed per request. A page is
+            loaded with a count and the artifacts joined with their catalog entries,
+            regardless of the page size, plus one query to resolve the tag filter
+            and one for the conditional GET validators. Artifacts without entry are
+            serialized from their related rows, joined in the same query except for
+            the tags, prefetched for the whole page.
+        fallback_prefetches: Relations loaded for the artifacts without entry.
+        facets_query_budget: Extra queries allowed when facet counts are requested.
+            Facets are counted in memory, and only need to resolve the filtered
+            names and the artifacts matched by the search text.
     """
 
     serializer_class = CatalogSerializer
     pagination_class = CustomPageNumberPagination
+    cursor_pagination_class = CatalogCursorPagination
     permission_classes = [permissions.AllowAny]
+    query_budget = 4
+    facets_query_budget = 4
+    fallback_prefetches = ("id_tags",)
+
+    def get_query_budget(self):
+        """
+        Retrieves the query budget for the view, including the facet counts if
+        requested.
+
+        Returns:
+            int: The maximum number of queries allowed, or None if there is no budget.
+        """
+        budget = super().get_query_budget()
+        facets = self.request.GET.get("facets", "false").lower() == "true"
+        if budget is not None and facets:
+            budget += self.facets_query_budget
+        return budget
+
+    @property
+    def paginator(self):
+        """
+        Retrieves the paginator instance for the view.
+
+        Returns:
+            BasePagination: The cursor paginator if the client asked for it, or the
+                page number paginator otherwise.
+        """
+        if not hasattr(self, "_paginator"):
+            params = self.request.query_params
+            if params.get("pagination") == "cursor" or "cursor" in params:
+                self._paginator = self.cursor_pagination_class()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
 
     def get_queryset(self):
         """
@@ -338,31 +980,29 @@ class CatalogAPIView(generics.ListAPIView):
         Returns:
             queryset: The queryset containing all artifacts in the catalog.
         """
-        queryset = Artifact.objects.all().order_by("id")
+        queryset = Artifact.objects.select_related(
+            "catalog_entry", "id_shape", "id_culture", "id_thumbnail"
+        ).order_by("id")
         # Filter by query parameters
-        description = self.request.query_params.get("query", None)
-        culture = self.request.query_params.get("culture", None)
-        shape = self.request.query_params.get("shape", None)
-        tags = self.request.query_params.get("tags", None)
+        return filter_catalog(queryset, self.request.query_params)
 
-        q_objects = Q()
+    def paginate_queryset(self, queryset):
+        """
+        Retrieves a page of artifacts, with the related rows of those without catalog
+        entry.
 
-        # Case insensitive search
-        if description is not None:
-            # Check if the description is in the artifact's description
-            # or the Id of the artifact
-            q_objects &= Q(description__icontains=description) | Q(
-                id__icontains=description
-            )
-        if culture is not None:
-            q_objects &= Q(id_culture__name__iexact=culture)
-        if shape is not None:
-            q_objects &= Q(id_shape__name__iexact=shape)
-        if tags is not None:
-            for tag in tags.split(","):
-                q_objects &= Q(id_tags__name__iexact=tag.strip())
+        Args:
+            queryset (QuerySet): The filtered artifacts.
 
-        return queryset.filter(q_objects)
+        Returns:
+            list: The artifacts of the page.
+        """
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            self.extra_queries += prefetch_missing_entries(
+                page, self.fallback_prefetches
+            )
+        return page
 
     def get_serializer_context(self):
         """
@@ -373,12 +1013,47 @@ class CatalogAPIView(generics.ListAPIView):
         """
         return {"request": self.request}
 
+    def get_facets(self):
+        """
+        Counts the artifacts of every culture, shape and tag within the current results.
+
+        Returns:
+            dict: The cultures, shapes and tags with at least one artifact, with their
+                counts.
+        """
+        params = self.request.query_params
+        fuzzy = params.get("fuzzy", "false").lower() == "true"
+        filters = {}
+        if params.get("culture") is not None:
+            filters["culture"] = resolve_names(Culture, params["culture"], fuzzy)
+        if params.get("shape") is not None:
+            filters["shape"] = resolve_names(Shape, params["shape"], fuzzy)
+        if params.get("tags") is not None:
+            filters["tag"] = resolve_tag_ids(
+                [tag.strip() for tag in params["tags"].split(",")], fuzzy
+            )
+
+        matches = None
+        description = params.get("query", None)
+        if description is not None:
+            matches = Artifact.objects.filter(
+                search_filter(description, fuzzy)
+            ).values_list("id", flat=True)
+
+        return facet_index.counts(filters, matches)
+
+    @conditional_response(catalog_state)
+    @cached_response
     def get(self, request, *args, **kwargs):
         """
         Handles GET requests.
 
         It retrieves all artifacts in the catalog, serializes them, and returns
-        paginated data in a response.
+        paginated data in a response. With `facets=true`, the response also includes
+        the number of artifacts of every culture, shape and tag within the results.
+
+        Search results are ordered by relevance, which keyset pages can not follow, so
+        they are only paginated by page number.
 
         Args:
             request: The HTTP request object.
@@ -387,17 +1062,29 @@ class CatalogAPIView(generics.ListAPIView):
 
         Returns:
             Response: Django REST Framework's Response object containing paginated
-                data for the artifacts.
+                data for the artifacts, or the error if a search asks for keyset
+                pagination.
         """
+        searching = request.query_params.get("query", "").strip()
+        if searching and isinstance(self.paginator, self.cursor_pagination_class):
+            return Response(
+                {"detail": "La paginación por cursor no admite búsquedas por texto"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
         queryset = self.filter_queryset(self.get_queryset())
+        extra = {}
+        if request.query_params.get("facets", "false").lower() == "true":
+            extra["facets"] = self.get_facets()
+
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
             page_data = self.get_paginated_response(serializer.data).data
-            return Response({**page_data})
+            return Response({**page_data, **extra})
 
         serializer = self.get_serializer(queryset, many=True)
-        return Response({"data": serializer.data}, status=status.HTTP_200_OK)
+        return Response({"data": serializer.data, **extra}, status=status.HTTP_200_OK)
 
 
 class ArtifactCreateUpdateAPIView(generics.GenericAPIView):
@@ -561,21 +1248,45 @@ class ArtifactCreateUpdateAPIView(generics.GenericAPIView):
             files: The files to be uploaded.
             data: The data associated with the files.
         """
+        # Archive of the current files, discarded below if any of them changes
+        old_archive = current_archive_path(instance)
+
         # Handle thumbnail
         thumbnail_data = files.get("new_thumbnail")
         if thumbnail_data:
-                # Upload file
-                thumbnail_file = File(thumbnail_data, name=thumbnail_data.name)
-                # Create Thumbnail instance
-                thumbnail = Thumbnail.objects.create(path=thumbnail_file)
-                logger.info(f"Thumbnail created: {thumbnail.path}")
+                # Store the file, and reuse the thumbnail with the same content if any
+                digest, size = default_storage.save_blob(thumbnail_data)
+                thumbnail = (
+                    Thumbnail.objects.filter(sha256=digest).order_by("id").first()
+                )
+                if thumbnail is None:
+                    thumbnail = Thumbnail.objects.create(
+                        path=link_for_field(
+                            Thumbnail._meta.get_field("path"),
+                            digest,
+                            thumbnail_data.name,
+                        ),
+                        sha256=digest,
+                        size=size,
+                    )
+                    logger.info(f"Thumbnail created: {thumbnail.path}")
+                    process_image_assets(thumbnail)
+                else:
+                    logger.info(f"Thumbnail reused: {thumbnail.path}")
                 # Set the thumbnail
                 instance.id_thumbnail = thumbnail
         else:
             thumbnail_name = data.get("thumbnail", None)
             if thumbnail_name:
-                thumbnail_path = os.path.join(settings.THUMBNAILS_URL, thumbnail_name)
-                thumbnail = Thumbnail.objects.get(path=thumbnail_path)
+                # Only the file name is sent, which is found in the flat or sharded
+                # layout (see `piezas.storage`)
+                thumbnail = Thumbnail.objects.filter(
+                    media_lookup(
+                        "path",
+                        settings.THUMBNAILS_URL,
+                        os.path.basename(thumbnail_name),
+                    )
+                ).earliest("id")
                 instance.id_thumbnail = thumbnail
                 logger.info(f"Thumbnail kept: {thumbnail.path}")
             else:
@@ -583,42 +1294,39 @@ class ArtifactCreateUpdateAPIView(generics.GenericAPIView):
                 logger.info("Thumbnail removed")
 
         # Handle model files
-        # New files
-        new_texture_file = files.get("model[new_texture]")
-        new_object_file = files.get("model[new_object]")
-        new_material_file = files.get("model[new_material]")
-
-        new_texture_instance, new_object_instance, new_material_instance = (
-            None,
-            None,
-            None,
-        )
-        if new_texture_file:
-            new_texture_instance = File(new_texture_file, name=new_texture_file.name)
-            logger.info(f"New texture file: {new_texture_instance}")
-        if new_object_file:
-            new_object_instance = File(new_object_file, name=new_object_file.name)
-            logger.info(f"New object file: {new_object_instance}")
-        if new_material_file:
-            new_material_instance = File(new_material_file, name=new_material_file.name)
-            logger.info(f"New material file: {new_material_instance}")
+        # New files are stored first, so the model is looked up by the hashes of its
+        # files. Kept files are hashed if they were stored before hashes were recorded
+        model_files = {}
+        # Names of the files of the new model, so its texture and material are linked
+        # next to each other
+        new_model = Model()
+        for kind in ("texture", "object", "material"):
+            new_file = files.get(f"model[new_{kind}]")
+            if new_file:
+                digest, size = default_storage.save_blob(new_file)
+                # Linked only if a new model is created
+                name = functools.partial(
+                    link_into, new_model, kind, digest, new_file.name
+                )
+                logger.info(f"New {kind} file: {new_file.name}")
+            else:
+                current = getattr(instance.id_model, kind)
+                digest = getattr(instance.id_model, f"{kind}_sha256")
+                size = getattr(instance.id_model, f"{kind}_size")
+                if digest is None:
+                    digest, size = default_storage.adopt(current.name)
+                name = current.name
+                setattr(new_model, kind, name)
+            model_files[kind] = (digest, size, name)
 
         # Update Model instance
         # It allows to create a new model with only the new files
         model, created = Model.objects.get_or_create(
-            texture=(
-                new_texture_instance
-                if new_texture_instance
-                else instance.id_model.texture
-            ),
-            object=(
-                new_object_instance if new_object_instance else instance.id_model.object
-            ),
-            material=(
-                new_material_instance
-                if new_material_instance
-                else instance.id_model.material
-            ),
+            **{f"{kind}_sha256": file[0] for kind, file in model_files.items()},
+            defaults={
+                **{kind: name for kind, (_, _, name) in model_files.items()},
+                **{f"{kind}_size": size for kind, (_, size, _) in model_files.items()},
+            },
         )
         if created:
             logger.info(
@@ -628,6 +1336,13 @@ class ArtifactCreateUpdateAPIView(generics.GenericAPIView):
             logger.info(
                 f"Model updated: {model.texture}, {model.object}, {model.material}"
             )
+        if (
+            created
+            or not model.glb
+            or not model.web_material
+            or model.vertex_count is None
+        ):
+            process_model_assets(model)
         # Set the model
         instance.id_model = model
 
@@ -647,10 +1362,17 @@ class ArtifactCreateUpdateAPIView(generics.GenericAPIView):
         keep_images = data.getlist(
             "images", []
         )  # images are paths from photos already uploaded
+        # The same file may belong to several artifacts, so the images of this one are
+        # preferred
+        own_images = {
+            os.path.basename(image.path.name): image for image in old_images
+        }
         for image_name in keep_images:
             # Update instances
-            image_path = os.path.join(settings.IMAGES_URL, image_name)
-            image = Image.objects.get(path=image_path)
+            image_name = os.path.basename(image_name)
+            image = own_images.pop(image_name, None) or Image.objects.filter(
+                media_lookup("path", settings.IMAGES_URL, image_name)
+            ).earliest("id")
             image.id_artifact = instance
             image.save()
             logger.info(f"Image updated: {image.path}")
@@ -663,9 +1385,13 @@ class ArtifactCreateUpdateAPIView(generics.GenericAPIView):
             # Create Image instance
             image = Image.objects.create(id_artifact=instance, path=image_file)
             logger.info(f"Image created: {image.path}")
+            process_image_assets(image)
+
+        if old_archive is not None and old_archive != current_archive_path(instance):
+            discard(old_archive)
 
 
-class InstitutionAPIView(generics.ListCreateAPIView):
+class InstitutionAPIView(QueryBudgetMixin, generics.ListCreateAPIView):
     """
     A view that provides a list of institutions.
 
@@ -678,11 +1404,15 @@ class InstitutionAPIView(generics.ListCreateAPIView):
             for serializing the Institution objects.
         permission_classes: Defines the list of permissions that apply to
             this view. It is set to allow any user to access this view.
+        query_budget: Maximum number of queries allowed per request.
     """
     queryset = Institution.objects.all().order_by("id")
     serializer_class = InstitutionSerializer
     permission_classes = [permissions.AllowAny]
+    query_budget = 2
 
+    @conditional_response(institutions_state)
+    @cached_response
     def get(self, request, *args, **kwargs):
         """
         Handles GET requests.
@@ -109,7 +109,7 @@ const ArtifactDetails = () => {
 
       // If the first fetch was successful, proceed with downloading the artifact
       const downloadResponse = await fetch(
-        `${API_URLS.DETAILED_ARTIFACT}/${artifactId}/download`,
+        `${API_URLS.DETAILED_ARTIFACT}/${artifactId}/download?token=${encodeURIComponent(data.token)}`,
         {
           method: "GET",
           headers: {
@@ -96,7 +96,7 @@ const DownloadArtifactForm = ({ artifactInfo, handleClose }) => {
         // If the code reaches here, the first fetch was successful
         // Proceed with the second fetch
         const downloadResponse = await fetch(
-          `${API_URLS.DETAILED_ARTIFACT}/${artifactInfo.id}/download`,
+          `${API_URLS.DETAILED_ARTIFACT}/${artifactInfo.id}/download?token=${encodeURIComponent(data.token)}`,
           {
             method: "GET",
             headers: {